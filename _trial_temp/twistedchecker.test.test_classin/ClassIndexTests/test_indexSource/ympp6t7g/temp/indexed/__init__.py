@@ -0,0 +1 @@
+from indexed.base import Base as PublicBase
@@ -0,0 +1,14 @@
+
+from twisted.trial import unittest
+
+class Base(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    class Nested(object):
+        def nestedMethod(self):
+            pass
+
+x = 1
+
+class Other: pass
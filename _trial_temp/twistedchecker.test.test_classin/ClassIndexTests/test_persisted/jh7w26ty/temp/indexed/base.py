@@ -0,0 +1 @@
+class Base: pass
@@ -0,0 +1,15 @@
+
+import indexed
+from . import base
+from .missing import Unknown
+
+class Derived(indexed.PublicBase):
+    if True:
+        def conditional(self):
+            pass
+
+class FromNested(base.Base.Nested):
+    pass
+
+class FromUnknown(Unknown, dict):
+    pass
@@ -0,0 +1,6 @@
+
+obj, something = None, None
+
+func = getattr(obj, "foo_" + something)
+getattr(obj, "baz_%s" % something)()
+    
\ No newline at end of file
@@ -0,0 +1,5 @@
+
+obj, something = None, None
+
+className = getattr(obj, "Bar_%s" % something)
+    
\ No newline at end of file
@@ -0,0 +1 @@
+# No more patterns.
@@ -0,0 +1,17 @@
+
+# Not invalid names.
+def foo_SOMETHING():
+    pass
+
+class Bar_SOMETHING():
+    def baz_SOMETHING():
+        pass
+
+# Invalid names.
+def a_SOMETHING():
+    pass
+
+class B_SOMETHING():
+    def c_SOMETHING():
+        pass
+    
\ No newline at end of file
@@ -0,0 +1,3 @@
+
+class Base(object):
+    pass
@@ -0,0 +1 @@
+getattr(object, 'do_%s' % 'name')
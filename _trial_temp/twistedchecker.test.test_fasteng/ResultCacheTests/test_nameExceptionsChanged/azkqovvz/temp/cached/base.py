@@ -0,0 +1,5 @@
+
+from twisted.trial.unittest import TestCase
+
+class Base(TestCase):
+    pass
@@ -0,0 +1,3 @@
+
+def do_Thing():
+    pass
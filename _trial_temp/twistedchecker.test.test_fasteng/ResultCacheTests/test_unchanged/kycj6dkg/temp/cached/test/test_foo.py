@@ -0,0 +1,6 @@
+
+from cached.base import Base
+
+class FooTest(Base):
+    def test_foo(self):
+        pass
@@ -0,0 +1,5 @@
+if True:
+  x = 1
+if True:
+    if x:
+         y = 1
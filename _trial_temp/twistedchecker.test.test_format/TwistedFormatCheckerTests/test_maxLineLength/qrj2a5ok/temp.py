@@ -0,0 +1,2 @@
+x = 1
+xyz = 123456
@@ -0,0 +1 @@
+def onDisk(): pass
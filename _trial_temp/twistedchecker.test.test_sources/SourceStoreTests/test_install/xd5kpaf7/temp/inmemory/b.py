@@ -0,0 +1 @@
+from inmemory.a import inMemory
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Benchmarks of twistedchecker internals.
+
+Usage::
+
+    python benchmark.py <benchmark> <file or directory>...
+
+Each benchmark times the same work done two ways over the given python
+files, and reports the average cost per file of both.
+"""
+
+import os
+import sys
+import timeit
+
+from astroid import MANAGER
+from pylint.checkers.format import FormatChecker
+from pylint.lint import PyLinter
+from pylint.reporters import CollectingReporter
+from pylint.utils import ASTWalker, FileState, tokenize_module
+
+from twistedchecker.checkers.format import TwistedFormatChecker
+from twistedchecker.core.runner import Runner
+
+
+REPEAT = 5
+
+
+
+def iterSourceFiles(paths):
+    """
+    Iterate over the python files in C{paths}.
+
+    @param paths: a list of files and directories
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for dirpath, _, filenames in os.walk(path):
+            for filename in sorted(filenames):
+                if filename.endswith(".py"):
+                    yield os.path.join(dirpath, filename)
+
+
+
+def makeLinter():
+    """
+    Make a linter collecting messages instead of reporting them.
+
+    @return: a L{PyLinter} with pylint's default checkers registered
+    """
+    linter = PyLinter()
+    linter.load_default_plugins()
+    linter.set_reporter(CollectingReporter())
+    linter.open()
+    return linter
+
+
+
+def timePerFile(paths, check):
+    """
+    Time a check over python files.
+
+    @param paths: a list of files and directories
+    @param check: a callable taking the file path, the astroid module and
+        its tokens
+    @return: the average time spent per file, in seconds
+    """
+    total = 0
+    count = 0
+    for path in iterSourceFiles(paths):
+        module = MANAGER.ast_from_file(path, source=True)
+        tokens = tokenize_module(module)
+        total += min(timeit.repeat(lambda: check(path, module, tokens),
+                                   number=1, repeat=REPEAT))
+        count += 1
+    return total / max(count, 1)
+
+
+
+def benchmarkFormat(paths):
+    """
+    Compare pylint's format checker with L{TwistedFormatChecker}.
+
+    @param paths: a list of files and directories
+    @return: a 2-tuple of the times per file of both checkers
+    """
+    linter = makeLinter()
+    pylintChecker = [checker for checker in linter.get_checkers()
+                     if isinstance(checker, FormatChecker)][0]
+    pylintChecker.set_option("max-line-length", 79)
+    twistedChecker = TwistedFormatChecker(linter)
+
+    def checkWith(checker):
+        def check(path, module, tokens):
+            linter.set_current_module(module.name, path)
+            checker.process_module(module)
+            checker.process_tokens(tokens)
+        return check
+
+    return (timePerFile(paths, checkWith(pylintChecker)),
+            timePerFile(paths, checkWith(twistedChecker)))
+
+
+
+def benchmarkDispatch(paths):
+    """
+    Compare walking modules with the astroid checkers of twistedchecker
+    registered separately and fused in one
+    L{twistedchecker.core.fused.FusedChecker}.
+
+    @param paths: a list of files and directories
+    @return: a 2-tuple of the times per file of both walks
+    """
+    runner = Runner()
+    runner.disableFilteredMessages()
+    runner.pruneCheckers()
+    linter = runner.linter
+    linter.set_reporter(CollectingReporter())
+    linter.open()
+    fusedChecker = runner.fuseCheckers()
+    separateWalker = ASTWalker(linter)
+    for checker in fusedChecker.members:
+        checker.open()
+        separateWalker.add_checker(checker)
+    fusedWalker = ASTWalker(linter)
+    fusedChecker.open()
+    fusedWalker.add_checker(fusedChecker)
+
+    def walkWith(walker):
+        def check(path, module, tokens):
+            linter.set_current_module(module.name, path)
+            linter.file_state = FileState(module.name)
+            linter.file_state.collect_block_lines(linter.msgs_store, module)
+            walker.walk(module)
+            del linter.reporter.messages[:]
+        return check
+
+    return (timePerFile(paths, walkWith(separateWalker)),
+            timePerFile(paths, walkWith(fusedWalker)))
+
+
+
+benchmarks = {
+    "format": benchmarkFormat,
+    "dispatch": benchmarkDispatch,
+}
+
+
+
+def main():
+    """
+    Run the benchmark named on the command line.
+    """
+    if len(sys.argv) < 3 or sys.argv[1] not in benchmarks:
+        sys.stderr.write("Usage: %s {%s} <file or directory>...\n" % (
+            sys.argv[0], ",".join(sorted(benchmarks))))
+        sys.exit(2)
+    before, after = benchmarks[sys.argv[1]](sys.argv[2:])
+    print("before: %8.3f ms per file" % (before * 1000,))
+    print("after:  %8.3f ms per file" % (after * 1000,))
+    print("speedup: %.1fx" % (before / after,))
+
+
+
+if __name__ == "__main__":
+    main()
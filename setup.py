@@ -40,7 +40,8 @@ setup(
         "twisted", "checker", "compliance", "pep8"
     ],
     install_requires=[
-        'pylint>=2.4.4',
+        'astroid>=2.3.3,<2.4',
+        'pylint>=2.4.4,<2.5',
         'twisted>=15.0.0',
     ],
     extras_require = {
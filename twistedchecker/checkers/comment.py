@@ -1,15 +1,17 @@
-import re
-from pylint.interfaces import IAstroidChecker
-from pylint.checkers import BaseChecker
+import tokenize
 
-COMMENT_RGX = re.compile(b"#.*$", re.M)
+from pylint.interfaces import ITokenChecker
+from pylint.checkers import BaseTokenChecker
 
-class CommentChecker(BaseChecker):
+class CommentChecker(BaseTokenChecker):
     """
     A checker for checking comment issues.
 
     A good comment should begin with one whitespace and
     with first letter capitalized.
+
+    Comments are read from the tokens of the module, which pylint produces
+    once for all token checkers.
     """
     msgs = {
      'W9401': ('Comments should begin with one whitespace',
@@ -19,46 +21,39 @@ class CommentChecker(BaseChecker):
                'Used for checking comment format issues. ',
                    'comments-capitalized')
     }
-    __implements__ = IAstroidChecker
+    __implements__ = ITokenChecker
     name = 'comment'
     options = ()
 
-    def visit_module(self, node):
-        """
-        A interface will be called when visiting a module.
-
-        @param node: node of current module
+    def process_tokens(self, tokens):
         """
-        isFirstLineOfComment = True
-        isDocString = False
+        Check the comments of a module.
 
-        with node.stream() as stream:
-            for (linenum, line) in enumerate(stream):
-                if line.strip().startswith(b'"""'):
-                    # This is a simple assumption than docstring are delimited
-                    # with triple double quotes on a single line.
-                    # Should do the job for Twisted code.
-                    isDocString = not isDocString
+        Only the first line of a block of comments on consecutive lines is
+        checked.
 
-                if isDocString:
-                    # We ignore comments in docstrings.
-                    continue
-
-                matchedComment = COMMENT_RGX.search(line)
-                if matchedComment:
-                    if isFirstLineOfComment:
-                        # Check for W9401
-                        comment = matchedComment.group()
-                        if (comment.startswith(b"#  ") or
-                            not comment.startswith(b"# ")):
-                            self.add_message('W9401', line=linenum + 1, node=node)
-                        # Check for W9402
-                        strippedComment = comment.lstrip(b"#").lstrip()
-                        if strippedComment:
-                            firstLetter = strippedComment[0:1]
-                            if (firstLetter.isalpha() and
-                                not firstLetter.isupper()):
-                                self.add_message('W9402', line=linenum + 1, node=node)
-                        isFirstLineOfComment = False
-                else:
-                    isFirstLineOfComment = True
+        @param tokens: tokens of current module
+        """
+        checkWhitespace = self.linter.is_message_enabled('W9401')
+        checkCapital = self.linter.is_message_enabled('W9402')
+        if not (checkWhitespace or checkCapital):
+            return
+        previousLinenum = None
+        for tokenType, comment, start, _, _ in tokens:
+            if tokenType != tokenize.COMMENT:
+                continue
+            linenum = start[0]
+            isFirstLineOfComment = previousLinenum != linenum - 1
+            previousLinenum = linenum
+            if not isFirstLineOfComment:
+                continue
+            # Check for W9401
+            if checkWhitespace and (comment.startswith("#  ") or
+                                    not comment.startswith("# ")):
+                self.add_message('W9401', line=linenum)
+            # Check for W9402
+            strippedComment = comment.lstrip("#").lstrip()
+            if checkCapital and strippedComment:
+                firstLetter = strippedComment[0]
+                if firstLetter.isalpha() and not firstLetter.isupper():
+                    self.add_message('W9402', line=linenum)
@@ -7,14 +7,13 @@ Checks for docstrings.
 """
 
 import re
-import astroid
 
 from astroid import node_classes, scoped_nodes
 
-from pylint.interfaces import IAstroidChecker, INFERENCE, INFERENCE_FAILURE
+from pylint.interfaces import IAstroidChecker
 from pylint.checkers.base import (DocStringChecker as PylintDocStringChecker,
                                   NO_REQUIRED_DOC_RGX)
-from pylint.checkers.utils import has_known_bases
+from pylint.checkers.utils import check_messages
 
 
 def _isInner(node):
@@ -52,24 +51,297 @@ def _getDecoratorsName(node):
     return decorators
 
 
-def _isSetter(node_type, node):
+def _isSetter(node_type, decoratorNames):
     """
     Determine whether the given node is a setter property.
 
     @param node_type: The type of the node to inspect.
-    @param node: The L{logilab.astng.bases.NodeNG} to inspect.
+    @param decoratorNames: The names of the decorators of the node.
 
     @return: a boolean indicating if the given node is a setter.
     """
     if node_type not in ['function', 'method']:
         return False
 
-    for name in _getDecoratorsName(node):
+    for name in decoratorNames:
         if '.setter' in name:
             return True
     return False
 
 
+def _getLineIndent(line):
+    """
+    Get indentation of a line.
+
+    @param line: a line of code
+    @return: number of spaces
+    """
+    return len(line) - len(line.lstrip(" "))
+
+
+
+class DocstringTarget(object):
+    """
+    What the docstring checks need to know about a module, a class or a
+    function. It is built from astroid nodes by L{DocstringChecker}, and
+    from the nodes of the standard library's C{ast} module by the fast
+    engine.
+
+    @ivar nodeType: C{"module"}, C{"class"}, C{"function"} or C{"method"}
+    @ivar name: name of the node
+    @ivar doc: the docstring, or C{None}
+    @ivar lineno: the line number the parser gives to the node, which is
+        the one of its first decorator if it has any, and 0 for modules
+    @ivar colOffset: the column of the node
+    @ivar decoratorNames: the source of the decorators of the node
+    @ivar argnames: the names of the arguments of a function, including
+        C{*args} and C{**kwargs} but not keyword only arguments
+    @ivar hasReturnValue: whether the body of a function returns a value
+    @ivar isInner: whether the node is defined within a function
+    """
+
+    def __init__(self, nodeType, name, doc, lineno, colOffset=0,
+                 decoratorNames=(), argnames=(), hasReturnValue=False,
+                 isInner=False):
+        """
+        Describe a node to check.
+        """
+        self.nodeType = nodeType
+        self.name = name
+        self.doc = doc
+        self.lineno = lineno
+        self.colOffset = colOffset or 0
+        self.decoratorNames = list(decoratorNames)
+        self.argnames = list(argnames)
+        self.hasReturnValue = hasReturnValue
+        self.isInner = isInner
+
+
+    def getDocstringLineno(self):
+        """
+        Get line number of the docstring.
+
+        This is the line following the C{def} or C{class} statement and its
+        decorators, assuming they take one line each, and the first line for
+        modules.
+
+        @return: line number
+        """
+        if self.nodeType == "module":
+            return 1
+        return self.lineno + len(self.decoratorNames) + 1
+
+
+    def getDocstringIndent(self):
+        """
+        Get the expected indentation of the lines of the docstring.
+
+        @return: number of spaces
+        """
+        if self.nodeType == "module":
+            # Lines of a module docstring are aligned on its first line
+            # starting with quotes, usually the closing one.
+            return len(re.findall(r'\n( *)"""',
+                                  '"""%s"""' % (self.doc,))[0])
+        return self.colOffset + 4
+
+
+
+# Messages about the content of docstrings, all needing the line number of
+# the docstring.
+_FORMAT_MESSAGES = ('W9201', 'W9202', 'W9203', 'W9204', 'W9205', 'W9206',
+                    'W9207')
+
+
+
+def iterDocstringMessages(target, enabledMessages):
+    """
+    Check the docstring of a module, a class or a function.
+
+    @param target: the node to check
+    @type target: L{DocstringTarget}
+    @param enabledMessages: identifiers of the messages to check for, the
+        analysis leading to other ones is skipped
+    @return: an iterator of C{(msgid, line, args)} tuples, C{line} being
+        C{None} for messages on the line of the node
+    """
+    docstring = target.doc
+    if docstring is None:
+        # The node does not have a docstring.
+        if target.isInner:
+            # Do not check things inside a function or method.
+            return
+
+        if _isSetter(target.nodeType, target.decoratorNames):
+            # Setters don't need a docstring as they are documented in
+            # the getter.
+            return
+
+        yield 'W9208', None, None
+        return
+    elif not docstring.strip():
+        # Empty docstring.
+        yield 'W9209', None, None
+        return
+    if enabledMessages.isdisjoint(_FORMAT_MESSAGES):
+        return
+    # Get line number of docstring.
+    linenoDocstring = target.getDocstringLineno()
+    for message in _checkDocstringFormat(target, linenoDocstring,
+                                         enabledMessages):
+        yield message
+    for message in _checkEpytext(target, linenoDocstring, enabledMessages):
+        yield message
+    if 'W9207' in enabledMessages:
+        for message in _checkBlankLineBeforeEpytext(target, linenoDocstring):
+            yield message
+
+
+
+def _checkIndentationIssue(target, linenoDocstring):
+    """
+    Check whether a docstring have consistent indentations.
+
+    @param target: the node to check
+    @param linenoDocstring: line number the docstring begins
+    """
+    indentDocstring = target.getDocstringIndent()
+    linesDocstring = target.doc.lstrip("\n").split("\n")
+    for nline, lineDocstring in enumerate(linesDocstring):
+        if (nline < len(linesDocstring) - 1
+            and not lineDocstring.strip()):
+            # It's a blank line.
+            continue
+        if indentDocstring != _getLineIndent(lineDocstring):
+            if target.nodeType == "module":
+                lineno = linenoDocstring
+            else:
+                lineno = linenoDocstring + nline + 1
+            yield 'W9206', lineno, None
+
+
+
+def _checkDocstringFormat(target, linenoDocstring, enabledMessages):
+    """
+    Check opening/closing of docstring.
+
+    @param target: the node to check
+    @param linenoDocstring: linenumber of docstring
+    @param enabledMessages: identifiers of the messages to check for
+    """
+    # Check the opening/closing of docstring.
+    docstringStrippedSpaces = target.doc.strip(" ")
+    if (not docstringStrippedSpaces.startswith("\n")
+        or not docstringStrippedSpaces.endswith("\n")):
+        # If the docstring is in one line, then do not check indentations.
+        yield 'W9201', linenoDocstring, None
+    elif 'W9206' in enabledMessages:
+        # If the docstring's opening and closing quotes are on separate
+        # lines, then we check its indentation.
+        # Generating warnings about indentation when the quotes aren't
+        # done right only clutters the output.
+        for message in _checkIndentationIssue(target, linenoDocstring):
+            yield message
+
+
+
+def _checkEpytext(target, linenoDocstring, enabledMessages):
+    """
+    Check epytext of docstring.
+
+    @param target: the node to check
+    @param linenoDocstring: linenumber of docstring
+    @param enabledMessages: identifiers of the messages to check for
+    """
+    if target.nodeType not in ['function', 'method']:
+        return
+    checkParam = 'W9202' in enabledMessages
+    checkType = 'W9203' in enabledMessages
+    # Check for arguments.
+    # If current node is method,
+    # then first argument could not have a epytext markup.
+    # The first argument usually named 'self'.
+    argnames = (target.argnames[1:] if target.nodeType == 'method'
+                else list(target.argnames))
+
+    if _isSetter(target.nodeType, target.decoratorNames):
+        # For setter methods we remove the `value` argument as it
+        # does not need to be documented.
+        try:
+            argnames.remove('value')
+        except ValueError:
+            # No `value` in arguments.
+            pass
+
+    for argname in argnames:
+        if target.name.startswith('opt_'):
+            # The docstring for option methods is presented as user-facing
+            # documentation.  Avoid requiring epytext in them.
+            return
+        if checkParam and not re.search(r"@param\s+%s\s*:" % argname,
+                                        target.doc):
+            yield 'W9202', linenoDocstring, argname
+        if checkType and not re.search(r"@type\s+%s\s*:" % argname,
+                                       target.doc):
+            yield 'W9203', linenoDocstring, argname
+
+    if not enabledMessages.isdisjoint(('W9204', 'W9205')):
+        for message in _checkReturnValueEpytext(target, linenoDocstring,
+                                                enabledMessages):
+            yield message
+
+
+
+def _checkReturnValueEpytext(target, linenoDocstring, enabledMessages):
+    """
+    Check if return value is documented.
+
+    @param target: the node to check
+    @param linenoDocstring: linenumber of docstring
+    @param enabledMessages: identifiers of the messages to check for
+    """
+    # Getter properties don't need to document their return value,
+    # but then need to have a return value.
+    if 'property' in target.decoratorNames:
+        if target.hasReturnValue:
+            # Getter properties don't need a docstring.
+            return
+
+    # Check for return value.
+    if target.hasReturnValue:
+        if target.name.startswith('test_'):
+            # Ignore return documentation for test methods.
+            return
+        if ('W9204' in enabledMessages and
+                not re.search(r"@return[s]{0,1}\s*:", target.doc)):
+            yield 'W9204', linenoDocstring, None
+        if ('W9205' in enabledMessages and
+                not re.search(r"@rtype\s*:", target.doc)):
+            yield 'W9205', linenoDocstring, None
+
+
+
+def _checkBlankLineBeforeEpytext(target, linenoDocstring):
+    """
+    Check whether there is a blank line before epytext.
+
+    @param target: the node to check
+    @param linenoDocstring: linenumber of docstring
+    """
+    # Check whether there is a blank line before epytext markups.
+    patternEpytext = (r"\n *@(param|type|return|returns|rtype|ivar|cvar"
+                      r"|raises|raise)"
+                      r"\s*[a-zA-Z0-9_]*\s*\:")
+    matchedEpytext = re.search(patternEpytext, target.doc)
+    if matchedEpytext:
+        # This docstring have epytext markups,
+        # then check the blank line before them.
+        posEpytext = matchedEpytext.start() + 1
+        if not re.search(r"\n\s*\n\s*$", target.doc[:posEpytext]):
+            yield 'W9207', linenoDocstring, None
+
+
+
 _counter = iter(range(100))
 
 
@@ -103,24 +375,23 @@ class DocstringChecker(PylintDocStringChecker):
     __implements__ = IAstroidChecker
     name = 'docstring'
     options = ()
+    # Messages of this checker which are enabled, the analysis leading to
+    # the other ones is skipped. Set when the checker is opened.
+    enabledMessages = frozenset(msgs)
 
 
     def open(self):
         """
-        Set a value to stats and config.
+        Set a value to stats and config, and find the enabled messages.
         """
         self.stats = None
         self.config.no_docstring_rgx = NO_REQUIRED_DOC_RGX
+        self.enabledMessages = frozenset(
+            msgid for msgid in self.msgs
+            if self.linter.is_message_enabled(msgid))
 
 
-    def _getLineIndent(self, line):
-        """
-        Get indentation of a line.
-
-        @param line: a line of code
-        @return: number of spaces
-        """
-        return len(line) - len(line.lstrip(" "))
+    _getLineIndent = staticmethod(_getLineIndent)
 
 
     def _getDocstringLineno(self, node_type, node):
@@ -131,47 +402,52 @@ class DocstringChecker(PylintDocStringChecker):
         @param node: node of currently checking
         @return: line number
         """
-        docstringStriped = node.as_string().strip()
-        linenoDocstring = (node.lineno + docstringStriped
-                           .count("\n", 0, docstringStriped.index('"""')))
-        if node_type == "module":
-            # Module starts from line 0.
-            linenoDocstring += 1
-        return linenoDocstring
+        return self._getTarget(node_type, node).getDocstringLineno()
+
+
+    def _getTarget(self, node_type, node):
+        """
+        Describe a node for the docstring checks.
+
+        @param node_type: type of node
+        @param node: current node of pylint
+        @return: the description of the node
+        @rtype: L{DocstringTarget}
+        """
+        argnames = ()
+        hasReturnValue = False
+        decoratorNames = ()
+        if not isinstance(node, scoped_nodes.Module):
+            decoratorNames = _getDecoratorsName(node)
+        if isinstance(node, scoped_nodes.FunctionDef):
+            argnames = node.argnames()
+            hasReturnValue = self._hasReturnValue(node)
+        return DocstringTarget(
+            node_type, getattr(node, "name", None), node.doc, node.lineno,
+            node.col_offset, decoratorNames, argnames,
+            hasReturnValue, _isInner(node))
+
 
+    @check_messages(*msgs)
     def visit_module(self, node):
         self._check_docstring('module', node)
 
+    @check_messages(*msgs)
     def visit_classdef(self, node):
         if self.config.no_docstring_rgx.match(node.name) is None:
             self._check_docstring('class', node)
 
+    @check_messages(*msgs)
     def visit_functiondef(self, node):
         if self.config.no_docstring_rgx.match(node.name) is None:
             ftype = node.is_method() and 'method' or 'function'
-
-            if isinstance(node.parent.frame(), astroid.ClassDef):
-                overridden = False
-                confidence = (INFERENCE if has_known_bases(node.parent.frame())
-                              else INFERENCE_FAILURE)
-                # check if node is from a method overridden by its ancestor
-                for ancestor in node.parent.frame().ancestors():
-                    if node.name in ancestor and \
-                       isinstance(ancestor[node.name], astroid.FunctionDef):
-                        overridden = True
-                        break
-                self._check_docstring(ftype, node,
-                                      report_missing=not overridden,
-                                      confidence=confidence)
-            else:
-                self._check_docstring(ftype, node)
+            self._check_docstring(ftype, node)
 
 
     visit_asyncfunctiondef = visit_functiondef
 
 
-    def _check_docstring(self, node_type, node, report_missing=True,
-                         confidence=None):
+    def _check_docstring(self, node_type, node):
         """
         Check whether the opening and the closing of docstring
         on a line by themselves.
@@ -180,76 +456,10 @@ class DocstringChecker(PylintDocStringChecker):
         @param node_type: type of node
         @param node: current node of pylint
         """
-        docstring = node.doc
-        if docstring is None:
-            # The node does not have a docstring.
-            if _isInner(node):
-                # Do not check things inside a function or method.
-                return
-
-            if _isSetter(node_type, node):
-                # Setters don't need a docstring as they are documented in
-                # the getter.
-                return
-
-            self.add_message('W9208', node=node)
-            return
-        elif not docstring.strip():
-            # Empty docstring.
-            self.add_message('W9209', node=node)
-            return
-        # Get line number of docstring.
-        linenoDocstring = self._getDocstringLineno(node_type, node)
-        self._checkDocstringFormat(node_type, node, linenoDocstring)
-        self._checkEpytext(node_type, node, linenoDocstring)
-        self._checkBlankLineBeforeEpytext(node_type, node, linenoDocstring)
-
-
-    def _checkIndentationIssue(self, node, node_type, linenoDocstring):
-        """
-        Check whether a docstring have consistent indentations.
-
-        @param node: the node currently checks by pylint
-        @param node_type: type of given node
-        @param linenoDocstring: line number the docstring begins
-        """
-        indentDocstring = node.col_offset and node.col_offset or 0
-        indentDocstring += len(re.findall(r'\n( *)"""',
-                                          node.as_string())[0])
-        linesDocstring = node.doc.lstrip("\n").split("\n")
-        for nline, lineDocstring in enumerate(linesDocstring):
-            if (nline < len(linesDocstring) - 1
-                and not lineDocstring.strip()):
-                # It's a blank line.
-                continue
-            if indentDocstring != self._getLineIndent(lineDocstring):
-                if node_type == "module":
-                    lineno = linenoDocstring
-                else:
-                    lineno = linenoDocstring + nline + 1
-                self.add_message('W9206', line=lineno, node=node)
-
-
-    def _checkDocstringFormat(self, node_type, node, linenoDocstring):
-        """
-        Check opening/closing of docstring.
-
-        @param node_type: type of node
-        @param node: current node of pylint
-        @param linenoDocstring: linenumber of docstring
-        """
-        # Check the opening/closing of docstring.
-        docstringStrippedSpaces = node.doc.strip(" ")
-        if (not docstringStrippedSpaces.startswith("\n")
-            or not docstringStrippedSpaces.endswith("\n")):
-            # If the docstring is in one line, then do not check indentations.
-            self.add_message('W9201', line=linenoDocstring, node=node)
-        else:
-            # If the docstring's opening and closing quotes are on separate
-            # lines, then we check its indentation.
-            # Generating warnings about indentation when the quotes aren't
-            # done right only clutters the output.
-            self._checkIndentationIssue(node, node_type, linenoDocstring)
+        target = self._getTarget(node_type, node)
+        for msgid, line, args in iterDocstringMessages(target,
+                                                       self.enabledMessages):
+            self.add_message(msgid, line=line, node=node, args=args)
 
 
     def _hasReturnValue(self, node):
@@ -264,90 +474,3 @@ class DocstringChecker(PylintDocStringChecker):
                 returnFound = True
                 break
         return returnFound
-
-
-    def _checkEpytext(self, node_type, node, linenoDocstring):
-        """
-        Check epytext of docstring.
-
-        @param node_type: type of node
-        @param node: current node of pylint
-        @param linenoDocstring: linenumber of docstring
-        """
-        if node_type not in ['function', 'method']:
-            return
-        # Check for arguments.
-        # If current node is method,
-        # then first argument could not have a epytext markup.
-        # The first argument usually named 'self'.
-        argnames = (node.argnames()[1:] if node_type == 'method'
-                    else node.argnames())
-
-        if _isSetter(node_type, node):
-            # For setter methods we remove the `value` argument as it
-            # does not need to be documented.
-            try:
-                argnames.remove('value')
-            except ValueError:
-                # No `value` in arguments.
-                pass
-
-        for argname in argnames:
-            if node.name.startswith('opt_'):
-                # The docstring for option methods is presented as user-facing
-                # documentation.  Avoid requiring epytext in them.
-                return
-            if not re.search(r"@param\s+%s\s*:" % argname, node.doc):
-                self.add_message('W9202', line=linenoDocstring,
-                                 node=node, args=argname)
-            if not re.search(r"@type\s+%s\s*:" % argname, node.doc):
-                self.add_message('W9203', line=linenoDocstring,
-                                 node=node, args=argname)
-
-        self._checkReturnValueEpytext(node, linenoDocstring)
-
-
-    def _checkReturnValueEpytext(self, node, linenoDocstring):
-        """
-        Check if return value is documented.
-
-        @param node: current node of pylint
-        @param linenoDocstring: linenumber of docstring
-        """
-        # Getter properties don't need to document their return value,
-        # but then need to have a return value.
-        if 'property' in _getDecoratorsName(node):
-            if self._hasReturnValue(node):
-                # Getter properties don't need a docstring.
-                return
-
-        # Check for return value.
-        if self._hasReturnValue(node):
-            if node.name.startswith('test_'):
-                # Ignore return documentation for test methods.
-                return
-            if not re.search(r"@return[s]{0,1}\s*:", node.doc):
-                self.add_message('W9204', line=linenoDocstring, node=node)
-            if not re.search(r"@rtype\s*:", node.doc):
-                self.add_message('W9205', line=linenoDocstring, node=node)
-
-
-    def _checkBlankLineBeforeEpytext(self, node_type, node, linenoDocstring):
-        """
-        Check whether there is a blank line before epytext.
-
-        @param node_type: type of node
-        @param node: current node of pylint
-        @param linenoDocstring: linenumber of docstring
-        """
-        # Check whether there is a blank line before epytext markups.
-        patternEpytext = (r"\n *@(param|type|return|returns|rtype|ivar|cvar"
-                          r"|raises|raise)"
-                          r"\s*[a-zA-Z0-9_]*\s*\:")
-        matchedEpytext = re.search(patternEpytext, node.doc)
-        if matchedEpytext:
-            # This docstring have epytext markups,
-            # then check the blank line before them.
-            posEpytext = matchedEpytext.start() + 1
-            if not re.search(r"\n\s*\n\s*$", node.doc[:posEpytext]):
-                self.add_message('W9207', line=linenoDocstring, node=node)
@@ -0,0 +1,196 @@
+# -*- test-case-name: twistedchecker.test.test_format -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Checks for the length and the indentation of lines.
+"""
+
+import tokenize
+
+from pylint.interfaces import IRawChecker, ITokenChecker
+from pylint.checkers import BaseTokenChecker
+
+from twistedchecker.core.rawscan import scanModule
+
+
+
+def _getHiddenStringLines(tokens):
+    """
+    Get the inner lines of the multi-line strings which do not start their
+    line.
+
+    pylint's format checker checked the lines of the first token of every
+    line, so these lines were never checked for their length.
+
+    @param tokens: tokens of a module
+    @type tokens: L{list}
+    @return: a set of line numbers
+    """
+    firsts = set()
+    row = None
+    for index, (tokenType, _, start, _, _) in enumerate(tokens):
+        if start[0] != row:
+            row = start[0]
+            # The INDENT token of a line does not hold all of its first
+            # token when that is a multi-line string.
+            if tokenType == tokenize.INDENT:
+                index += 1
+            firsts.add(index)
+    hidden = set()
+    for index, (tokenType, _, start, end, _) in enumerate(tokens):
+        if (tokenType == tokenize.STRING and end[0] - start[0] > 1
+                and index not in firsts):
+            hidden.update(range(start[0] + 1, end[0]))
+    return hidden
+
+
+
+class TwistedFormatChecker(BaseTokenChecker):
+    """
+    A checker for the length and the indentation of lines.
+
+    It replaces pylint's format checker, of which only these messages are
+    used by twistedchecker. Line lengths come from the raw scan of the
+    module shared with other checkers, and indentation from the tokens
+    pylint already produced.
+    Long lines containing an URL are allowed, like the inner lines of
+    multi-line strings which do not start their line.
+
+    @ivar _scan: the raw scan of the module being checked, kept until its
+        tokens are processed, or C{None}
+    """
+    # These messages are the ones of pylint's format checker, so they keep
+    # their identifiers and symbols.
+    msgs = {
+        'C0301': ('Line too long (%s/%s)',
+                  'line-too-long',
+                  'Used when a line is longer than a given number of '
+                  'characters.'),
+        'W0311': ('Bad indentation. Found %s %s, expected %s',
+                  'bad-indentation',
+                  "Used when an unexpected number of indentation's "
+                  "tabulations or spaces has been found."),
+        'W0312': ('Found indentation with %ss instead of %ss',
+                  'mixed-indentation',
+                  'Used when there are some mixed tabs and spaces in a '
+                  'module.'),
+    }
+    __implements__ = (IRawChecker, ITokenChecker)
+    name = 'format'
+    options = (
+        ('max-line-length',
+         {'default': 79, 'type': 'int', 'metavar': '<int>',
+          'help': 'Maximum number of characters on a single line.'}
+        ),
+        ('indent-string',
+         {'default': '    ', 'type': 'non_empty_string',
+          'metavar': '<string>',
+          'help': 'String used as indentation unit. This is usually '
+                  '"    " (4 spaces) or "\\t" (1 tab).'}
+        ),
+    )
+    _scan = None
+
+    def process_module(self, node):
+        """
+        Scan the lines of a module, whose length is checked once its tokens
+        are processed.
+
+        @param node: node of current module
+        """
+        if self.linter.is_message_enabled('C0301'):
+            self._scan = scanModule(node, self.config.max_line_length)
+
+
+    def checkLineLengths(self, scan, tokens):
+        """
+        Report the long lines found by the raw scan of a module.
+
+        @param scan: the scan of the module, done with the maximum line
+            length of this checker
+        @type scan: L{twistedchecker.core.rawscan.RawScan}
+        @param tokens: tokens of the module
+        @type tokens: L{list}
+        """
+        longLines = [(linenum, length)
+                     for linenum, length, hasURL in scan.longLines
+                     if not hasURL]
+        if not longLines:
+            return
+        hidden = _getHiddenStringLines(tokens)
+        for linenum, length in longLines:
+            if linenum not in hidden:
+                self.add_message('C0301', line=linenum,
+                                 args=(length, scan.maxLineLength))
+
+
+    def process_tokens(self, tokens):
+        """
+        Check the length of the lines scanned from the module, and the
+        indentation of all its statements.
+
+        @param tokens: tokens of current module
+        """
+        if self._scan is not None:
+            scan, self._scan = self._scan, None
+            self.checkLineLengths(scan, tokens)
+        if not (self.linter.is_message_enabled('W0311') or
+                self.linter.is_message_enabled('W0312')):
+            return
+        indents = [0]
+        checkEqual = False
+        for tokenType, token, start, _, line in tokens:
+            if tokenType == tokenize.NEWLINE:
+                # The next statement is indented like this one unless an
+                # INDENT token follows.
+                checkEqual = True
+            elif tokenType == tokenize.INDENT:
+                checkEqual = False
+                self._checkIndentLevel(token, indents[-1] + 1, start[0])
+                indents.append(indents[-1] + 1)
+            elif tokenType == tokenize.DEDENT:
+                checkEqual = True
+                if len(indents) > 1:
+                    del indents[-1]
+            elif tokenType not in (tokenize.NL, tokenize.COMMENT,
+                                   tokenize.ENCODING):
+                # First token of a statement following a NEWLINE or DEDENT.
+                if checkEqual:
+                    checkEqual = False
+                    self._checkIndentLevel(line, indents[-1], start[0])
+
+
+    def _checkIndentLevel(self, string, expected, linenum):
+        """
+        Check the indentation of a line against the expected level.
+
+        @param string: the line, or its leading whitespace
+        @param expected: expected number of indentation units
+        @param linenum: line number
+        """
+        indent = self.config.indent_string
+        if indent == "\\t":
+            # \t is not interpreted in the configuration file.
+            indent = "\t"
+        level = 0
+        unitSize = len(indent)
+        while string[:unitSize] == indent:
+            string = string[unitSize:]
+            level += 1
+        suppl = ""
+        while string and string[0] in " \t":
+            if string[0] != indent[0]:
+                if string[0] == "\t":
+                    args = ("tab", "space")
+                else:
+                    args = ("space", "tab")
+                self.add_message('W0312', args=args, line=linenum)
+                return
+            suppl += string[0]
+            string = string[1:]
+        if level != expected or suppl:
+            unitType = "tabs" if indent[0] == "\t" else "spaces"
+            self.add_message('W0311', line=linenum,
+                             args=(level * unitSize + len(suppl), unitType,
+                                   expected * unitSize))
@@ -1,12 +1,18 @@
+from astroid import node_classes
+
 from pylint.interfaces import IAstroidChecker
-from pylint.checkers.strings import StringFormatChecker
+from pylint.checkers import BaseChecker
+from pylint.checkers.utils import check_messages
 
 
 
-class FormattingOperationChecker(StringFormatChecker):
+class FormattingOperationChecker(BaseChecker):
     """
     When string formatting operations are used like formatString % values,
     we should always use a tuple for non-mapping values.
+
+    Only binary operations are visited and they are checked from the types
+    of their operands, so no inference is done.
     """
     msgs = {
      'W9501': ('String formatting operations should always use a tuple '
@@ -17,6 +23,7 @@ class FormattingOperationChecker(StringFormatChecker):
     name = 'formattingoperation'
     options = ()
 
+    @check_messages('W9501')
     def visit_binop(self, node):
         """
         Called when if a binary operation is found.
@@ -26,17 +33,16 @@ class FormattingOperationChecker(StringFormatChecker):
         """
         if node.op != "%":
             return
-        pattern = node.left.as_string()
+        pattern = node.left
         # If the pattern's not a constant string, we don't know whether a
         # dictionary or a tuple makes sense, so don't try to guess.
-        if not pattern.startswith("'") or pattern.startswith('"'):
+        if not (isinstance(pattern, node_classes.Const)
+                and isinstance(pattern.value, str)):
             return
         # If the pattern has things like %(foo)s, then the values can't be a
         # tuple, so don't check for it.
-        if "%(" in pattern:
+        if "%(" in pattern.value:
             return
-        valueString = node.right.as_string()
-        tupleUsed = valueString.startswith('(')
-        if tupleUsed:
+        if isinstance(node.right, (node_classes.Tuple, node_classes.Dict)):
             return
         self.add_message('W9501', node=node)
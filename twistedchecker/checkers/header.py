@@ -2,7 +2,9 @@ import re
 
 from pylint.interfaces import IAstroidChecker
 from pylint.checkers import BaseChecker
+from pylint.checkers.utils import check_messages
 
+from twistedchecker.core.rawscan import scanModule
 from twistedchecker.core.util import isTestModule, moduleNeedsTests
 
 
@@ -34,40 +36,55 @@ class HeaderChecker(BaseChecker):
                             br" (([a-z_][a-z0-9_]*)\.)*[a-z_][a-z0-9_]* -\*-")
 
 
+    @check_messages('W9001', 'W9002')
     def visit_module(self, node):
         """
         A interface will be called when visiting a module.
 
         @param node: node of current module
         """
-        with node.stream() as stream:
-            text = stream.read()
-            self._checkCopyright(text, node)
-            if not isTestModule(node.name) and moduleNeedsTests:
-                self._checkTestReference(text, node)
+        # Only the comments at the top of the module make its header.
+        text = scanModule(node).getHeader()
+        for msgid in self.iterHeaderMessages(node.name, text):
+            self.add_message(msgid, node=node)
 
 
-    def _checkCopyright(self, text, node):
+    def iterHeaderMessages(self, modname, text):
+        """
+        Check the header of a module.
+
+        @param modname: name of the module
+        @param text: header of the module
+        @return: an iterator of the identifiers of the messages to report
+        """
+        if (self.linter.is_message_enabled('W9001')
+                and not self._hasCopyright(text)):
+            yield 'W9001'
+        if (self.linter.is_message_enabled('W9002')
+                and not isTestModule(modname) and moduleNeedsTests
+                and not self._hasTestReference(modname, text)):
+            yield 'W9002'
+
+
+    def _hasCopyright(self, text):
         """
         Check whether the module has copyright header.
 
-        @param text: codes of the module
-        @param node: node of the module
+        @param text: header of the module
         """
-        if not re.search(br"%s\s*\n\s*%s" % self.commentsCopyright, text):
-            self.add_message('W9001', node=node)
+        return re.search(br"%s\s*\n\s*%s" % self.commentsCopyright,
+                         text) is not None
 
 
-    def _checkTestReference(self, text, node):
+    def _hasTestReference(self, modname, text):
         """
         Check whether a reference to its test module is contained.
 
-        @param text: codes of the module
-        @param node: node of the module
+        @param modname: name of the module
+        @param text: header of the module
         """
-        if '.test.' in node.name or '.test_' in node.name:
+        if '.test.' in modname or '.test_' in modname:
             # Test packages or test modules don't need references to tests.
-            return
+            return True
 
-        if not re.search(self.patternTestReference, text):
-            self.add_message('W9002', node=node)
+        return re.search(self.patternTestReference, text) is not None
@@ -5,10 +5,121 @@ import re
 
 from pylint.interfaces import IAstroidChecker
 from pylint.checkers import BaseChecker
+from pylint.checkers.utils import check_messages
 
 from twistedchecker.core.util import isTestModule
 
 
+
+def sourceContainsTestCase(source):
+    """
+    Determine whether the source of a module defines a subclass of TestCase.
+
+    @param source: source of the module
+    @type source: L{bytes}
+    """
+    patternTestCase = br"class\s+[a-zA-Z0-9]+\s*\(.*TestCase\)"
+    return re.search(patternTestCase, source) and True or False
+
+
+
+def _getCommonStart(left, right):
+    """
+    Return the common prefix of the 2 strings.
+
+    @param left: one string
+    @param right: another string
+    """
+    prefix = []
+    for a, b in zip(left, right):
+        if a == b:
+            prefix.append(a)
+        else:
+            break
+
+    return ''.join(prefix)
+
+
+
+def _getMethodNamePrefix(name, siblingNames):
+    """
+    Return the prefix of a method based on sibling methods.
+
+    @param name: name of the method
+    @param siblingNames: names of the other functions of its class
+    """
+    for siblingName in siblingNames:
+        prefix = _getCommonStart(name, siblingName)
+        if not prefix.rstrip('_'):
+            # We ignore prefixes which are just underscores.
+            continue
+        return prefix
+
+    return ''
+
+
+
+def getMethodNameMessage(name, inTestModule, siblingNames):
+    """
+    Check the name of a method.
+
+    @param name: name of the method
+    @param inTestModule: whether the method is defined in a test module
+    @param siblingNames: an iterable of the names of the other functions
+        defined in the class of the method, only consumed when needed
+    @return: the identifier of the message to report, or C{None} if the
+        name is valid
+    """
+    methodName = name
+    if inTestModule:
+        if name.startswith('test'):
+            if not name.startswith('test_'):
+                return 'C9303'
+            else:
+                # Test names start with 'test_NAME' and can be like
+                # test_SOME_NAME or test_render_SomeCondition.
+                return None
+
+    if name[0].isupper():
+        return 'C9302'
+
+    if name.startswith('___'):
+        return 'C9302'
+
+    if name.endswith('___'):
+        return 'C9302'
+
+    if name.startswith('__'):
+        if name.endswith('___'):
+            # To many trailing underscores.
+            return 'C9302'
+        if name.endswith('_') and not name.endswith('__'):
+            # To few trailing underscored
+            return 'C9302'
+        if name.endswith('__'):
+            # This is a reserved name and we don't do any checks on it.
+            return None
+        name = name[2:-2]
+
+    if name.startswith('_'):
+        name = name[1:]
+
+    if name.endswith('_'):
+        return 'C9302'
+
+    if '_' in name:
+        # This has a underscore in the main name.
+        if _getMethodNamePrefix(methodName, siblingNames):
+            # There are other names with same prefix so this should be
+            # a dispatched method.
+            return None
+
+        return 'C9302'
+
+    return None
+
+
+
 class TwistedNamesChecker(BaseChecker):
     """
     A checker for checking Twisted naming convention.
@@ -34,13 +145,13 @@ class TwistedNamesChecker(BaseChecker):
 
         @param node: node of given module
         """
-        patternTestCase = br"class\s+[a-zA-Z0-9]+\s*\(.*TestCase\)"
         with node.stream() as stream:
             moduleRaw = stream.read()
 
-        return re.search(patternTestCase, moduleRaw) and True or False
+        return sourceContainsTestCase(moduleRaw)
 
 
+    @check_messages('W9301')
     def visit_module(self, node):
         """
         A interface will be called when visiting a module.
@@ -52,6 +163,7 @@ class TwistedNamesChecker(BaseChecker):
             self._checkTestModuleName(modulename, node)
 
 
+    @check_messages('C9302', 'C9303')
     def visit_functiondef(self, node):
         """
         A interface will be called when visiting a function or a method.
@@ -62,101 +174,15 @@ class TwistedNamesChecker(BaseChecker):
             # We only check methods.
             return
 
-        name = node.name
-
-        if isTestModule(node.root().name):
-            if name.startswith('test'):
-                if not name.startswith('test_'):
-                    self.add_message('C9303', node=node)
-                    return
-                else:
-                    # Test names start with 'test_NAME' and can be like
-                    # test_SOME_NAME or test_render_SomeCondition.
-                    return
-
-        if name[0].isupper():
-            self.add_message('C9302', node=node)
-            return
-
-        if name.startswith('___'):
-            self.add_message('C9302', node=node)
-            return
-
-        if name.endswith('___'):
-            self.add_message('C9302', node=node)
-            return
-
-        if name.startswith('__'):
-            if name.endswith('___'):
-                # To many trailing underscores.
-                self.add_message('C9302', node=node)
-                return
-            if name.endswith('_') and not name.endswith('__'):
-                # To few trailing underscored
-                self.add_message('C9302', node=node)
-                return
-            if name.endswith('__'):
-                # This is a reserved name and we don't do any checks on it.
-                return
-            name = name[2:-2]
-
-        if name.startswith('_'):
-            name = name[1:]
-
-        if name.endswith('_'):
-            self.add_message('C9302', node=node)
-            return
-
-        if '_' in name:
-            # This has a underscore in the main name.
-            prefix = self._getMethodNamePrefix(node)
-            if prefix:
-                # There are other names with same prefix so this should be
-                # a dispatched method.
-                return
-
-            self.add_message('C9302', node=node)
-            return
-
-
-        if isTestModule(node.name) and self.moduleContainsTestCase(node):
-            self._checkTestMethodName(node)
-
-    def _getMethodNamePrefix(self, node):
-        """
-        Return the prefix of this method based on sibling methods.
-
-        @param node: the current node
-        """
-        targetName = node.name
-        for sibling in node.parent.nodes_of_class(type(node)):
-            if sibling is node:
-                # We are on the same node in parent so we skip it.
-                continue
-            prefix = self._getCommonStart(targetName, sibling.name)
-            if not prefix.rstrip('_'):
-                # We ignore prefixes which are just underscores.
-                continue
-            return prefix
-
-        return ''
-
-
-    def _getCommonStart(self, left, right):
-        """
-        Return the common prefix of the 2 strings.
-
-        @param left: one string
-        @param right: another string
-        """
-        prefix = []
-        for a, b in zip(left, right):
-            if a == b:
-                prefix.append(a)
-            else:
-                break
-
-        return ''.join(prefix)
+        siblingNames = (
+            sibling.name for sibling in node.parent.nodes_of_class(type(node))
+            # We are on the same node in parent so we skip it.
+            if sibling is not node)
+        msgid = getMethodNameMessage(node.name,
+                                     isTestModule(node.root().name),
+                                     siblingNames)
+        if msgid:
+            self.add_message(msgid, node=node)
 
 
     def _checkTestModuleName(self, modulename, node):
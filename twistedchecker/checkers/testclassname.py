@@ -2,6 +2,7 @@ import operator
 
 from pylint.interfaces import IAstroidChecker
 from pylint.checkers import BaseChecker
+from pylint.checkers.utils import check_messages
 from astroid.scoped_nodes import ClassDef
 
 from twistedchecker.core.util import isTestModule
@@ -22,7 +23,11 @@ class TestClassNameChecker(BaseChecker):
     __implements__ = IAstroidChecker
     name = 'testclassname'
     options = ()
+    # Set by the runner to a
+    # L{twistedchecker.core.classindex.ClassIndex}.
+    classIndex = None
 
+    @check_messages('W9701')
     def visit_module(self, node):
         """
         Called when the AST checker visits a module.
@@ -31,6 +36,8 @@ class TestClassNameChecker(BaseChecker):
         """
         if not isTestModule(node.name):
             return
+        if self.classIndex is not None and node.file:
+            self.classIndex.indexFile(node.file, node.name)
         objects = list(node.values())
         objects.sort(key=operator.attrgetter('lineno'))
         for obj in objects:
@@ -52,7 +59,7 @@ class TestClassNameChecker(BaseChecker):
             otherwise.
         @rtype: L{bool}
         """
-        ancestors = [ancestor.name for ancestor in klass.ancestors()]
+        ancestors = self._getAncestorNames(klass)
         methods = [method.name for method in klass.mymethods()]
 
         if 'TestCase' not in ancestors:
@@ -62,3 +69,40 @@ class TestClassNameChecker(BaseChecker):
             if method.startswith('test'):
                 return True
         return False
+
+
+    def _getAncestorNames(self, klass):
+        """
+        Get the names of all the ancestors of a class.
+
+        The class index is used when it can tell whether the class is a
+        C{TestCase}, astroid inference otherwise.
+
+        @param klass: the class node
+        @return: a list of class names
+        """
+        names = self.getIndexedAncestorNames(klass.root().name, klass.name)
+        if names is not None:
+            return names
+        return [ancestor.name for ancestor in klass.ancestors()]
+
+
+    def getIndexedAncestorNames(self, modname, qualname):
+        """
+        Get the names of all the ancestors of a class from the class index.
+
+        @param modname: name of the module defining the class
+        @param qualname: qualified name of the class in its module
+        @return: a list of class names, or C{None} if the index can not tell
+            whether the class is a C{TestCase}
+        """
+        if self.classIndex is None:
+            return None
+        found = self.classIndex.lookupAncestors(modname, qualname)
+        if found is None:
+            return None
+        ancestors, complete = found
+        names = [name.rpartition('.')[2] for _, name in ancestors]
+        if complete or 'TestCase' in names:
+            return names
+        return None
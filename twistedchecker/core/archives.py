@@ -0,0 +1,146 @@
+# -*- test-case-name: twistedchecker.test.test_archives -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Reading of the python files of source distributions and wheels, without
+extracting them.
+
+Release pipelines check the content of the archives they built. The
+members of an archive are read in a single sequential pass: tar archives
+are streamed, and the members of zip archives, like wheels, are read in
+the order of their local headers. The sources are then checked from
+memory under the path of the archive followed by the path of the member,
+and named after the packages of the archive containing them.
+"""
+
+import os
+import tarfile
+import zipfile
+
+
+# The extensions of the archives which are read instead of checked as
+# files.
+ZIP_EXTENSIONS = (".whl", ".zip")
+TAR_EXTENSIONS = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+
+
+class ArchiveError(Exception):
+    """
+    An archive can not be read.
+    """
+
+
+
+def isArchive(path):
+    """
+    Tell whether a path is an archive file whose members are checked.
+
+    @param path: the path given as argument
+    """
+    return (path.lower().endswith(ZIP_EXTENSIONS + TAR_EXTENSIONS)
+            and os.path.isfile(path))
+
+
+
+def iterArchiveFiles(path, accept):
+    """
+    Yield the regular files of an archive, in a single sequential pass.
+
+    @param path: the path of the archive
+    @param accept: a callable telling whether to read a file given the
+        path of its member, with C{/} separators
+    @return: an iterator of pairs of the path of a member and of its
+        content
+    @raise ArchiveError: if the archive can not be read
+    """
+    try:
+        if path.lower().endswith(ZIP_EXTENSIONS):
+            for member in _iterZipFiles(path, accept):
+                yield member
+        else:
+            for member in _iterTarFiles(path, accept):
+                yield member
+    except (IOError, OSError, EOFError, tarfile.TarError,
+            zipfile.BadZipfile) as e:
+        raise ArchiveError("can not read %s: %s" % (path, e))
+
+
+
+def _iterZipFiles(path, accept):
+    """
+    Yield the regular files of a zip archive, in the order of their data.
+
+    @param path: the path of the archive
+    @param accept: a callable telling whether to read a file given the
+        path of its member
+    @return: an iterator of pairs of the path of a member and of its
+        content
+    """
+    with zipfile.ZipFile(path) as archive:
+        infos = sorted(archive.infolist(), key=lambda info: info.header_offset)
+        for info in infos:
+            name = _normalizeMemberName(info.filename)
+            if info.filename.endswith("/") or not accept(name):
+                continue
+            yield name, archive.read(info)
+
+
+
+def _iterTarFiles(path, accept):
+    """
+    Yield the regular files of a tar archive, streaming it.
+
+    @param path: the path of the archive
+    @param accept: a callable telling whether to read a file given the
+        path of its member
+    @return: an iterator of pairs of the path of a member and of its
+        content
+    """
+    with tarfile.open(path, "r|*") as archive:
+        for info in archive:
+            name = _normalizeMemberName(info.name)
+            if not info.isfile() or not accept(name):
+                continue
+            yield name, archive.extractfile(info).read()
+
+
+
+def _normalizeMemberName(name):
+    """
+    Remove the leading C{./} of the path of a member.
+
+    @param name: the path of the member in the archive
+    @return: the path relative to the root of the archive
+    """
+    while name.startswith("./"):
+        name = name[2:]
+    return name
+
+
+
+def getArchiveModuleName(path, packages):
+    """
+    Get the name of the module of a member of an archive, from the packages
+    of the archive containing it, like the name it is imported by once the
+    archive is installed.
+
+    @param path: the path of the member, with C{/} separators
+    @param packages: the paths of the C{__init__} files of the packages of
+        the archive
+    @return: the dotted name of the module, the name of the package for
+        the C{__init__} of a package
+    """
+    directories = path.split("/")[:-1]
+    name = os.path.splitext(path.split("/")[-1])[0]
+    names = [] if name == "__init__" else [name]
+    while directories and "/".join(directories
+                                   + ["__init__.py"]) in packages:
+        names.insert(0, directories.pop())
+    return ".".join(names) or name
+
+
+
+__all__ = ["ArchiveError", "getArchiveModuleName", "isArchive",
+           "iterArchiveFiles"]
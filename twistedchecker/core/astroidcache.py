@@ -0,0 +1,225 @@
+# -*- test-case-name: twistedchecker.test.test_astroidcache -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+A bounded cache of the astroid trees of modules.
+
+astroid keeps the tree of every module it builds, the checked ones and the
+ones inference pulls in, until the process exits, so the memory of a run
+grows with the whole tree. The bounded cache evicts the least recently used
+trees once it holds more modules, or more source, than allowed. A module
+needed again later is parsed again.
+
+Trees are only evicted between the checks of two modules, so that a module
+never sees two trees of another module during its check. The module about
+to be checked and the builtins, on which all the others rely, are never
+evicted.
+"""
+
+import collections
+import os
+
+import astroid
+
+from astroid.node_classes import LookupMixIn
+from astroid.transforms import TransformVisitor
+from pylint.checkers import utils as checkerUtils, variables
+
+
+
+def getSourceSize(module):
+    """
+    Get the size of the source of a module.
+
+    @param module: the astroid tree of the module
+    @return: a number of bytes, C{0} for modules without Python source
+    """
+    if not module.file or not getattr(module, "pure_python", True):
+        return 0
+    try:
+        return os.path.getsize(module.file)
+    except OSError:
+        return 0
+
+
+
+def clearGlobalCaches(modules=()):
+    """
+    Clear the caches of astroid and pylint which keep references to the
+    nodes of trees, so that evicted trees can be freed.
+
+    @param modules: the trees of the modules kept whose classes cache
+        inferences on nodes of other modules
+    """
+    cachedFunctions = [
+        LookupMixIn.lookup, TransformVisitor._transform,
+        getattr(checkerUtils, "safe_infer", None),
+        getattr(checkerUtils, "unimplemented_abstract_methods", None),
+        getattr(checkerUtils, "is_overload_stub", None),
+        getattr(variables, "overridden_method", None)]
+    for cached in cachedFunctions:
+        if hasattr(cached, "cache_clear"):
+            cached.cache_clear()
+    tipCached = getattr(astroid, "_inference_tip_cached", None)
+    defaults = getattr(getattr(tipCached, "__wrapped__", None),
+                       "__defaults__", None)
+    if defaults and isinstance(defaults[0], dict):
+        defaults[0].clear()
+    # Failed imports are cached with their tracebacks, and the exceptions
+    # they were raised while handling, which refer to the nodes being
+    # inferred.
+    errors = [value for value in
+              getattr(astroid.MANAGER, "_mod_file_cache", {}).values()
+              if isinstance(value, BaseException)]
+    while errors:
+        error = errors.pop()
+        error.__traceback__ = None
+        error.__context__ = None
+        # astroid errors keep the errors they wrap as attributes.
+        errors.extend(value for value in
+                      [error.__cause__] + list(vars(error).values())
+                      if isinstance(value, BaseException))
+    # Nodes like constants delegate to classes of the builtins, which then
+    # hold the cached methods of all these nodes.
+    for module in modules:
+        for node in module.values():
+            node.__dict__.pop("__cache", None)
+
+
+
+class BoundedModuleCache(collections.OrderedDict):
+    """
+    The astroid trees of modules, by module name, from the least recently
+    used to the most recently used.
+
+    @ivar maxModules: the number of modules kept, C{0} for no limit
+    @ivar maxBytes: the total size of the sources of the modules kept,
+        C{0} for no limit
+    @ivar evicted: the number of trees evicted
+    """
+    # Every other module relies on the classes of this one.
+    pinned = ("builtins",)
+
+    def __init__(self, maxModules=0, maxBytes=0):
+        """
+        @param maxModules: the number of modules kept, C{0} for no limit
+        @param maxBytes: the total size of the sources of the modules kept,
+            C{0} for no limit
+        """
+        self._sizes = {}
+        collections.OrderedDict.__init__(self)
+        self.maxModules = maxModules
+        self.maxBytes = maxBytes
+        self.evicted = 0
+
+
+    def __getitem__(self, modname):
+        module = collections.OrderedDict.__getitem__(self, modname)
+        self.move_to_end(modname)
+        return module
+
+
+    def __setitem__(self, modname, module):
+        collections.OrderedDict.__setitem__(self, modname, module)
+        self.move_to_end(modname)
+        self._sizes[modname] = getSourceSize(module)
+
+
+    def __delitem__(self, modname):
+        collections.OrderedDict.__delitem__(self, modname)
+        del self._sizes[modname]
+
+
+    def get(self, modname, default=None):
+        if modname in self:
+            return self[modname]
+        return default
+
+
+    def setdefault(self, modname, module=None):
+        if modname not in self:
+            self[modname] = module
+        return self[modname]
+
+
+    def clear(self):
+        collections.OrderedDict.clear(self)
+        self._sizes.clear()
+
+
+    def getSize(self):
+        """
+        Get the total size of the sources of the modules kept.
+
+        @return: a number of bytes
+        """
+        return sum(self._sizes.values())
+
+
+    def isFull(self, size):
+        """
+        Tell whether the cache holds more than allowed.
+
+        @param size: the total size of the sources of the modules kept
+        """
+        if self.maxModules and len(self) > self.maxModules:
+            return True
+        return bool(self.maxBytes and size > self.maxBytes)
+
+
+    def evict(self, keep=()):
+        """
+        Evict the least recently used trees until the cache holds no more
+        than allowed.
+
+        @param keep: the names of modules not to evict
+        @return: the number of trees evicted
+        """
+        size = self.getSize()
+        evicted = 0
+        for modname in list(self):
+            if not self.isFull(size):
+                break
+            if modname in keep or modname in self.pinned:
+                continue
+            size -= self._sizes[modname]
+            del self[modname]
+            evicted += 1
+        if evicted:
+            clearGlobalCaches(
+                [collections.OrderedDict.__getitem__(self, modname)
+                 for modname in self.pinned if modname in self])
+            self.evicted += evicted
+        return evicted
+
+
+
+def installModuleCache(linter, maxModules=0, maxBytes=0):
+    """
+    Replace the module cache of astroid by a bounded one, evicting trees
+    each time the linter gets the tree of a module to check.
+
+    @param linter: the linter
+    @type linter: L{pylint.lint.PyLinter}
+    @param maxModules: the number of modules kept, C{0} for no limit
+    @param maxBytes: the total size of the sources of the modules kept,
+        C{0} for no limit
+    @return: the bounded cache
+    @rtype: L{BoundedModuleCache}
+    """
+    cache = BoundedModuleCache(maxModules, maxBytes)
+    cache.update(astroid.MANAGER.astroid_cache)
+    astroid.MANAGER.astroid_cache = cache
+    getAST = linter.get_ast
+
+    def evictingGetAST(filepath, modname):
+        cache.evict(keep=(modname,))
+        return getAST(filepath, modname)
+    linter.get_ast = evictingGetAST
+    return cache
+
+
+
+__all__ = ["BoundedModuleCache", "clearGlobalCaches", "getSourceSize",
+           "installModuleCache"]
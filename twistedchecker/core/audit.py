@@ -0,0 +1,638 @@
+# -*- test-case-name: twistedchecker.test.test_audit -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+An audit of the messages of the commits of a git history, without checking
+any of them out.
+
+Consecutive commits mostly share their files. The audit keeps the files of
+the current commit, with their blob identifiers, and only updates the ones
+changed by each commit. A module is only checked again when its blob
+changed, or when one of the modules it depends on changed the way the
+class index sees them, like for the result cache. Its messages are
+otherwise the ones it had in the previous commit.
+
+The modules checked go through a result cache keyed by blob and module
+name, so a blob seen in an earlier commit, or by an earlier audit, is not
+checked again either while what it depends on is the same. The whole
+history is audited in about the time it takes to check its distinct blobs.
+
+Sources are read from the object store, and astroid builds the trees of
+the modules of the commit from them, including when they are imported.
+Modules outside of the paths audited are still found by astroid from the
+files of the working tree.
+"""
+
+import json
+import os
+
+from astroid import MANAGER
+
+from twistedchecker.core.cache import saveCache
+from twistedchecker.core.exceptionfinder import findSourceExceptions
+from twistedchecker.core.gitstore import FILE_MODES, runGit
+from twistedchecker.core.resultcache import ResultCache
+from twistedchecker.core.sources import SourceStore
+
+
+# Options of the name checker which the name exceptions extend.
+NAME_REGEX_OPTIONS = ("method-rgx", "function-rgx", "class-rgx")
+
+# The number of entries kept for each blob, for different versions of the
+# modules it depends on.
+MAX_BLOB_ENTRIES = 4
+
+
+
+def iterCommits(root, revisionRange):
+    """
+    List the commits of a range of the history, following first parents.
+
+    @param root: the root of the working tree
+    @param revisionRange: the range, like C{HEAD~100..HEAD}, or a single
+        revision for all its ancestors
+    @return: pairs of the identifier of a commit and of the one of its
+        first parent, C{None} for a root commit, oldest first
+    @raise GitError: if the range is not valid
+    """
+    output = runGit(["rev-list", "--reverse", "--first-parent", "--parents",
+                     revisionRange, "--"], cwd=root)
+    commits = []
+    for line in output.decode("ascii").splitlines():
+        identifiers = line.split()
+        commits.append((identifiers[0], (identifiers[1:] or [None])[0]))
+    return commits
+
+
+
+def listTree(root, commit, pathspecs=()):
+    """
+    List the regular files of a commit.
+
+    @param root: the root of the working tree
+    @param commit: the identifier of the commit
+    @param pathspecs: the paths to restrict the files to, relative to the
+        root
+    @return: a C{dict} of the identifiers of the blobs of the files, by
+        path relative to the root
+    @raise GitError: if the commit is not in the repository
+    """
+    output = runGit(["ls-tree", "-r", "-z", commit, "--"] + list(pathspecs),
+                    cwd=root)
+    files = {}
+    for line in output.split(b"\0"):
+        if not line:
+            continue
+        meta, path = line.split(b"\t", 1)
+        mode, kind, blob = meta.split(b" ")
+        if kind == b"blob" and mode in FILE_MODES:
+            files[os.fsdecode(path)] = blob.decode("ascii")
+    return files
+
+
+
+def iterTreeChanges(root, parent, commit, pathspecs=()):
+    """
+    Yield the regular files changed by a commit.
+
+    @param root: the root of the working tree
+    @param parent: the identifier of the parent commit
+    @param commit: the identifier of the commit
+    @param pathspecs: the paths to restrict the files to, relative to the
+        root
+    @return: an iterator of pairs of the path of a file relative to the
+        root and of the identifier of its new blob, C{None} if it is no
+        longer a regular file
+    @raise GitError: if the commits are not in the repository
+    """
+    output = runGit(["diff-tree", "-r", "-z", "--no-renames", parent,
+                     commit, "--"] + list(pathspecs), cwd=root)
+    fields = output.split(b"\0")
+    for position in range(0, len(fields) - 1, 2):
+        status, path = fields[position], fields[position + 1]
+        _, newMode, _, newBlob, _ = status.lstrip(b":").split(b" ")
+        blob = None
+        if newMode in FILE_MODES:
+            blob = newBlob.decode("ascii")
+        yield os.fsdecode(path), blob
+
+
+
+def getTreeModuleName(path, packages):
+    """
+    Get the name of the module of a file from the packages of a commit
+    containing it, like pylint names the modules to check.
+
+    @param path: the path of the file relative to the root
+    @param packages: the paths of the C{__init__} files of the packages of
+        the commit, relative to the root
+    @return: the dotted name of the module, the name of the package for
+        the C{__init__} of a package
+    """
+    directories = path.split("/")[:-1]
+    name = os.path.splitext(path.split("/")[-1])[0]
+    for position in range(len(directories)):
+        if "/".join(directories[:position + 1]
+                    + ["__init__.py"]) not in packages:
+            # Not in a package of the root.
+            return name
+    if directories and name == "__init__":
+        return ".".join(directories)
+    return ".".join(directories + [name])
+
+
+
+class CommitSources(SourceStore):
+    """
+    The sources of the python files of a commit, read from the object store
+    when they are first needed.
+
+    @ivar root: the root of the working tree
+    @ivar reader: the reader of blobs
+    @type reader: L{twistedchecker.core.gitstore.BlobReader}
+    """
+
+    def __init__(self, root, reader):
+        """
+        @param root: the root of the working tree
+        @param reader: the reader of blobs
+        """
+        SourceStore.__init__(self)
+        self.root = root
+        self.reader = reader
+        self._blobs = {}
+        self._names = {}
+        self._contents = {}
+
+
+    def setFiles(self, files, names):
+        """
+        Set the files of the commit.
+
+        @param files: the identifiers of the blobs of the files, by path
+            relative to the root
+        @param names: the names of the modules of the files, by path
+            relative to the root
+        """
+        self._blobs = {}
+        self._names = {}
+        self._paths = {}
+        for path, blob in files.items():
+            absolute = os.path.join(self.root, path)
+            self._blobs[absolute] = blob
+            self._names[absolute] = names[path]
+            self._paths[names[path]] = absolute
+        blobs = set(self._blobs.values())
+        for blob in list(self._contents):
+            if blob not in blobs:
+                del self._contents[blob]
+
+
+    def setModules(self, paths):
+        """
+        Set the modules to check.
+
+        @param paths: the paths of their files relative to the root
+        """
+        self._modules = []
+        for path in paths:
+            absolute = os.path.join(self.root, path)
+            relative = os.path.relpath(absolute)
+            modname = self._names[absolute]
+            self._modules.append({"path": relative, "name": modname,
+                                  "isarg": True, "basepath": relative,
+                                  "basename": modname})
+
+
+    def getBlob(self, path):
+        """
+        Get the identifier of the blob of a file of the commit.
+
+        @param path: the path of the file
+        @return: the identifier, or C{None} if the file is not in the
+            commit
+        """
+        return self._blobs.get(os.path.abspath(path))
+
+
+    def getModuleName(self, path):
+        """
+        Get the name of the module of a file of the commit.
+
+        @param path: the path of the file
+        @return: the name, or C{None} if the file is not in the commit
+        """
+        return self._names.get(os.path.abspath(path))
+
+
+    def get(self, path):
+        """
+        Get the source of a file of the commit.
+
+        @param path: the path of the file
+        @return: the source, or C{None} if the file is not in the commit
+        @rtype: L{bytes}
+        """
+        blob = self.getBlob(path)
+        if blob is None:
+            return None
+        if blob not in self._contents:
+            self._contents[blob] = self.reader.read(blob)
+        return self._contents[blob]
+
+
+
+class BlobResultCache(ResultCache):
+    """
+    The messages of modules, by blob and module name, so that entries are
+    shared by all the commits with the same blob.
+
+    The messages of a blob also depend on the modules it imports, which
+    change from a commit to another. A few entries are kept for each blob,
+    most recently used first, so that going back and forth between
+    versions of the imported modules does not check the blob again.
+
+    The engines save result caches after each check. The entries are only
+    persisted at the end of the audit, by L{persist}.
+
+    @ivar sources: the sources of the commit
+    @type sources: L{CommitSources}
+    """
+    cacheName = "blobresults"
+
+    def __init__(self, cacheDir, sources):
+        """
+        @param cacheDir: the cache directory, or C{None} to not persist
+            the entries
+        @param sources: the sources of the commit
+        """
+        ResultCache.__init__(self, cacheDir)
+        self.sources = sources
+
+
+    def getKey(self, path):
+        """
+        Get the key of the entries of a module.
+
+        @param path: path of the module
+        @return: the identifier of its blob and its name
+        """
+        return "%s %s" % (self.sources.getBlob(path),
+                          self.sources.getModuleName(path))
+
+
+    def get(self, path, modname, digest, configuration, getModuleDigest):
+        """
+        Get an entry of a module which is still valid, making it the most
+        recently used.
+
+        @param path: path of the module
+        @param modname: the current name of the module
+        @param digest: digest of the current source of the module
+        @param configuration: the digests of the current configuration
+            inputs, by name of input
+        @param getModuleDigest: a callable returning the current digest of
+            a module given its name
+        @return: the entry, or C{None} if no entry of the module was
+            computed from the current inputs
+        """
+        entries = self._entriesByPath.get(self.getKey(path), [])
+        for entry in entries:
+            if self.isValid(entry, modname, digest, configuration,
+                            getModuleDigest):
+                entries.remove(entry)
+                entries.insert(0, entry)
+                self.hits += 1
+                return entry
+        self.misses += 1
+        return None
+
+
+    def getModuleEntry(self, path):
+        """
+        Get the most recent entry of a module without checking that it is
+        still valid.
+
+        @param path: path of the module
+        @return: the entry, or C{None} if the module is not cached
+        """
+        key = self.getKey(path)
+        if key in self._changed:
+            return self._changed[key]
+        entries = self._entriesByPath.get(key)
+        return entries[0] if entries else None
+
+
+    def save(self):
+        """
+        Make the entries recorded so far valid for the next checks,
+        without persisting them.
+        """
+        for key, entry in self._changed.items():
+            entries = [entry] + self._entriesByPath.get(key, [])
+            self._entriesByPath[key] = entries[:MAX_BLOB_ENTRIES]
+        self._changed = {}
+
+
+    def persist(self):
+        """
+        Persist the entries in the cache directory.
+        """
+        self.save()
+        saveCache(self.cacheDir, self.cacheName, self._entriesByPath)
+
+
+
+class HistoryAudit(object):
+    """
+    Count the messages of the commits of a history.
+
+    @ivar runner: the configured runner, checking the modules of
+        L{sources} through a L{BlobResultCache}
+    @type runner: L{twistedchecker.core.runner.Runner}
+    @ivar root: the root of the working tree
+    @ivar sources: the sources of the current commit
+    @type sources: L{CommitSources}
+    @ivar pathspecs: the paths to restrict the files to, relative to the
+        root
+    @ivar commit: the identifier of the current commit, or C{None}
+    @ivar files: the identifiers of the blobs of the modules of the current
+        commit, by path relative to the root
+    @ivar packages: the paths of the C{__init__} files of the packages of
+        the current commit
+    @ivar names: the names of these modules, by path
+    @ivar digests: the digests of these modules in the class index, by
+        module name
+    @ivar counts: the numbers of messages of these modules, by path, as
+        C{dict}s of counts by message identifier
+    @ivar dependents: the paths of the modules whose messages depend on a
+        module, by module name
+    @ivar checked: the number of modules checked so far, not reported from
+        the result cache
+    """
+
+    def __init__(self, runner, root, sources, pathspecs=()):
+        """
+        @param runner: the configured runner
+        @param root: the root of the working tree
+        @param sources: the sources of the commit, used by the runner
+        @param pathspecs: the paths to restrict the files to, relative to
+            the root
+        """
+        self.runner = runner
+        self.root = root
+        self.sources = sources
+        self.pathspecs = list(pathspecs)
+        self.commit = None
+        self.files = {}
+        self.packages = set()
+        self.names = {}
+        self.digests = {}
+        self.counts = {}
+        self.dependents = {}
+        self.checked = 0
+        self._patterns = {}
+        self._namePatterns = None
+        # The name exceptions of a commit extend the configured regexes.
+        cfgParser = runner.linter.cfgfile_parser
+        self._nameRegexes = dict((option, cfgParser.get("BASIC", option))
+                                 for option in NAME_REGEX_OPTIONS)
+
+
+    def isAudited(self, path):
+        """
+        Tell whether a file of a commit is a module to check.
+
+        @param path: the path of the file relative to the root
+        """
+        if self.pathspecs and not any(
+                spec == "." or path == spec or path.startswith(spec + "/")
+                for spec in self.pathspecs):
+            return False
+        return self.runner.isCheckedFile(self.root, path)
+
+
+    def update(self, commit, parent):
+        """
+        Update the files to the ones of a commit.
+
+        @param commit: the identifier of the commit
+        @param parent: the identifier of its parent, the previous commit
+            audited, or C{None}
+        @return: the paths of the files changed, and whether the packages
+            changed
+        """
+        if parent is None or parent != self.commit:
+            # Not following the previous commit audited.
+            changes = [(path, None) for path in self.files] + [
+                (path, None) for path in self.packages] + list(
+                    listTree(self.root, commit).items())
+        else:
+            changes = iterTreeChanges(self.root, parent, commit)
+        files = dict(self.files)
+        packages = set(self.packages)
+        changed = set()
+        for path, blob in changes:
+            if path.split("/")[-1] == "__init__.py":
+                # Packages outside of the paths audited name modules too.
+                if blob is None:
+                    packages.discard(path)
+                else:
+                    packages.add(path)
+            if not self.isAudited(path):
+                continue
+            if blob is None:
+                files.pop(path, None)
+            else:
+                files[path] = blob
+            changed.add(path)
+        packagesChanged = packages != self.packages
+        self.files = files
+        self.packages = packages
+        self.commit = commit
+        return changed, packagesChanged
+
+
+    def indexModules(self, changed, names):
+        """
+        Update the class index to the modules of the commit.
+
+        @param changed: the paths of the files changed by the commit
+        @param names: the names of the modules of the commit, by path
+        @return: the names of the modules whose digest changed
+        """
+        classIndex = self.runner.classIndex
+        changedModules = set()
+        for modname in set(self.names.values()) - set(names.values()):
+            classIndex.removeModule(modname)
+            if self.digests.pop(modname, None) is not None:
+                changedModules.add(modname)
+            MANAGER.astroid_cache.pop(modname, None)
+        for path, modname in names.items():
+            if path not in changed and self.names.get(path) == modname:
+                continue
+            absolute = os.path.join(self.root, path)
+            classIndex.indexSource(absolute, self.sources.get(absolute),
+                                   modname)
+            digest = classIndex.getModuleDigest(modname)
+            if self.digests.get(modname) != digest:
+                changedModules.add(modname)
+            self.digests[modname] = digest
+            # The tree astroid built for the previous commit is stale.
+            MANAGER.astroid_cache.pop(modname, None)
+        self.names = names
+        return changedModules
+
+
+    def getPatterns(self, path):
+        """
+        Get the name exceptions found in a module of the commit.
+
+        @param path: the path of the file relative to the root
+        @return: the patterns of functions and of classes
+        """
+        blob = self.files[path]
+        if self._patterns.get(path, (None,))[0] != blob:
+            absolute = os.path.join(self.root, path)
+            self._patterns[path] = (blob, findSourceExceptions(
+                [(path, self.sources.get(absolute))]))
+        return self._patterns[path][1]
+
+
+    def setNamePatterns(self):
+        """
+        Allow the name exceptions found in the modules of the commit, in
+        place of the ones of the previous commit.
+
+        @return: whether the exceptions changed
+        """
+        for path in list(self._patterns):
+            if path not in self.files:
+                del self._patterns[path]
+        patternsFunc, patternsClass = set(), set()
+        for path in self.files:
+            func, klass = self.getPatterns(path)
+            patternsFunc.update(func)
+            patternsClass.update(klass)
+        patterns = (patternsFunc, patternsClass)
+        if patterns == self._namePatterns:
+            return False
+        self._namePatterns = patterns
+        cfgParser = self.runner.linter.cfgfile_parser
+        for option, regex in self._nameRegexes.items():
+            cfgParser.set("BASIC", option, regex)
+        self.runner.allowPatternsForNameChecking(patternsFunc, patternsClass)
+        return True
+
+
+    def audit(self, commit, parent):
+        """
+        Count the messages of a commit.
+
+        @param commit: the identifier of the commit
+        @param parent: the identifier of its parent, the previous commit
+            audited, or C{None}
+        @return: the counts of messages of the commit, by message
+            identifier
+        """
+        changed, packagesChanged = self.update(commit, parent)
+        if packagesChanged:
+            names = dict((path, getTreeModuleName(path, self.packages))
+                         for path in self.files)
+        else:
+            names = dict((path, self.names.get(path)
+                          or getTreeModuleName(path, self.packages))
+                         for path in self.files)
+        self.sources.setFiles(self.files, names)
+        changedModules = self.indexModules(changed, names)
+
+        if self.setNamePatterns() or packagesChanged:
+            # The messages of any module may change.
+            toCheck = set(self.files)
+        else:
+            toCheck = set(path for path in changed if path in self.files)
+            for modname in changedModules:
+                toCheck.update(path for path
+                               in self.dependents.get(modname, ())
+                               if path in self.files)
+        for path in list(self.counts):
+            if path not in self.files:
+                del self.counts[path]
+        if toCheck:
+            self.check(sorted(toCheck))
+
+        totals = {}
+        for counts in self.counts.values():
+            for msgid, count in counts.items():
+                totals[msgid] = totals.get(msgid, 0) + count
+        return totals
+
+
+    def check(self, paths):
+        """
+        Check modules of the commit, counting their messages and recording
+        what they depend on.
+
+        @param paths: the paths of the files of the modules relative to the
+            root
+        """
+        runner = self.runner
+        linter = runner.linter
+        resultCache = runner.resultCache
+        reporter = linter.reporter
+        handleMessage = reporter.handle_message
+        self.sources.setModules(paths)
+        pathsByName = dict((self.names[path], path) for path in paths)
+        for path in paths:
+            self.counts[path] = {}
+
+        def countingHandleMessage(msg):
+            if msg.msg_id not in reporter.messagesAllowed:
+                return
+            path = pathsByName.get(linter.current_name)
+            if path is not None:
+                counts = self.counts[path]
+                counts[msg.msg_id] = counts.get(msg.msg_id, 0) + 1
+        reporter.handle_message = countingHandleMessage
+        misses = resultCache.misses
+        try:
+            runner.checkModules([descr["path"] for descr
+                                 in self.sources.iterModules()])
+        finally:
+            reporter.handle_message = handleMessage
+        self.checked += resultCache.misses - misses
+
+        for path in paths:
+            entry = resultCache.getModuleEntry(os.path.join(self.root, path))
+            if entry is not None:
+                for modname in entry["modules"]:
+                    self.dependents.setdefault(modname, set()).add(path)
+
+
+    def run(self, commits, output):
+        """
+        Audit commits, writing the counts of messages of each commit as a
+        line of JSON.
+
+        @param commits: pairs of the identifiers of the commits and of
+            their parents, oldest first
+        @param output: the stream to write to
+        """
+        for commit, parent in commits:
+            checked = self.checked
+            totals = self.audit(commit, parent)
+            output.write(json.dumps({
+                "commit": commit,
+                "modules": len(self.files),
+                "checked": self.checked - checked,
+                "messages": sum(totals.values()),
+                "counts": totals,
+                }, sort_keys=True) + "\n")
+            output.flush()
+
+
+
+__all__ = ["BlobResultCache", "CommitSources", "HistoryAudit",
+           "getTreeModuleName", "iterCommits", "iterTreeChanges",
+           "listTree"]
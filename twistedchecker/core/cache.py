@@ -0,0 +1,92 @@
+# -*- test-case-name: twistedchecker.test.test_cache -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Persistent caches of twistedchecker.
+
+Every cache is a JSON document stored in the cache directory. Documents are
+written atomically, and a document which can not be read or which was
+written by another cache format is treated as empty.
+"""
+
+import json
+import os
+import tempfile
+
+
+# Bump this whenever the layout of any cache document changes.
+CACHE_FORMAT = 1
+
+
+
+def getCacheDirectory(configured=None):
+    """
+    Get the directory used to persist caches between runs.
+
+    @param configured: the value of the C{cache-dir} option, C{None} when
+        the option was not given and an empty string when caches should
+        not be persisted.
+    @return: path of the cache directory, or C{None} if caches should not
+        be persisted.
+    """
+    if configured is not None:
+        return os.path.expanduser(configured) or None
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "twistedchecker")
+
+
+
+def loadCache(cacheDir, name):
+    """
+    Load a cache document.
+
+    @param cacheDir: the cache directory, or C{None}
+    @param name: name of the cache document
+    @return: the content of the document, an empty C{dict} if it does
+        not exist or can not be used.
+    """
+    if not cacheDir:
+        return {}
+    try:
+        with open(os.path.join(cacheDir, name + ".json")) as f:
+            content = json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+    if not isinstance(content, dict) or content.get("format") != CACHE_FORMAT:
+        return {}
+    return content.get("data", {})
+
+
+
+def saveCache(cacheDir, name, data):
+    """
+    Atomically save a cache document.
+
+    Failing to write a cache is not an error, the cache is simply not
+    persisted.
+
+    @param cacheDir: the cache directory, or C{None}
+    @param name: name of the cache document
+    @param data: JSON serializable content of the document
+    """
+    if not cacheDir:
+        return
+    try:
+        if not os.path.isdir(cacheDir):
+            os.makedirs(cacheDir)
+        fd, pathTemp = tempfile.mkstemp(dir=cacheDir, prefix=name)
+    except (IOError, OSError):
+        return
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump({"format": CACHE_FORMAT, "data": data}, f,
+                      separators=(",", ":"))
+        os.replace(pathTemp, os.path.join(cacheDir, name + ".json"))
+    except (IOError, OSError):
+        os.remove(pathTemp)
+
+
+
+__all__ = ["getCacheDirectory", "loadCache", "saveCache"]
@@ -0,0 +1,628 @@
+# -*- test-case-name: twistedchecker.test.test_classindex -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+A project-wide index of classes built with the stdlib L{ast} module.
+
+Deciding whether a class is a C{TestCase} used to require astroid inference
+across imports. The index records, for every module, the names it imports
+and the bases and methods of the classes it defines, so this question is
+answered by following names from module to module instead.
+"""
+
+import ast
+import builtins
+import hashlib
+import inspect
+import json
+import os
+
+from astroid.modutils import file_from_modpath
+from twisted.python.reflect import filenameToModuleName
+
+from twistedchecker.core.cache import loadCache, saveCache
+
+
+# Bound on the number of names followed to resolve a single base class, so
+# that import cycles can not make the resolution loop forever.
+MAX_RESOLUTION_DEPTH = 50
+
+
+
+def _dottedName(node):
+    """
+    Get the dotted name of an expression such as C{foo.bar.Baz}.
+
+    @param node: an expression node
+    @return: the dotted name, or C{None} if the expression is not a name.
+    """
+    names = []
+    while isinstance(node, ast.Attribute):
+        names.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    names.append(node.id)
+    return ".".join(reversed(names))
+
+
+
+def iterStatements(statements):
+    """
+    Iterate over statements, descending into compound statements which do
+    not open a new scope, like C{if} or C{try}.
+
+    @param statements: a list of statement nodes
+    """
+    for statement in statements:
+        yield statement
+        if isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef,
+                                  ast.ClassDef)):
+            continue
+        for field in ("body", "orelse", "finalbody"):
+            for child in iterStatements(getattr(statement, field, ())):
+                yield child
+        for handler in getattr(statement, "handlers", ()):
+            for child in iterStatements(handler.body):
+                yield child
+
+
+
+def _absoluteModuleName(package, module, level):
+    """
+    Get the absolute name of the module imported by a C{from} import.
+
+    @param package: name of the package containing the importing module
+    @param module: the imported module as written, C{None} for
+        C{from . import foo}
+    @param level: number of leading dots of a relative import
+    @return: the absolute module name, or C{None} if a relative import goes
+        beyond the top-level package.
+    """
+    if not level:
+        return module
+    parts = package.split(".") if package else []
+    if level - 1 > len(parts):
+        return None
+    parts = parts[:len(parts) - (level - 1)]
+    if module:
+        parts.append(module)
+    return ".".join(parts) or None
+
+
+
+def _summarizeClass(node, prefix, classes):
+    """
+    Record the bases and methods of a class and of its nested classes.
+
+    @param node: the class node
+    @param prefix: qualified name of the enclosing class followed by a dot,
+        or an empty string for top-level classes
+    @param classes: mapping of qualified class names to their records
+    """
+    qualname = prefix + node.name
+    methods = set()
+    for statement in iterStatements(node.body):
+        if isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            methods.add(statement.name)
+        elif isinstance(statement, ast.ClassDef):
+            _summarizeClass(statement, qualname + ".", classes)
+    classes[qualname] = {
+        "bases": [_dottedName(base) for base in node.bases],
+        "methods": sorted(methods),
+        }
+
+
+
+def summarizeModule(tree, modname, isPackage):
+    """
+    Summarize the imports and classes of a module.
+
+    @param tree: the L{ast} tree of the module, or C{None} if it could not
+        be parsed
+    @param modname: name of the module
+    @param isPackage: whether the module is the C{__init__} of a package
+    @return: a JSON serializable summary
+    """
+    imports = {}
+    stars = []
+    classes = {}
+    package = modname if isPackage else modname.rpartition(".")[0]
+    statements = tree.body if tree is not None else ()
+    for statement in iterStatements(statements):
+        if isinstance(statement, ast.Import):
+            for alias in statement.names:
+                if alias.asname:
+                    imports[alias.asname] = alias.name
+                else:
+                    head = alias.name.split(".")[0]
+                    imports[head] = head
+        elif isinstance(statement, ast.ImportFrom):
+            source = _absoluteModuleName(
+                package, statement.module, statement.level)
+            if source is None:
+                continue
+            for alias in statement.names:
+                if alias.name == "*":
+                    stars.append(source)
+                else:
+                    imports[alias.asname or alias.name] = (
+                        source + "." + alias.name)
+        elif isinstance(statement, ast.ClassDef):
+            _summarizeClass(statement, "", classes)
+    return {"module": modname, "package": isPackage, "imports": imports,
+            "stars": stars, "classes": classes}
+
+
+
+def _summarizeBuiltins():
+    """
+    Summarize the classes of the L{builtins} module by introspection.
+
+    @return: a summary like the ones of L{summarizeModule}
+    """
+    classes = {}
+    for name, value in vars(builtins).items():
+        if not isinstance(value, type):
+            continue
+        methods = [attribute for attribute, member in vars(value).items()
+                   if inspect.isroutine(member)]
+        classes[name] = {
+            "bases": [base.__name__ for base in value.__bases__
+                      if getattr(builtins, base.__name__, None) is base],
+            "methods": sorted(methods),
+            }
+    return {"module": "builtins", "package": False, "imports": {},
+            "stars": [], "classes": classes}
+
+
+
+def moduleNameFromPath(filepath):
+    """
+    Get the name of the module in a file from the packages containing it.
+
+    @param filepath: path of a python file
+    @return: the dotted module name
+    """
+    if os.path.basename(filepath) == "__init__.py":
+        return filenameToModuleName(os.path.dirname(filepath))
+    return filenameToModuleName(filepath)
+
+
+
+class ClassIndex(object):
+    """
+    Index of the classes defined by modules, with their bases and methods.
+
+    Modules are indexed when they are first needed. The checked modules
+    are registered with L{addModuleFile} or L{addModuleSource} as they are
+    found, and other modules are looked for under the directories of the
+    packages of the checked modules, then on C{sys.path}. Summaries of
+    module files are persisted in the cache directory and reused for as
+    long as the file is not modified.
+
+    @ivar cacheDir: the cache directory, or C{None}
+    """
+    cacheName = "classindex"
+
+    def __init__(self, cacheDir=None):
+        """
+        Load the summaries persisted by previous runs.
+
+        @param cacheDir: the cache directory, or C{None} to not persist
+            the index
+        """
+        self.cacheDir = cacheDir
+        self._summariesByPath = loadCache(cacheDir, self.cacheName)
+        self._modules = {"builtins": _summarizeBuiltins()}
+        self._files = {}
+        self._sources = {}
+        self._roots = []
+        self._ancestors = {}
+        self._dependencies = {}
+        self._accessed = None
+        self._changed = False
+
+
+    def addModuleFile(self, filepath, modname=None):
+        """
+        Register the file of a module, indexed when it is first needed, and
+        look for modules under the directory of its packages too.
+
+        @param filepath: path of the python file
+        @param modname: name of the module, computed from the packages
+            containing the file if not given
+        """
+        filepath = os.path.abspath(filepath)
+        if modname is None:
+            modname = moduleNameFromPath(filepath)
+        parts = modname.split(".")
+        if parts[-1] == "__init__":
+            # Like astroid, name packages without their __init__.
+            del parts[-1]
+        modname = ".".join(parts)
+        root, _ = os.path.splitext(filepath)
+        if os.path.basename(root) == "__init__":
+            root = os.path.dirname(root)
+        for part in reversed(parts):
+            root, name = os.path.split(root)
+            if name != part:
+                # Not named after its packages, like a file in a directory
+                # given to be checked which is not a package.
+                root = None
+                break
+        if root is not None and root not in self._roots:
+            self._roots.append(root)
+        self._files[modname] = filepath
+        self._forgetMissing(modname)
+
+
+    def addModuleSource(self, filepath, source, modname):
+        """
+        Register a module held in memory instead of its file, indexed with
+        L{indexSource} when it is first needed.
+
+        @param filepath: path of the python file
+        @param source: the source of the module
+        @type source: L{bytes}
+        @param modname: name of the module
+        """
+        self._sources[modname] = (filepath, source)
+        self._forgetMissing(modname)
+
+
+    def _forgetMissing(self, modname):
+        """
+        Look for a module registered after it was found missing again, as
+        the ancestors found without it may be incomplete.
+
+        @param modname: name of the module
+        """
+        if modname in self._modules and self._modules[modname] is None:
+            del self._modules[modname]
+            self._ancestors.clear()
+            self._dependencies.clear()
+
+
+    def indexFile(self, filepath, modname=None):
+        """
+        Index a module file.
+
+        @param filepath: path of the python file
+        @param modname: name of the module, computed from the packages
+            containing the file if not given
+        @return: summary of the module, or C{None} if the file can not be
+            read
+        """
+        filepath = os.path.abspath(filepath)
+        if modname is None:
+            modname = moduleNameFromPath(filepath)
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            return None
+        summary = self._summariesByPath.get(filepath)
+        if (summary is None or summary["module"] != modname
+                or summary["mtime"] != stat.st_mtime
+                or summary["size"] != stat.st_size):
+            try:
+                with open(filepath, "rb") as f:
+                    tree = ast.parse(f.read(), filepath)
+            except (IOError, SyntaxError, ValueError):
+                tree = None
+            isPackage = os.path.basename(filepath) == "__init__.py"
+            summary = summarizeModule(tree, modname, isPackage)
+            summary["mtime"] = stat.st_mtime
+            summary["size"] = stat.st_size
+            self._summariesByPath[filepath] = summary
+            self._changed = True
+        self._setModule(modname, summary)
+        return summary
+
+
+    def indexSource(self, filepath, source, modname=None):
+        """
+        Index a module from a source held in memory instead of its file,
+        like the version of the file staged in the git index. The summary
+        is not persisted, the file may hold another source.
+
+        @param filepath: path of the python file
+        @param source: the source of the module
+        @type source: L{bytes}
+        @param modname: name of the module, computed from the packages
+            containing the file if not given
+        @return: summary of the module
+        """
+        filepath = os.path.abspath(filepath)
+        if modname is None:
+            modname = moduleNameFromPath(filepath)
+        try:
+            tree = ast.parse(source, filepath)
+        except (SyntaxError, ValueError):
+            tree = None
+        isPackage = os.path.basename(filepath) == "__init__.py"
+        summary = summarizeModule(tree, modname, isPackage)
+        self._setModule(modname, summary)
+        return summary
+
+
+    def removeModule(self, modname):
+        """
+        Forget a module indexed from a source held in memory, which no
+        longer exists, like a file deleted by a commit.
+
+        @param modname: name of the module
+        """
+        self._setModule(modname, None)
+
+
+    def _setModule(self, modname, summary):
+        """
+        Record the summary of a module.
+
+        @param modname: name of the module
+        @param summary: summary of the module
+        """
+        if self._modules.get(modname, summary) is not summary:
+            # The module changed, ancestors found so far may be stale.
+            self._ancestors.clear()
+            self._dependencies.clear()
+        self._modules[modname] = summary
+
+
+    def indexPath(self, path, walk=os.walk):
+        """
+        Index a module file or all the python files under a directory.
+
+        @param path: path of a file or of a directory
+        @param walk: the function walking directories, like L{os.walk}
+        """
+        if not os.path.isdir(path):
+            self.indexFile(path)
+            return
+        for dirpath, _, filenames in walk(path):
+            for filename in filenames:
+                if filename.endswith(".py"):
+                    self.indexFile(os.path.join(dirpath, filename))
+
+
+    def getModule(self, modname):
+        """
+        Get the summary of a module, indexing it if needed.
+
+        @param modname: name of the module
+        @return: summary of the module, or C{None} if it is not a python
+            module which can be found
+        """
+        if self._accessed is not None:
+            self._accessed.add(modname)
+        if modname in self._modules:
+            return self._modules[modname]
+        if modname in self._sources:
+            filepath, source = self._sources.pop(modname)
+            return self.indexSource(filepath, source, modname)
+        filepath = self._files.get(modname) or self._findFile(modname)
+        summary = None
+        if filepath and filepath.endswith(".py"):
+            summary = self.indexFile(filepath, modname)
+        self._modules[modname] = summary
+        return summary
+
+
+    def _findFile(self, modname):
+        """
+        Find the file of a module under the directories of the packages of
+        the checked modules, or on C{sys.path}.
+
+        @param modname: name of the module
+        @return: the path of the file, or C{None} if it is not found
+        """
+        parts = modname.split(".")
+        for root in self._roots:
+            path = root
+            for part in parts[:-1]:
+                path = os.path.join(path, part)
+                if not os.path.isfile(os.path.join(path, "__init__.py")):
+                    break
+            else:
+                path = os.path.join(path, parts[-1])
+                for filepath in (path + ".py",
+                                 os.path.join(path, "__init__.py")):
+                    if os.path.isfile(filepath):
+                        return filepath
+        try:
+            return file_from_modpath(parts)
+        except (ImportError, SyntaxError):
+            return None
+
+
+    def getMethods(self, modname, qualname):
+        """
+        Get the names of the methods defined by a class itself.
+
+        @param modname: name of the module defining the class
+        @param qualname: qualified name of the class in its module
+        @return: a list of method names, empty if the class is unknown
+        """
+        summary = self.getModule(modname)
+        if summary is None or qualname not in summary["classes"]:
+            return []
+        return summary["classes"][qualname]["methods"]
+
+
+    def _resolve(self, modname, name, depth):
+        """
+        Find the class a name refers to in a module.
+
+        @param modname: name of the module where the name is used
+        @param name: a dotted name
+        @param depth: number of names already followed
+        @return: a C{(modname, qualname)} tuple, or C{None} if the name
+            can not be resolved to a class
+        """
+        if depth > MAX_RESOLUTION_DEPTH:
+            return None
+        summary = self.getModule(modname)
+        if summary is None:
+            return None
+        if name in summary["classes"]:
+            return modname, name
+        head, _, rest = name.partition(".")
+        if head in summary["imports"]:
+            target = summary["imports"][head]
+            if rest:
+                target += "." + rest
+            return self._resolveAbsolute(target, depth + 1)
+        for star in summary["stars"]:
+            found = self._resolve(star, name, depth + 1)
+            if found is not None:
+                return found
+        if not rest and modname != "builtins":
+            return self._resolve("builtins", name, depth + 1)
+        return None
+
+
+    def _resolveAbsolute(self, dottedName, depth):
+        """
+        Find the class an absolute dotted name refers to.
+
+        @param dottedName: a name like C{package.module.Class}
+        @param depth: number of names already followed
+        @return: a C{(modname, qualname)} tuple, or C{None} if the name
+            can not be resolved to a class
+        """
+        parts = dottedName.split(".")
+        for i in range(len(parts) - 1, 0, -1):
+            modname = ".".join(parts[:i])
+            if self.getModule(modname) is not None:
+                return self._resolve(modname, ".".join(parts[i:]), depth)
+        return None
+
+
+    def lookupAncestors(self, modname, qualname):
+        """
+        Get all the ancestors of a class, nearest first.
+
+        @param modname: name of the module defining the class
+        @param qualname: qualified name of the class in its module
+        @return: C{None} if the class is not indexed, otherwise a 2-tuple
+            of the list of C{(modname, qualname)} ancestors and a boolean
+            telling whether every base class could be resolved
+        """
+        key = (modname, qualname)
+        if key in self._ancestors:
+            return self._ancestors[key]
+        summary = self.getModule(modname)
+        if summary is None or qualname not in summary["classes"]:
+            return None
+        ancestors = []
+        complete = True
+        seen = {key}
+        pending = [key]
+        # Record the modules the resolution depends on.
+        self._accessed = set()
+        try:
+            while pending:
+                currentModule, currentClass = pending.pop(0)
+                record = self.getModule(currentModule)["classes"][
+                    currentClass]
+                for base in record["bases"]:
+                    found = None
+                    if base is not None:
+                        found = self._resolve(currentModule, base, 0)
+                    if found is None:
+                        complete = False
+                    elif found not in seen:
+                        seen.add(found)
+                        ancestors.append(found)
+                        pending.append(found)
+            self._dependencies[key] = self._accessed
+        finally:
+            self._accessed = None
+        self._ancestors[key] = (ancestors, complete)
+        return self._ancestors[key]
+
+
+    def getAncestorDependencies(self, modname, qualname):
+        """
+        Get the modules the ancestors of a class were looked up in, whose
+        changes may change the ancestors.
+
+        @param modname: name of the module defining the class
+        @param qualname: qualified name of the class in its module
+        @return: a set of module names, including the ones which could not
+            be found
+        """
+        self.lookupAncestors(modname, qualname)
+        return self._dependencies.get((modname, qualname), set())
+
+
+    def getModuleDependencies(self, modname):
+        """
+        Get the modules the ancestors of the classes of a module and its
+        imports depend on.
+
+        @param modname: name of the module
+        @return: a set of module names, including the ones which could not
+            be found
+        """
+        summary = self.getModule(modname)
+        if summary is None:
+            return set()
+        dependencies = set(summary["stars"])
+        for target in summary["imports"].values():
+            parts = target.split(".")
+            for i in range(len(parts), 0, -1):
+                # Imported names are either modules or names in modules.
+                imported = ".".join(parts[:i])
+                if self.getModule(imported) is not None:
+                    dependencies.add(imported)
+                    break
+            else:
+                dependencies.add(target)
+        for qualname in summary["classes"]:
+            dependencies.update(self.getAncestorDependencies(modname,
+                                                             qualname))
+        dependencies.discard(modname)
+        return dependencies
+
+
+    def getModuleDigest(self, modname):
+        """
+        Get a digest of the imports and classes of a module.
+
+        @param modname: name of the module
+        @return: a hexadecimal digest, or C{None} if the module can not be
+            found
+        """
+        summary = self.getModule(modname)
+        if summary is None:
+            return None
+        if "digest" not in summary:
+            content = dict((key, summary[key]) for key in
+                           ("module", "package", "imports", "stars",
+                            "classes"))
+            summary["digest"] = hashlib.sha1(json.dumps(
+                content, sort_keys=True).encode("utf-8")).hexdigest()
+        return summary["digest"]
+
+
+    def save(self):
+        """
+        Persist the summaries of module files in the cache directory.
+
+        Summaries of files which no longer exist are dropped.
+        """
+        if not self._changed:
+            return
+        for filepath in list(self._summariesByPath):
+            if not os.path.exists(filepath):
+                del self._summariesByPath[filepath]
+        saveCache(self.cacheDir, self.cacheName, self._summariesByPath)
+        self._changed = False
+
+
+
+__all__ = ["ClassIndex", "iterStatements", "summarizeModule",
+           "moduleNameFromPath"]
@@ -0,0 +1,331 @@
+# -*- test-case-name: twistedchecker.test.test_discovery -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Discovery of the modules to check, as a stream.
+
+pylint expands the files and modules given as arguments into the list of
+all the modules under them before checking the first one, so the first
+message of a run on a large tree waits for the whole tree to be walked.
+The modules are yielded here as directories are walked instead, in the
+order pylint would list them, so that each one is checked, and its
+messages reported, as soon as it is found.
+
+Only the arguments themselves are resolved up front, so that the errors
+about arguments which can not be found are still reported first.
+"""
+
+import os
+import sys
+import tempfile
+
+from astroid import modutils
+
+from twistedchecker.core.sources import getFileModuleName
+
+
+# Extensions of the files astroid considers as modules.
+MODULE_EXTENSIONS = (".py", ".so", ".pyd", ".pyw")
+
+# Size of the reads of lists of files.
+FILE_LIST_CHUNK_SIZE = 64 * 1024
+
+
+
+def isBlacklisted(name, blackListRe):
+    """
+    Tell whether a base name matches any of the ignored patterns.
+
+    @param name: the base name of a file or of a directory
+    @param blackListRe: compiled regular expressions of ignored names
+    """
+    return any(pattern.match(name) for pattern in blackListRe)
+
+
+
+def iterModuleFiles(directory, blackList, listAll=False, walk=os.walk):
+    """
+    Yield the module files of a package and of its subpackages as they are
+    found, like L{astroid.modutils.get_module_files} lists them.
+
+    @param directory: the directory of the package
+    @param blackList: base names of ignored files and directories
+    @param listAll: whether to descend into directories which are not
+        packages, for namespace packages
+    @param walk: the function walking directories, like L{os.walk}
+    """
+    for dirpath, dirnames, filenames in walk(directory):
+        if dirpath in blackList:
+            continue
+        for name in blackList:
+            if name in dirnames:
+                dirnames.remove(name)
+            elif name in filenames:
+                filenames.remove(name)
+        if not listAll and "__init__.py" not in filenames:
+            dirnames[:] = ()
+            continue
+        for filename in filenames:
+            if filename.endswith(MODULE_EXTENSIONS):
+                yield os.path.join(dirpath, filename)
+
+
+
+def getModuleKind(modname, something, resolver=None):
+    """
+    Tell whether a module given as argument is a namespace package or a
+    directory.
+
+    @param modname: the name of the module
+    @param something: the argument
+    @param resolver: a
+        L{twistedchecker.core.resolver.ModuleResolver} finding the files
+        of modules, or C{None} to leave it to astroid
+    @return: whether the module is a namespace package, and whether it is
+        a directory
+    """
+    if resolver is not None:
+        path = resolver.resolve([modname]).get(modname)
+        if path is not None:
+            # A plain module or package, which astroid finds as a source
+            # file either way.
+            return False, False
+    try:
+        spec = modutils.file_info_from_modpath(modname.split("."),
+                                               path=sys.path)
+    except ImportError:
+        return False, os.path.isdir(something)
+    return modutils.is_namespace(spec), modutils.is_directory(spec)
+
+
+
+def iterArguments(filesOrModules, blackList, blackListRe, resolver=None):
+    """
+    Resolve the files and modules given as arguments one by one, like
+    L{pylint.utils.expand_modules} does before walking packages.
+
+    @param filesOrModules: names of the files and modules to check
+    @param blackList: base names of ignored files and directories
+    @param blackListRe: compiled regular expressions of ignored names
+    @param resolver: a
+        L{twistedchecker.core.resolver.ModuleResolver} finding the files
+        of modules, or C{None} to leave it to astroid
+    @return: an iterator of pairs of a description of an argument, with
+        the path and the name of its module and whether it is a namespace
+        package or a directory, and of an error like the ones of
+        L{pylint.utils.expand_modules}, one of them being C{None}
+    """
+    for something in filesOrModules:
+        basename = os.path.basename(something)
+        if basename in blackList or isBlacklisted(basename, blackListRe):
+            continue
+        if os.path.exists(something):
+            # A file or a directory.
+            modname = getFileModuleName(something)
+            if os.path.isdir(something):
+                filepath = os.path.join(something, "__init__.py")
+            else:
+                filepath = something
+        else:
+            # A module or a package.
+            modname = something
+            try:
+                if resolver is not None:
+                    filepath = resolver.getModuleFile(modname)
+                else:
+                    filepath = modutils.file_from_modpath(modname.split("."))
+                if filepath is None:
+                    continue
+            except (ImportError, SyntaxError) as e:
+                yield None, {"key": "fatal", "mod": modname, "ex": e}
+                continue
+        isNamespace, isDirectory = getModuleKind(modname or something,
+                                                 something, resolver)
+        yield {"path": os.path.normpath(filepath),
+               "name": modname,
+               "namespace": isNamespace,
+               "directory": isDirectory}, None
+
+
+
+def resolveArguments(filesOrModules, blackList, blackListRe, resolver=None):
+    """
+    Resolve all the files and modules given as arguments.
+
+    @param filesOrModules: names of the files and modules to check
+    @param blackList: base names of ignored files and directories
+    @param blackListRe: compiled regular expressions of ignored names
+    @param resolver: a
+        L{twistedchecker.core.resolver.ModuleResolver} finding the files
+        of modules, or C{None} to leave it to astroid
+    @return: a list of descriptions of the arguments and a list of errors,
+        like the ones given by L{iterArguments}
+    """
+    arguments = []
+    errors = []
+    for argument, error in iterArguments(filesOrModules, blackList,
+                                         blackListRe, resolver):
+        if error is None:
+            arguments.append(argument)
+        else:
+            errors.append(error)
+    return arguments, errors
+
+
+
+def iterModules(arguments, blackList, blackListRe, walk=os.walk):
+    """
+    Yield the descriptions of the modules to check under resolved
+    arguments as they are found, like the ones listed by
+    L{pylint.utils.expand_modules}.
+
+    @param arguments: descriptions of the arguments given by
+        L{resolveArguments}
+    @param blackList: base names of ignored files and directories
+    @param blackListRe: compiled regular expressions of ignored names
+    @param walk: the function walking directories, like L{os.walk}
+    """
+    for argument in arguments:
+        filepath, modname = argument["path"], argument["name"]
+        isNamespace = argument["namespace"]
+        if not isNamespace:
+            yield {"path": filepath, "name": modname, "isarg": True,
+                   "basepath": filepath, "basename": modname}
+        hasInit = (
+            not (modname.endswith(".__init__") or modname == "__init__")
+            and os.path.basename(filepath) == "__init__.py")
+        if not (hasInit or isNamespace or argument["directory"]):
+            continue
+
+        def isPackage(path, parts):
+            return modutils.check_modpath_has_init(path, parts) or isNamespace
+        for subfilepath in iterModuleFiles(os.path.dirname(filepath),
+                                           blackList, listAll=isNamespace,
+                                           walk=walk):
+            if subfilepath == filepath:
+                continue
+            if isBlacklisted(os.path.basename(subfilepath), blackListRe):
+                continue
+            modpath = modutils.modpath_from_file_with_callback(
+                subfilepath, is_package_cb=isPackage)
+            yield {"path": subfilepath, "name": ".".join(modpath),
+                   "isarg": False, "basepath": filepath,
+                   "basename": modname}
+
+
+
+class FileList(object):
+    """
+    Files and modules to check, given as arguments and listed in a file or
+    on the standard input, one per line or separated by NUL characters.
+
+    The list is read as it is iterated, so that checks start before it is
+    entirely written. It can be iterated again: a file is read again, and
+    the standard input is kept in a temporary file as it is read.
+
+    @ivar arguments: the files and modules given as arguments, which come
+        first
+    @ivar source: the path of the file listing files, C{"-"} for the
+        standard input
+    """
+
+    def __init__(self, source, arguments=(), stdin=None):
+        """
+        @param source: the path of the file listing files, C{"-"} for the
+            standard input
+        @param arguments: the files and modules given as arguments
+        @param stdin: the binary standard input, L{sys.stdin} by default
+        """
+        self.source = source
+        self.arguments = list(arguments)
+        if stdin is None:
+            stdin = sys.stdin.buffer
+        self._stdin = stdin
+        self._spool = None
+        self._exhausted = False
+
+
+    def iterChunks(self):
+        """
+        Read the list.
+
+        @return: an iterator of chunks of the list
+        @rtype: iterator of L{bytes}
+        """
+        if self.source != "-":
+            with open(self.source, "rb") as f:
+                while True:
+                    chunk = f.read(FILE_LIST_CHUNK_SIZE)
+                    if not chunk:
+                        return
+                    yield chunk
+        if self._spool is None:
+            self._spool = tempfile.TemporaryFile()
+        # Only wait for what is available on pipes.
+        read = getattr(self._stdin, "read1", self._stdin.read)
+        position = 0
+        while True:
+            self._spool.seek(position)
+            chunk = self._spool.read(FILE_LIST_CHUNK_SIZE)
+            if not chunk:
+                if self._exhausted:
+                    return
+                chunk = read(FILE_LIST_CHUNK_SIZE)
+                if not chunk:
+                    self._exhausted = True
+                    return
+                self._spool.seek(0, os.SEEK_END)
+                self._spool.write(chunk)
+            position += len(chunk)
+            yield chunk
+
+
+    def __iter__(self):
+        """
+        Iterate over the arguments, then over the files listed.
+
+        Files are separated by NUL characters if the first separator of
+        the list is one, by new lines otherwise.
+        """
+        for argument in self.arguments:
+            yield argument
+        separator = None
+        pending = b""
+        for chunk in self.iterChunks():
+            if separator is None:
+                pending += chunk
+                chunk = b""
+                nul = pending.find(b"\0")
+                newLine = pending.find(b"\n")
+                if nul == -1 and newLine == -1:
+                    continue
+                if nul != -1 and (newLine == -1 or nul < newLine):
+                    separator = b"\0"
+                else:
+                    separator = b"\n"
+            items = (pending + chunk).split(separator)
+            pending = items.pop()
+            for item in items:
+                path = self.decode(item)
+                if path:
+                    yield path
+        path = self.decode(pending)
+        if path:
+            yield path
+
+
+    def decode(self, item):
+        """
+        Decode a listed file.
+
+        @param item: the listed file
+        @type item: L{bytes}
+        @return: the path, empty for blank lines
+        """
+        return os.fsdecode(item.rstrip(b"\r\n"))
+
+
+
+__all__ = ["FileList", "getModuleKind", "isBlacklisted", "iterArguments",
+           "iterModuleFiles", "iterModules", "resolveArguments"]
@@ -1,6 +1,9 @@
 import ast
 import os
 
+from twistedchecker.core.cache import loadCache, saveCache
+from twistedchecker.core.sources import decodeSource
+
 class PatternFinder(ast.NodeVisitor):
 
     def __init__(self):
@@ -59,28 +62,133 @@ def findPatternsInFile(codes, patternFinder):
     @param codes: code of the file to check
     @param patternFinder: a visitor for pattern checking and save results
     """
+    if "getattr" not in codes:
+        # Patterns are only found in calls of getattr, skip parsing.
+        return
     tree = ast.parse(codes)
     patternFinder.visit(tree)
 
 
 
-def findAllExceptions(pathToCheck):
+def iterPythonFiles(pathToCheck, walk=os.walk):
+    """
+    Yield the python files of a file or folder as they are found.
+
+    @param pathToCheck: path of a file or of a folder
+    @param walk: the function walking folders, like L{os.walk}
+    """
+    if os.path.isfile(pathToCheck):
+        yield pathToCheck
+        return
+    for path, dirs, files in walk(pathToCheck):
+        for file in files:
+            _, extname = os.path.splitext(file)
+            if extname == ".py":
+                yield os.path.join(path, file)
+
+
+
+class ExceptionCache(object):
+    """
+    The patterns of exceptions found in files, by file path, persisted in
+    the cache directory and reused for as long as a file is not modified.
+
+    @ivar cacheDir: the cache directory, or C{None}
+    """
+    cacheName = "exceptions"
+
+    def __init__(self, cacheDir=None):
+        """
+        Load the patterns persisted by previous runs.
+
+        @param cacheDir: the cache directory, or C{None} to not persist
+            the patterns
+        """
+        self.cacheDir = cacheDir
+        self._patternsByPath = loadCache(cacheDir, self.cacheName)
+        self._changed = False
+
+
+    def findPatterns(self, pathFile, patternFinder):
+        """
+        Find patterns of exceptions in a file, unless they are known.
+
+        @param pathFile: path of the python file
+        @param patternFinder: a visitor for pattern checking and save
+            results
+        """
+        pathFile = os.path.abspath(pathFile)
+        stat = os.stat(pathFile)
+        entry = self._patternsByPath.get(pathFile)
+        if (entry is None or entry["mtime"] != stat.st_mtime
+                or entry["size"] != stat.st_size):
+            finder = PatternFinder()
+            with open(pathFile) as f:
+                findPatternsInFile(f.read(), finder)
+            entry = {"mtime": stat.st_mtime, "size": stat.st_size,
+                     "func": sorted(finder.patternsFunc),
+                     "class": sorted(finder.patternsClass)}
+            self._patternsByPath[pathFile] = entry
+            self._changed = True
+        patternFinder.patternsFunc.update(entry["func"])
+        patternFinder.patternsClass.update(entry["class"])
+
+
+    def save(self):
+        """
+        Persist the patterns of files in the cache directory.
+
+        Patterns of files which no longer exist are dropped.
+        """
+        if not self._changed:
+            return
+        for pathFile in list(self._patternsByPath):
+            if not os.path.exists(pathFile):
+                del self._patternsByPath[pathFile]
+        saveCache(self.cacheDir, self.cacheName, self._patternsByPath)
+        self._changed = False
+
+
+
+def findAllExceptions(pathToCheck, cache=None, walk=os.walk):
     """
     Find patterns of exceptions in a file or folder.
 
-    @param patternFinder: a visitor for pattern checking and save results
+    @param pathToCheck: path of a file or of a folder
+    @param cache: an L{ExceptionCache} of the patterns of files, or
+        C{None} to find the patterns of every file
+    @param walk: the function walking folders, like L{os.walk}
     @return: patterns of special functions and classes
     """
     finder = PatternFinder()
-    if os.path.isfile(pathToCheck):
-        with open(pathToCheck) as f:
+    for pathFile in iterPythonFiles(pathToCheck, walk):
+        if cache is not None:
+            cache.findPatterns(pathFile, finder)
+            continue
+        with open(pathFile) as f:
             findPatternsInFile(f.read(), finder)
-    else:
-        for path, dirs, files in os.walk(pathToCheck):
-            for file in files:
-                _, extname = os.path.splitext(file)
-                if extname == ".py":
-                    pathFile = os.path.join(path, file)
-                    with open(pathFile) as f:
-                        findPatternsInFile(f.read(), finder)
     return finder.patternsFunc, finder.patternsClass
+
+
+
+def findSourceExceptions(sources):
+    """
+    Find patterns of exceptions in sources held in memory.
+
+    @param sources: pairs of the path of a module and of its source, as
+        L{bytes}
+    @return: patterns of special functions and classes
+    """
+    finder = PatternFinder()
+    for _, source in sources:
+        try:
+            codes, _ = decodeSource(source)
+        except (SyntaxError, UnicodeError):
+            continue
+        findPatternsInFile(codes, finder)
+    return finder.patternsFunc, finder.patternsClass
+
+
+
+__all__ = ["ExceptionCache", "PatternFinder", "findAllExceptions",
+           "findPatternsInFile", "findSourceExceptions", "iterPythonFiles"]
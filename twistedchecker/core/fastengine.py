@@ -0,0 +1,1007 @@
+# -*- test-case-name: twistedchecker.test.test_fastengine -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+A checking engine running the syntax only checks of twistedchecker without
+building astroid trees.
+
+Most messages of twistedchecker only need the tokens of a module, its raw
+source or the syntax tree of the standard library's C{ast} module, which is
+much cheaper to build than an astroid tree. The engine reports them from
+these, and only builds the astroid tree of a module when a checker it can
+not replace still has enabled messages, like the name checker of pylint.
+"""
+
+import ast
+import hashlib
+import tokenize
+
+from io import BytesIO
+
+from pylint.checkers.base import NO_REQUIRED_DOC_RGX
+from pylint.constants import MSG_TYPES, MSG_TYPES_STATUS, WarningScope
+from pylint.interfaces import (IAstroidChecker, IRawChecker, ITokenChecker,
+                               UNDEFINED, implements)
+from pylint.message import Message
+from pylint.utils import ASTWalker, FileState
+
+from twistedchecker.checkers.comment import CommentChecker
+from twistedchecker.checkers.docstring import (DocstringChecker,
+                                               DocstringTarget,
+                                               iterDocstringMessages)
+from twistedchecker.checkers.format import TwistedFormatChecker
+from twistedchecker.checkers.formattingoperation import (
+    FormattingOperationChecker)
+from twistedchecker.checkers.header import HeaderChecker
+from twistedchecker.checkers.names import (TwistedNamesChecker,
+                                           getMethodNameMessage,
+                                           sourceContainsTestCase)
+from twistedchecker.checkers.testclassname import TestClassNameChecker
+from twistedchecker.core.classindex import iterStatements
+from twistedchecker.core.rawscan import scanSource
+from twistedchecker.core.resultcache import (getInputDigest,
+                                             getOptionValues, recordMessage,
+                                             replayMessages)
+from twistedchecker.core.scopecache import getScopeKey
+from twistedchecker.core.util import isTestModule
+
+
+# The checkers whose messages are all reported by the engine.
+FAST_CHECKERS = (TwistedFormatChecker, CommentChecker, HeaderChecker,
+                 DocstringChecker, TwistedNamesChecker,
+                 FormattingOperationChecker, TestClassNameChecker)
+
+_FUNCTION_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef)
+_SCOPE_TYPES = (ast.Module, ast.ClassDef) + _FUNCTION_TYPES
+# The nodes pylint names messages after.
+_FRAME_TYPES = (ast.ClassDef, ast.Lambda) + _FUNCTION_TYPES
+
+
+
+def _lastLineno(node):
+    """
+    Get the last line of a node, like astroid does from the line numbers of
+    its descendants.
+
+    @param node: a node of the C{ast} module
+    @return: a line number
+    """
+    return max(getattr(child, "lineno", 0) for child in ast.walk(node))
+
+
+
+def _fromLineno(node):
+    """
+    Get the line of a node the messages about it are reported on, like
+    astroid does: 0 for modules, and the line of the C{def} statement for
+    decorated functions.
+
+    @param node: a node of the C{ast} module
+    @return: a line number
+    """
+    if isinstance(node, ast.Module):
+        return 0
+    lineno = node.lineno
+    if isinstance(node, _FUNCTION_TYPES):
+        for decorator in node.decorator_list:
+            lineno += _lastLineno(decorator) - decorator.lineno + 1
+    return lineno
+
+
+
+def _firstLineno(node):
+    """
+    Get the first line of a statement, including its decorators.
+
+    @param node: a statement node of the C{ast} module
+    @return: a line number
+    """
+    return min([node.lineno] + [decorator.lineno for decorator
+                                in getattr(node, "decorator_list", ())])
+
+
+
+def _getSource(node):
+    """
+    Render an expression of a decorator, close enough to astroid's
+    C{as_string} for the docstring checks, which only look for properties
+    and setters.
+
+    @param node: an expression node of the C{ast} module
+    @return: the source of the expression
+    """
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return "%s.%s" % (_getSource(node.value), node.attr)
+    if isinstance(node, ast.Call):
+        return "%s(%s)" % (_getSource(node.func),
+                           ", ".join(_getSource(arg) for arg in node.args))
+    return ""
+
+
+
+def _hasReturnValue(node):
+    """
+    Determine whether a function returns a value from its body.
+
+    @param node: a function node of the C{ast} module
+    """
+    return any(isinstance(subnode, ast.Return) and subnode.value is not None
+               for subnode in node.body)
+
+
+
+def _getStringConstant(node):
+    """
+    Get the value of a string literal.
+
+    @param node: a node of the C{ast} module
+    @return: the string, or C{None} if the node is not a string literal
+    """
+    nodeType = type(node).__name__
+    if nodeType == "Str":
+        # Python < 3.8.
+        return node.s
+    if nodeType == "Constant" and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+
+def collectBlockLines(fileState, msgsStore, tree):
+    """
+    Apply the pragmas found in the tokens of a module to the blocks they
+    are in, like L{FileState.collect_block_lines} does from astroid trees.
+
+    Pragmas disabling messages on nodes before the first statement of a
+    class or a function apply to the whole definition, others apply from
+    their line to the end of the block. Blocks are the nodes of the tree,
+    the special cases astroid makes for the branches of compound
+    statements are not reproduced.
+
+    @param fileState: the state of the current module, once its tokens are
+        processed
+    @type fileState: L{FileState}
+    @param msgsStore: the store of the message definitions
+    @param tree: the syntax tree of the module
+    @type tree: L{ast.Module}
+    """
+    origState = fileState._module_msgs_state.copy()
+    for msgid, lines in origState.items():
+        fileState._raw_module_msgs_state[msgid] = lines.copy()
+    fileState._module_msgs_state = {}
+    fileState._suppression_mapping = {}
+    fileState._effective_max_line_number = _lastLineno(tree)
+    if origState:
+        _collectBlockLines(fileState, msgsStore, tree, origState)
+
+
+
+def _collectBlockLines(fileState, msgsStore, node, msgState):
+    """
+    Recursively apply pragmas to the blocks of a tree, the innermost
+    blocks first.
+
+    @param fileState: the state of the current module
+    @param msgsStore: the store of the message definitions
+    @param node: the block to apply pragmas to
+    @param msgState: the pragmas which are not applied yet, a dictionary
+        from message identifiers to dictionaries from line numbers to
+        states
+    @return: the last line of the block
+    """
+    last = getattr(node, "lineno", 0)
+    for child in ast.iter_child_nodes(node):
+        last = max(last, _collectBlockLines(fileState, msgsStore, child,
+                                            msgState))
+    if not (hasattr(node, "lineno") or isinstance(node, ast.Module)):
+        # Operators, contexts and the like are not blocks.
+        return last
+    first = _fromLineno(node)
+    isScope = isinstance(node, _SCOPE_TYPES)
+    if isScope and node.body:
+        firstChildLineno = _fromLineno(node.body[0])
+    else:
+        firstChildLineno = last
+    for msgid, lines in msgState.items():
+        for lineno, state in list(lines.items()):
+            originalLineno = lineno
+            if first > lineno or last < lineno:
+                continue
+            for definition in msgsStore.get_message_definitions(msgid):
+                if definition.scope == WarningScope.NODE:
+                    if lineno > firstChildLineno:
+                        state = True
+                    blockFirst = first if isScope else lineno
+                else:
+                    blockFirst = lineno
+            for line in range(blockFirst, last + 1):
+                # Inner blocks were handled first.
+                if line in fileState._module_msgs_state.get(msgid, ()):
+                    continue
+                if line in lines:
+                    # The state changes again in the same block.
+                    state = lines[line]
+                    originalLineno = line
+                if not state:
+                    fileState._suppression_mapping[(msgid, line)] = (
+                        originalLineno)
+                fileState._module_msgs_state.setdefault(msgid, {})[line] = (
+                    state)
+            del lines[lineno]
+    return last
+
+
+
+class _ModuleChecks(object):
+    """
+    The checks of the syntax tree of a module.
+
+    @ivar engine: the engine reporting messages
+    @ivar modname: name of the module
+    @ivar tokens: the tokens of the module
+    @ivar inTestModule: whether the module is a test module
+    @ivar frames: the classes and functions, including lambdas, enclosing
+        the node being checked
+    @ivar statements: the number of statements seen
+    @ivar testClassNamesChecked: whether the names of the test classes of
+        the module could be checked without astroid
+    @ivar path: path of the module
+    @ivar source: source of the module
+    @ivar lineOffsets: offsets of the lines of the source
+    @ivar recording: the messages reported in the function being recorded
+        in the scope cache, or C{None}
+    @ivar scopeStart: first line of the function being recorded
+    @ivar dependencies: names of the modules the ancestors of the classes
+        of the module were looked up in
+    """
+
+    def __init__(self, engine, modname, tokens, path=None, source=b"",
+                 lineOffsets=()):
+        """
+        Prepare the checks of a module.
+
+        @param engine: the engine reporting messages
+        @type engine: L{FastEngine}
+        @param modname: name of the module
+        @param tokens: the tokens of the module
+        @param path: path of the module
+        @param source: source of the module
+        @param lineOffsets: offsets of the lines of the source
+        """
+        self.engine = engine
+        self.modname = modname
+        self.tokens = tokens
+        self.inTestModule = isTestModule(modname)
+        self.frames = []
+        self.statements = 0
+        self.testClassNamesChecked = True
+        self.path = path
+        self.source = source
+        self.lineOffsets = lineOffsets
+        self.recording = None
+        self.scopeStart = 0
+        self.dependencies = set()
+        self._siblingNames = {}
+
+
+    def report(self, msgid, node, line=None, args=None):
+        """
+        Report a message about a node of the module.
+
+        @param msgid: identifier of the message
+        @param node: the node the message is about
+        @param line: line of the message, the one of the node by default
+        @param args: arguments of the message
+        """
+        if line is None:
+            line = _fromLineno(node)
+        column = getattr(node, "col_offset", 0)
+        obj = self.getObjectName()
+        if self.recording is not None:
+            self.recording.append(
+                [msgid, line - self.scopeStart, column, obj, args])
+        self.engine.reportMessage(msgid, line, column, self.modname, obj,
+                                  args)
+
+
+    def getObjectName(self):
+        """
+        Get the name of the object being checked, like pylint reports it.
+
+        @return: the dotted names of the enclosing classes and functions
+        """
+        return ".".join(getattr(frame, "name", "<lambda>")
+                        for frame in self.frames)
+
+
+    def walk(self, node, parent=None, end=None):
+        """
+        Check a node and its children.
+
+        @param node: a node of the C{ast} module
+        @param parent: the parent of the node
+        @param end: the last line of the node, followed by the next
+            statement of its block, or C{None} if unknown
+        """
+        if (isinstance(node, _FUNCTION_TYPES) and self.recording is None
+                and self.engine.scopeCache is not None and end is not None):
+            self.walkCachedFunction(node, parent, end)
+            return
+        isFrame = isinstance(node, _FRAME_TYPES)
+        if isFrame:
+            self.frames.append(node)
+        if isinstance(node, ast.stmt):
+            self.statements += 1
+        if isinstance(node, ast.Module):
+            self.checkDocstring("module", node)
+            self.checkTestClassNames(node)
+            end = len(self.lineOffsets) or None
+        elif isinstance(node, ast.ClassDef):
+            if NO_REQUIRED_DOC_RGX.match(node.name) is None:
+                self.checkDocstring("class", node)
+        elif isinstance(node, _FUNCTION_TYPES):
+            self.checkFunction(node, parent)
+        elif isinstance(node, ast.BinOp):
+            self.checkFormattingOperation(node)
+        for _, value in ast.iter_fields(node):
+            if isinstance(value, ast.AST):
+                self.walk(value, node, end)
+            elif isinstance(value, list):
+                for index, child in enumerate(value):
+                    if not isinstance(child, ast.AST):
+                        continue
+                    childEnd = end
+                    if (end is not None and isinstance(child, ast.stmt)
+                            and index + 1 < len(value)):
+                        childEnd = _firstLineno(value[index + 1]) - 1
+                    self.walk(child, node, childEnd)
+        if isFrame:
+            self.frames.pop()
+
+
+    def walkCachedFunction(self, node, parent, end):
+        """
+        Check a function, or report the messages recorded in the scope
+        cache for the same function.
+
+        @param node: a function node
+        @param parent: the parent of the function
+        @param end: the last line of the function
+        """
+        scopeCache = self.engine.scopeCache
+        first = _firstLineno(node)
+        key = getScopeKey(self.getScopeContext(node, parent),
+                          self.getLinesSource(first, end))
+        entry = scopeCache.get(self.path, key)
+        if entry is not None:
+            self.statements += entry["statements"]
+            for msgid, line, column, obj, args in entry["messages"]:
+                if isinstance(args, list):
+                    args = tuple(args)
+                self.engine.reportMessage(msgid, first + line, column,
+                                          self.modname, obj, args)
+            return
+        statements = self.statements
+        self.recording = []
+        self.scopeStart = first
+        try:
+            self.walk(node, parent, end)
+            entry = {"statements": self.statements - statements,
+                     "messages": self.recording}
+        finally:
+            self.recording = None
+        scopeCache.set(self.path, key, entry)
+
+
+    def getScopeContext(self, node, parent):
+        """
+        Describe what the messages of a function depend on, besides its
+        source.
+
+        Whether a method overrides a method of a base class does not change
+        the messages, so the ancestors of its class are not part of it.
+
+        @param node: a function node
+        @param parent: the parent of the function
+        @return: a list of strings
+        """
+        context = [self.engine.scopeContext, str(self.inTestModule)]
+        context.extend("%s %s" % (type(frame).__name__,
+                                  getattr(frame, "name", ""))
+                       for frame in self.frames)
+        if self.frames and isinstance(self.frames[-1], ast.ClassDef):
+            # Methods whose names have an underscore are valid when other
+            # methods share their prefix.
+            context.append(" ".join(self.getSiblingNames(node, parent)))
+        return context
+
+
+    def getSiblingNames(self, node, parent):
+        """
+        Get the names of the other functions defined in the parent of a
+        function.
+
+        @param node: a function node
+        @param parent: the parent of the function
+        @return: a sorted list of names
+        """
+        names = self._siblingNames.get(id(parent))
+        if names is None:
+            names = sorted(sibling.name for sibling in ast.walk(parent)
+                           if isinstance(sibling, _FUNCTION_TYPES))
+            self._siblingNames[id(parent)] = names
+        names = list(names)
+        names.remove(node.name)
+        return names
+
+
+    def getLinesSource(self, first, last):
+        """
+        Get the source of lines of the module.
+
+        @param first: the first line
+        @param last: the last line
+        @return: the source of the lines
+        @rtype: L{bytes}
+        """
+        start = self.lineOffsets[first - 1]
+        if last < len(self.lineOffsets):
+            return self.source[start:self.lineOffsets[last]]
+        return self.source[start:]
+
+
+    def checkFunction(self, node, parent):
+        """
+        Check the docstring and the name of a function or a method.
+
+        @param node: the function, which is the innermost frame
+        @param parent: the parent of the function
+        """
+        isMethod = (len(self.frames) > 1
+                    and isinstance(self.frames[-2], ast.ClassDef))
+        # Like with astroid, the names of asynchronous methods are not
+        # checked.
+        if (isMethod and type(node) is ast.FunctionDef
+                and self.engine.isAnyEnabled(("C9302", "C9303"))):
+            siblingNames = (
+                sibling.name for sibling in ast.walk(parent)
+                if isinstance(sibling, _FUNCTION_TYPES)
+                and sibling is not node)
+            msgid = getMethodNameMessage(node.name, self.inTestModule,
+                                         siblingNames)
+            if msgid:
+                self.report(msgid, node)
+        if NO_REQUIRED_DOC_RGX.match(node.name) is None:
+            self.checkDocstring(isMethod and "method" or "function", node)
+
+
+    def checkDocstring(self, nodeType, node):
+        """
+        Check the docstring of a module, a class or a function.
+
+        @param nodeType: C{"module"}, C{"class"}, C{"function"} or
+            C{"method"}
+        @param node: a node of the C{ast} module
+        """
+        enabledMessages = self.engine.docstringMessages
+        if not enabledMessages:
+            return
+        if isinstance(node, ast.Module):
+            target = DocstringTarget(nodeType, None,
+                                     ast.get_docstring(node, clean=False), 0)
+        else:
+            decoratorNames = [_getSource(decorator)
+                              for decorator in node.decorator_list]
+            argnames = ()
+            hasReturnValue = False
+            if isinstance(node, _FUNCTION_TYPES):
+                args = node.args
+                argnames = [arg.arg for arg in args.args]
+                argnames.extend(arg.arg for arg in (args.vararg, args.kwarg)
+                                if arg is not None)
+                hasReturnValue = _hasReturnValue(node)
+            isInner = any(isinstance(frame, _FUNCTION_TYPES)
+                          for frame in self.frames[:-1])
+            target = DocstringTarget(
+                nodeType, node.name, ast.get_docstring(node, clean=False),
+                node.lineno, node.col_offset, decoratorNames, argnames,
+                hasReturnValue, isInner)
+        for msgid, line, args in iterDocstringMessages(target,
+                                                       enabledMessages):
+            self.report(msgid, node, line, args)
+
+
+    def checkFormattingOperation(self, node):
+        """
+        Check that string formatting operations use a tuple for non-mapping
+        values, like L{FormattingOperationChecker}.
+
+        @param node: a binary operation
+        @type node: L{ast.BinOp}
+        """
+        if not (isinstance(node.op, ast.Mod)
+                and self.engine.isAnyEnabled(("W9501",))):
+            return
+        pattern = _getStringConstant(node.left)
+        if pattern is None:
+            return
+        if "%(" in pattern:
+            return
+        if isinstance(node.right, (ast.Tuple, ast.Dict)):
+            return
+        self.report('W9501', node)
+
+
+    def checkTestClassNames(self, tree):
+        """
+        Check that test classes are named like C{FooTests}, like
+        L{TestClassNameChecker}, asking the class index whether classes are
+        test cases.
+
+        If the index can not tell for a class, no message is reported and
+        L{testClassNamesChecked} is set to C{False}.
+
+        @param tree: the syntax tree of the module
+        """
+        checker = self.engine.getChecker(TestClassNameChecker)
+        if not (checker is not None and self.inTestModule
+                and self.engine.isAnyEnabled(('W9701',))):
+            return
+        classIndex = checker.classIndex
+        if classIndex is None:
+            self.testClassNamesChecked = False
+            return
+        classes = {}
+        for statement in iterStatements(tree.body):
+            if isinstance(statement, ast.ClassDef):
+                classes.setdefault(statement.name, statement)
+        badNames = []
+        for name, node in classes.items():
+            if name.endswith('Tests') or not any(
+                    method.startswith('test')
+                    for method in classIndex.getMethods(self.modname, name)):
+                continue
+            ancestors = checker.getIndexedAncestorNames(self.modname, name)
+            self.dependencies.update(
+                classIndex.getAncestorDependencies(self.modname, name))
+            if ancestors is None:
+                self.testClassNamesChecked = False
+                return
+            if 'TestCase' in ancestors:
+                badNames.append(node)
+        for node in sorted(badNames, key=lambda node: node.lineno):
+            self.engine.reportNodeMessage('W9701', node, self.modname,
+                                          node.name, line=node.lineno)
+
+
+
+class FastEngine(object):
+    """
+    Check modules, building astroid trees only when some enabled messages
+    need them.
+
+    @ivar linter: the linter, holding the configuration and the reporter
+    @ivar fastCheckers: the registered checkers whose messages the engine
+        reports itself
+    @ivar docstringMessages: the enabled messages of the docstring checks
+    @ivar scopeCache: the cache of the messages of functions, or C{None}
+    @type scopeCache: L{ScopeCache}
+    @ivar scopeContext: what the messages of all functions depend on, set
+        when checking starts
+    @ivar resultCache: the cache of the messages of modules, or C{None}
+    @type resultCache: L{ResultCache}
+    @ivar classIndex: the index of classes telling which modules the cached
+        results depend on, required by the result cache
+    @type classIndex: L{ClassIndex}
+    @ivar configuration: the digests of the configuration inputs of
+        modules, set when checking starts: C{"fast"} for the checks of the
+        engine and C{"other"} for the checks needing astroid trees
+    @ivar sources: the sources of the modules checked from memory, or
+        C{None}
+    @type sources: L{SourceStore}
+    """
+
+    def __init__(self, linter, scopeCache=None, resultCache=None,
+                 classIndex=None, sources=None):
+        """
+        Prepare to check modules.
+
+        @param linter: the linter, with its checkers pruned
+        @type linter: L{pylint.lint.PyLinter}
+        @param scopeCache: the cache of the messages of functions, or
+            C{None} to check all functions
+        @type scopeCache: L{ScopeCache}
+        @param resultCache: the cache of the messages of modules, or
+            C{None} to check all modules
+        @type resultCache: L{ResultCache}
+        @param classIndex: the index of classes, required when a result
+            cache is given
+        @type classIndex: L{ClassIndex}
+        @param sources: the sources of the modules to check from memory
+            instead of their files, or C{None}
+        @type sources: L{SourceStore}
+        """
+        self.linter = linter
+        self.fastCheckers = [checker for checker in linter.get_checkers()
+                             if isinstance(checker, FAST_CHECKERS)]
+        self.docstringMessages = frozenset()
+        self.scopeCache = scopeCache
+        self.scopeContext = ""
+        self.resultCache = resultCache
+        self.classIndex = classIndex
+        self.configuration = {}
+        self.sources = sources
+
+
+    def getChecker(self, checkerType):
+        """
+        Get a checker handled by the engine.
+
+        @param checkerType: the class of the checker
+        @return: the checker, or C{None} if it is not registered
+        """
+        for checker in self.fastCheckers:
+            if isinstance(checker, checkerType):
+                return checker
+        return None
+
+
+    def isAnyEnabled(self, msgids):
+        """
+        Tell whether any of the given messages is enabled.
+
+        @param msgids: message identifiers
+        """
+        return any(self.linter.is_message_enabled(msgid) for msgid in msgids)
+
+
+    def check(self, filesOrModules):
+        """
+        Check modules, like L{pylint.lint.PyLinter.check}.
+
+        @param filesOrModules: names of the files and modules to check
+        """
+        linter = self.linter
+        for msg in linter.msgs_store.messages:
+            if not msg.may_be_emitted():
+                linter._msgs_state[msg.msgid] = False
+        checkers = linter.prepare_checkers()
+        # The other checkers need astroid trees.
+        otherCheckers = [checker for checker in checkers
+                         if checker is not linter
+                         and checker not in self.fastCheckers]
+        for checker in checkers:
+            checker.open()
+        walker = ASTWalker(linter)
+        for checker in otherCheckers:
+            if implements(checker, IAstroidChecker):
+                walker.add_checker(checker)
+        # Test class names are checked with astroid when the class index
+        # can not tell whether classes are test cases.
+        fallbackWalker = ASTWalker(linter)
+        for checker in otherCheckers + [self.getChecker(TestClassNameChecker)]:
+            if checker is not None and implements(checker, IAstroidChecker):
+                fallbackWalker.add_checker(checker)
+        docstringChecker = self.getChecker(DocstringChecker)
+        if docstringChecker is not None:
+            self.docstringMessages = docstringChecker.enabledMessages
+        # Messages are only reported in functions when they are enabled.
+        self.scopeContext = ",".join(sorted(
+            msgid for checker in self.fastCheckers for msgid in checker.msgs
+            if linter.is_message_enabled(msgid)))
+        self.configuration = self.getConfiguration(otherCheckers)
+
+        statements = 0
+        for descr in linter.expand_files(filesOrModules):
+            modname, path = descr["name"], descr["path"]
+            if not linter.should_analyze_file(modname, path,
+                                              is_argument=descr["isarg"]):
+                continue
+            linter.set_current_module(modname, path)
+            linter.file_state = FileState(descr["basename"])
+            linter._ignore_file = False
+            try:
+                if self.sources is not None:
+                    source = self.sources.readSource(path)
+                else:
+                    with open(path, "rb") as f:
+                        source = f.read()
+            except IOError as e:
+                linter.add_message("parse-error", args=e)
+                continue
+            if self.resultCache is None:
+                checks = self.checkModuleSource(descr, source, walker,
+                                                fallbackWalker, otherCheckers)
+                moduleStatements = checks.statements if checks else 0
+            else:
+                moduleStatements = self.checkCachedModule(
+                    descr, source, walker, fallbackWalker, otherCheckers)
+            statements += moduleStatements
+            linter.stats["by_module"][modname]["statement"] = (
+                moduleStatements)
+        linter.stats["statement"] = statements
+        for checker in reversed(checkers):
+            checker.close()
+        if self.scopeCache is not None:
+            self.scopeCache.save()
+        if self.resultCache is not None:
+            self.resultCache.save()
+
+
+    def getConfiguration(self, otherCheckers):
+        """
+        Get the digests of the enabled messages and of the options the
+        messages of modules depend on.
+
+        The options of the checkers needing astroid trees include the name
+        exceptions found in all the checked modules, so that finding new
+        ones only invalidates the results of the modules which were checked
+        with astroid.
+
+        @param otherCheckers: the checkers the engine does not replace
+        @return: a C{dict} with the C{"fast"} and C{"other"} digests
+        """
+        linter = self.linter
+        # Enabling messages of the other checkers makes modules which did
+        # not need astroid trees need them. The messages which can not be
+        # emitted by this version of python are only disabled by the first
+        # check of the linter.
+        enabled = sorted(msg.msgid for msg in linter.msgs_store.messages
+                         if linter.is_message_enabled(msg.msgid)
+                         and msg.may_be_emitted())
+        return {
+            "fast": getInputDigest(
+                [enabled, getOptionValues(self.fastCheckers)]),
+            "other": getInputDigest(getOptionValues(otherCheckers)),
+            }
+
+
+    def checkModuleSource(self, descr, source, walker, fallbackWalker,
+                          otherCheckers):
+        """
+        Check a module without astroid, then with the checkers needing its
+        astroid tree if any.
+
+        @param descr: the description of the module given by
+            L{pylint.lint.PyLinter.expand_files}
+        @param source: the source of the module
+        @type source: L{bytes}
+        @param walker: the walker of the astroid checkers
+        @param fallbackWalker: the walker of the astroid checkers and of
+            the checker of the names of test classes
+        @param otherCheckers: the checkers the engine does not replace
+        @return: the checks of the syntax tree which were run, or C{None}
+            if the module could not be checked
+        @rtype: L{_ModuleChecks}
+        """
+        checks = self.checkModule(descr["name"], descr["path"], source)
+        if checks is None:
+            return None
+        if not checks.testClassNamesChecked:
+            self.checkAstroidModule(descr, checks.tokens, fallbackWalker,
+                                    otherCheckers)
+        elif otherCheckers:
+            self.checkAstroidModule(descr, checks.tokens, walker,
+                                    otherCheckers)
+        return checks
+
+
+    def checkCachedModule(self, descr, source, walker, fallbackWalker,
+                          otherCheckers):
+        """
+        Check a module, or report the messages recorded in the result cache
+        when none of the inputs they were computed from changed.
+
+        @param descr: the description of the module given by
+            L{pylint.lint.PyLinter.expand_files}
+        @param source: the source of the module
+        @type source: L{bytes}
+        @param walker: the walker of the astroid checkers
+        @param fallbackWalker: the walker of the astroid checkers and of
+            the checker of the names of test classes
+        @param otherCheckers: the checkers the engine does not replace
+        @return: the number of statements of the module
+        """
+        linter = self.linter
+        path = descr["path"]
+        digest = hashlib.sha1(source).hexdigest()
+        entry = self.resultCache.get(path, descr["name"], digest,
+                                     self.configuration,
+                                     self.classIndex.getModuleDigest)
+        if entry is not None:
+            replayMessages(linter, entry["messages"])
+            return entry["statements"]
+
+        messages = []
+        reporter = linter.reporter
+        handleMessage = reporter.handle_message
+
+        def recordingHandleMessage(msg):
+            messages.append(recordMessage(msg))
+            handleMessage(msg)
+        reporter.handle_message = recordingHandleMessage
+        try:
+            checks = self.checkModuleSource(descr, source, walker,
+                                            fallbackWalker, otherCheckers)
+        finally:
+            reporter.handle_message = handleMessage
+
+        configuration = ["fast"]
+        dependencies = set()
+        if checks is not None:
+            dependencies.update(checks.dependencies)
+            if otherCheckers or not checks.testClassNamesChecked:
+                # Astroid infers names across imports.
+                configuration.append("other")
+                dependencies.update(
+                    self.classIndex.getModuleDependencies(checks.modname))
+        self.resultCache.set(path, {
+            "module": descr["name"],
+            "digest": digest,
+            "configuration": dict((name, self.configuration[name])
+                                  for name in configuration),
+            "modules": dict((modname, self.classIndex.getModuleDigest(modname))
+                            for modname in dependencies),
+            "statements": checks.statements if checks else 0,
+            "messages": messages,
+            })
+        return checks.statements if checks else 0
+
+
+    def checkAstroidModule(self, descr, tokens, walker, otherCheckers):
+        """
+        Check a module with the checkers needing its astroid tree, like
+        L{pylint.lint.PyLinter.check_astroid_module}.
+
+        @param descr: the description of the module given by
+            L{pylint.lint.PyLinter.expand_files}
+        @param tokens: the tokens of the module
+        @param walker: the walker of the astroid checkers
+        @param otherCheckers: the checkers the engine does not replace
+        """
+        linter = self.linter
+        node = linter.get_ast(descr["path"], descr["name"])
+        if node is None:
+            return
+        # Pragmas are collected again from the astroid tree.
+        linter.file_state = FileState(descr["basename"])
+        linter.current_file = node.file
+        linter.process_tokens(tokens)
+        linter.file_state.collect_block_lines(linter.msgs_store, node)
+        for checker in otherCheckers:
+            if implements(checker, IRawChecker):
+                checker.process_module(node)
+            if implements(checker, ITokenChecker):
+                checker.process_tokens(tokens)
+        walker.walk(node)
+
+
+    def checkModule(self, modname, path, source):
+        """
+        Check a module without astroid.
+
+        @param modname: name of the module given by
+            L{pylint.lint.PyLinter.expand_files}
+        @param path: path of the module
+        @param source: the source of the module
+        @type source: L{bytes}
+        @return: the checks of the syntax tree which were run, or C{None}
+            if the module could not be checked
+        @rtype: L{_ModuleChecks}
+        """
+        linter = self.linter
+        try:
+            tree = ast.parse(source)
+        except SyntaxError as e:
+            linter.add_message("syntax-error", line=e.lineno or 0,
+                               col_offset=e.offset, args=str(e))
+            return None
+        except ValueError as e:
+            linter.add_message("parse-error", args=e)
+            return None
+        try:
+            tokens = list(tokenize.tokenize(BytesIO(source).readline))
+        except tokenize.TokenError as e:
+            linter.add_message("syntax-error", line=e.args[1][0],
+                               args=e.args[0])
+            return None
+
+        # Module and block level pragmas.
+        linter.process_tokens(tokens)
+        if linter._ignore_file:
+            return None
+        collectBlockLines(linter.file_state, linter.msgs_store, tree)
+
+        if modname.endswith(".__init__"):
+            # Like astroid, name packages without their __init__.
+            modname = modname[:-len(".__init__")]
+
+        encoding = "utf-8"
+        if tokens and tokens[0].type == tokenize.ENCODING:
+            encoding = tokens[0].string
+        formatChecker = self.getChecker(TwistedFormatChecker)
+        maxLineLength = None
+        if formatChecker is not None:
+            maxLineLength = formatChecker.config.max_line_length
+        scan = scanSource(source, maxLineLength, encoding)
+        checks = _ModuleChecks(self, modname, tokens, path, source,
+                               scan.lineOffsets)
+        if self.scopeCache is not None:
+            self.scopeCache.openModule(path)
+        if formatChecker is not None:
+            if linter.is_message_enabled('C0301'):
+                formatChecker.checkLineLengths(scan, tokens)
+            formatChecker.process_tokens(tokens)
+        commentChecker = self.getChecker(CommentChecker)
+        if commentChecker is not None:
+            commentChecker.process_tokens(tokens)
+
+        headerChecker = self.getChecker(HeaderChecker)
+        if headerChecker is not None:
+            for msgid in headerChecker.iterHeaderMessages(modname,
+                                                          scan.getHeader()):
+                self.reportNodeMessage(msgid, tree, modname, "")
+        if (linter.is_message_enabled('W9301') and checks.inTestModule
+                and sourceContainsTestCase(source)
+                and not modname.split(".")[-1].startswith("test_")):
+            self.reportNodeMessage('W9301', tree, modname, "")
+        checks.walk(tree)
+        return checks
+
+
+    def reportNodeMessage(self, msgid, node, modname, obj, line=None,
+                          args=None):
+        """
+        Report a message about a node.
+
+        @param msgid: identifier of the message
+        @param node: the node of the C{ast} module the message is about
+        @param modname: name of the module
+        @param obj: name of the object the node is in
+        @param line: line of the message, the one of the node by default
+        @param args: arguments of the message
+        """
+        if line is None:
+            line = _fromLineno(node)
+        self.reportMessage(msgid, line, getattr(node, "col_offset", 0),
+                           modname, obj, args)
+
+
+    def reportMessage(self, msgid, line, column, modname, obj, args=None):
+        """
+        Report a message about a node, like
+        L{pylint.lint.PyLinter.add_message} does for astroid nodes.
+
+        @param msgid: identifier of the message
+        @param line: line of the message
+        @param column: column of the node
+        @param modname: name of the module
+        @param obj: name of the object the node is in
+        @param args: arguments of the message
+        """
+        linter = self.linter
+        if not linter.is_message_enabled(msgid, line):
+            return
+        for definition in linter.msgs_store.get_message_definitions(msgid):
+            category = MSG_TYPES[definition.msgid[0]]
+            linter.msg_status |= MSG_TYPES_STATUS[definition.msgid[0]]
+            linter.stats[category] += 1
+            linter.stats["by_module"][linter.current_name][category] += 1
+            linter.stats["by_msg"][definition.symbol] = (
+                linter.stats["by_msg"].get(definition.symbol, 0) + 1)
+            msg = definition.msg
+            if args:
+                msg %= args
+            abspath = linter.current_file
+            path = abspath.replace(linter.reporter.path_strip_prefix, "", 1)
+            linter.reporter.handle_message(Message(
+                definition.msgid, definition.symbol,
+                (abspath, path, modname, obj, line or 1, column),
+                msg, UNDEFINED))
+
+
+
+__all__ = ["FAST_CHECKERS", "FastEngine", "collectBlockLines"]
@@ -0,0 +1,137 @@
+# -*- test-case-name: twistedchecker.test.test_fused -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+A checker running several astroid checkers in a single walk.
+"""
+
+from pylint.checkers import BaseChecker
+from pylint.interfaces import IAstroidChecker
+
+
+
+def _isMethodEnabled(linter, method):
+    """
+    Tell whether a visit or leave method should be called, like pylint's
+    walker does for methods decorated with C{check_messages}.
+
+    @param linter: the linter
+    @param method: a visit or leave method of a checker
+    @return: C{False} if all the messages the method can produce are
+        disabled
+    """
+    messages = getattr(method, "checks_msgs", None)
+    if messages is None:
+        return True
+    return any(linter.is_message_enabled(msgid) for msgid in messages)
+
+
+
+def _chain(handlers):
+    """
+    Make one handler calling several handlers in turn.
+
+    @param handlers: a list of callables taking a node
+    @return: a callable taking a node
+    """
+    if len(handlers) == 1:
+        # Nothing to chain, the walker calls the handler directly.
+        return handlers[0]
+
+    def handle(node):
+        for handler in handlers:
+            handler(node)
+    return handle
+
+
+
+class FusedChecker(BaseChecker):
+    """
+    A checker composed of several astroid checkers.
+
+    pylint's walker keeps, for each type of node, the list of the callbacks
+    of all checkers and calls them in turn. The fused checker is registered
+    in place of its members: when opened, it builds a dispatch table from
+    the node types to the enabled handlers of its members, and exposes a
+    single visit and leave method per node type.
+
+    The members stay known to pylint for their messages and options, they
+    are only removed from the checkers the linter walks with.
+
+    @ivar members: the checkers composing this one
+    @type members: L{list}
+    """
+    __implements__ = IAstroidChecker
+    name = 'fused'
+    options = ()
+
+    def __init__(self, linter, members):
+        """
+        Compose checkers.
+
+        @param linter: the linter
+        @param members: the astroid checkers to compose, in the order their
+            handlers are called
+        """
+        BaseChecker.__init__(self, linter)
+        self.members = list(members)
+        # The linter runs the checkers which may produce enabled messages.
+        self.msgs = {}
+        for member in self.members:
+            self.msgs.update(member.msgs)
+        self._handlerNames = []
+
+
+    def buildDispatchTable(self):
+        """
+        Find the enabled handlers of the members for each type of node.
+
+        @return: a 2-tuple of dictionaries from node type names to lists of
+            visit and leave handlers
+        @rtype: L{tuple}
+        """
+        visits = {}
+        leaves = {}
+        for member in self.members:
+            for attribute in dir(member):
+                if attribute.startswith("visit_"):
+                    table = visits
+                elif attribute.startswith("leave_"):
+                    table = leaves
+                else:
+                    continue
+                method = getattr(member, attribute)
+                if _isMethodEnabled(self.linter, method):
+                    nodeType = attribute.split("_", 1)[1]
+                    table.setdefault(nodeType, []).append(method)
+        return visits, leaves
+
+
+    def open(self):
+        """
+        Open the members and expose their handlers.
+        """
+        for member in self.members:
+            member.open()
+        for attribute in self._handlerNames:
+            delattr(self, attribute)
+        self._handlerNames = []
+        visits, leaves = self.buildDispatchTable()
+        for prefix, table in (("visit_", visits), ("leave_", leaves)):
+            for nodeType, handlers in table.items():
+                attribute = prefix + nodeType
+                setattr(self, attribute, _chain(handlers))
+                self._handlerNames.append(attribute)
+
+
+    def close(self):
+        """
+        Close the members.
+        """
+        for member in self.members:
+            member.close()
+
+
+
+__all__ = ["FusedChecker"]
@@ -0,0 +1,163 @@
+# -*- test-case-name: twistedchecker.test.test_gitstore -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Reading of the files of a git repository from its index and its object
+store, without touching the working tree.
+
+Pre-commit hooks must check the content about to be committed, which may
+differ from the working tree. The files added or modified in the index are
+listed with their blob identifiers by C{git diff-index}, and the blobs are
+read by a single C{git cat-file --batch} process.
+"""
+
+import os
+import subprocess
+
+
+# The identifier of the empty tree, to compare the index of a repository
+# without commits with.
+EMPTY_TREE = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
+# Modes of the entries of regular files.
+FILE_MODES = (b"100644", b"100755")
+
+
+
+class GitError(Exception):
+    """
+    A git command failed.
+    """
+
+
+
+def runGit(args, cwd=None):
+    """
+    Run a git command.
+
+    @param args: the arguments of the command
+    @param cwd: the directory to run it in, the working directory by
+        default
+    @return: its standard output
+    @rtype: L{bytes}
+    @raise GitError: if git can not be run or if the command fails
+    """
+    try:
+        process = subprocess.Popen(["git"] + list(args), cwd=cwd,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+    except OSError as e:
+        raise GitError("can not run git: %s" % (e,))
+    output, error = process.communicate()
+    if process.returncode:
+        raise GitError(error.decode("utf-8", "replace").strip()
+                       or "git %s failed" % (args[0],))
+    return output
+
+
+
+def getRepositoryRoot(directory=None):
+    """
+    Get the root of the working tree of the repository of a directory.
+
+    @param directory: the directory, the working directory by default
+    @return: the absolute path of the root
+    @raise GitError: if the directory is not in a repository
+    """
+    output = runGit(["rev-parse", "--show-toplevel"], cwd=directory)
+    return os.fsdecode(output.rstrip(b"\n"))
+
+
+
+def iterStagedBlobs(root, pathspecs=()):
+    """
+    Yield the regular files added or modified in the index, compared with
+    the last commit.
+
+    @param root: the root of the working tree
+    @param pathspecs: the paths to restrict the files to, relative to the
+        working directory, all the files by default
+    @return: an iterator of pairs of the path of a file relative to the
+        root and of the identifier of its staged blob
+    @raise GitError: if the index can not be read
+    """
+    try:
+        runGit(["rev-parse", "--verify", "--quiet", "HEAD"], cwd=root)
+        base = "HEAD"
+    except GitError:
+        # No commit yet.
+        base = EMPTY_TREE
+    # The paths of the output are relative to the root, the pathspecs to
+    # the working directory.
+    output = runGit(["diff-index", "--cached", "--no-renames", "-z",
+                     "--diff-filter=AM", base, "--"] + list(pathspecs))
+    fields = output.split(b"\0")
+    for position in range(0, len(fields) - 1, 2):
+        status, path = fields[position], fields[position + 1]
+        _, newMode, _, newBlob, _ = status.lstrip(b":").split(b" ")
+        if newMode in FILE_MODES:
+            yield os.fsdecode(path), newBlob.decode("ascii")
+
+
+
+class BlobReader(object):
+    """
+    Read blobs from the object store of a repository through a single
+    C{git cat-file --batch} process.
+
+    @ivar root: the root of the working tree
+    """
+
+    def __init__(self, root):
+        """
+        @param root: the root of the working tree
+        """
+        self.root = root
+        self._process = None
+
+
+    def read(self, blob):
+        """
+        Read a blob.
+
+        @param blob: the identifier of the blob
+        @return: its content
+        @rtype: L{bytes}
+        @raise GitError: if the blob is not in the object store
+        """
+        if self._process is None:
+            try:
+                self._process = subprocess.Popen(
+                    ["git", "cat-file", "--batch"], cwd=self.root,
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            except OSError as e:
+                raise GitError("can not run git: %s" % (e,))
+        process = self._process
+        process.stdin.write(blob.encode("ascii") + b"\n")
+        process.stdin.flush()
+        header = process.stdout.readline()
+        fields = header.split()
+        if len(fields) != 3:
+            raise GitError("can not read blob %s" % (blob,))
+        content = process.stdout.read(int(fields[2]))
+        # The content is followed by a new line.
+        process.stdout.read(1)
+        return content
+
+
+    def close(self):
+        """
+        Stop the git process.
+        """
+        if self._process is None:
+            return
+        self._process.stdin.close()
+        self._process.stdout.close()
+        self._process.wait()
+        self._process = None
+
+
+
+__all__ = ["BlobReader", "EMPTY_TREE", "GitError", "getRepositoryRoot",
+           "iterStagedBlobs", "runGit"]
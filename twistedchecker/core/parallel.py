@@ -0,0 +1,658 @@
+# -*- test-case-name: twistedchecker.test.test_parallel -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Check modules with a pool of worker processes.
+
+pylint's own parallel mode starts linters configured from its options only,
+without the checkers and the name exceptions of twistedchecker. Here the
+workers are forked from the configured runner instead, and check one module
+at a time. They are forked by a fork server, itself forked from the runner
+before any module is checked, so that every worker starts from the same
+state, without importing or configuring anything, and shares the pages of
+the server copy-on-write.
+
+Modules are handed out by decreasing cost, the time their last check took,
+so that the most expensive modules start first. A worker gets the next
+module as soon as it is idle, so no module waits behind another in the
+queue of a busy worker. The messages of the workers are reported by the
+parent process in the order of the modules, like a serial run does.
+
+A module whose check kills its worker, or takes longer than the time
+budget of a module, is reported with a fatal message and skipped, and the
+run goes on with a fresh worker.
+"""
+
+import gc
+import multiprocessing
+import os
+import resource
+import signal
+import socket
+import struct
+import sys
+import time
+import traceback
+
+from multiprocessing.connection import Connection, wait
+from multiprocessing.reduction import recvfds, sendfds
+
+from pylint.checkers import BaseChecker
+from pylint.lint import _get_new_args, _merge_stats
+from pylint.message import Message
+from pylint.utils import FileState
+
+
+
+class WorkerFailureChecker(BaseChecker):
+    """
+    The messages reported for the modules whose check failed in a worker.
+
+    It checks nothing itself: only its messages are registered, the parent
+    process of a parallel run reporting them.
+    """
+    msgs = {
+        'F9801': ('Checking the module took longer than %s seconds',
+                  'Used when the check of a module takes longer than the '
+                  'time given by --timeout. The module is skipped.',
+                  'module-timeout'),
+        'F9802': ('Checking the module killed its worker',
+                  'Used when the worker process checking a module dies. '
+                  'The module is skipped.',
+                  'worker-crash'),
+    }
+    name = 'parallel'
+    options = ()
+
+
+
+def canFork():
+    """
+    Tell whether worker processes can be forked.
+    """
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+
+def getJobCount(jobs):
+    """
+    Get the number of worker processes to use.
+
+    @param jobs: the value of the C{jobs} option, C{0} to use one worker
+        per CPU
+    @return: a number of workers, C{1} if workers can not be forked
+    """
+    if not canFork():
+        return 1
+    if jobs > 0:
+        return jobs
+    return os.cpu_count() or 1
+
+
+
+def getResidentSetSize():
+    """
+    Get the resident set size of the current process.
+
+    @return: a number of bytes, the peak resident set size if the current
+        one is unknown
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize()
+    except (IOError, OSError, IndexError, ValueError):
+        pass
+    maxRSS = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return maxRSS
+    # Kilobytes everywhere else.
+    return maxRSS * 1024
+
+
+
+def _checkModule(runner, descr):
+    """
+    Check a single module in a worker, recording what it reports.
+
+    @param runner: the configured runner
+    @type runner: L{twistedchecker.core.runner.Runner}
+    @param descr: the description of the module given by
+        L{pylint.lint.PyLinter.expand_files}
+    @return: a C{dict} with the arguments of the C{messages} reported, the
+        C{stats} and the C{status} of the linter, the C{seconds} taken, the
+        C{rss} of the worker afterwards, and the entries of the module in
+        the caches
+    """
+    linter = runner.linter
+    messages = []
+    # Messages can not be pickled, their arguments can.
+    linter.reporter.handle_message = (
+        lambda msg: messages.append(_get_new_args(msg)))
+    # The module is already resolved, check it and only it.
+    linter.expand_files = lambda modules: [descr]
+    linter.msg_status = 0
+    start = time.time()
+    runner.checkModules([descr["path"]])
+    result = {"messages": messages, "stats": linter.stats,
+              "status": linter.msg_status,
+              "seconds": time.time() - start,
+              "rss": getResidentSetSize()}
+    if runner.scopeCache is not None:
+        result["scopes"] = runner.scopeCache.getModuleEntries(descr["path"])
+    if runner.resultCache is not None:
+        result["result"] = runner.resultCache.getModuleEntry(descr["path"])
+    return result
+
+
+
+def _work(runner, connection):
+    """
+    Check the modules received from the parent process until told to stop.
+
+    @param runner: the configured runner
+    @type runner: L{twistedchecker.core.runner.Runner}
+    @param connection: the connection to the parent process, receiving
+        descriptions of modules and C{None} to stop
+    """
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    # The parent process persists the caches.
+    for cache in (runner.scopeCache, runner.resultCache):
+        if cache is not None:
+            cache.cacheDir = None
+    while True:
+        descr = connection.recv()
+        if descr is None:
+            break
+        connection.send(_checkModule(runner, descr))
+    connection.close()
+
+
+
+def _runChild(function, *args):
+    """
+    Run a function in a forked process, and exit the process without
+    returning to the code of its parent.
+
+    @param function: the function to run
+    @param args: the arguments of the function
+    """
+    status = 1
+    try:
+        function(*args)
+        status = 0
+    except Exception:
+        traceback.print_exc()
+    finally:
+        os._exit(status)
+
+
+
+def _receive(sock, size):
+    """
+    Receive an exact number of bytes from a socket.
+
+    @param sock: the socket
+    @param size: the number of bytes
+    @return: the bytes received
+    @raise EOFError: if the socket is closed before
+    """
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise EOFError
+        data += chunk
+    return data
+
+
+
+def _serve(runner, sock):
+    """
+    Fork a worker each time one is requested, until the parent process
+    closes its end of the socket.
+
+    The connection to each worker is sent to the parent, followed by the
+    process identifier of the worker.
+
+    @param runner: the configured runner
+    @type runner: L{twistedchecker.core.runner.Runner}
+    @param sock: the socket connected to the parent process
+    """
+    # Let the workers be reaped without waiting for them.
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    while sock.recv(1):
+        parentEnd, workerEnd = socket.socketpair()
+        pid = os.fork()
+        if pid == 0:
+            sock.close()
+            parentEnd.close()
+            _runChild(_work, runner, Connection(workerEnd.detach()))
+        workerEnd.close()
+        sendfds(sock, [parentEnd.fileno()])
+        parentEnd.close()
+        sock.sendall(struct.pack("!i", pid))
+
+
+
+class ForkServer(object):
+    """
+    A process forked from the configured runner before any module is
+    checked, forking the workers.
+
+    The objects of the runner are frozen with L{gc.freeze} when the server
+    is forked, so that the garbage collections of the workers ignore them
+    and do not write to their pages, which stay shared between all the
+    processes.
+
+    @ivar pid: the process identifier of the server
+    """
+
+    def __init__(self, runner):
+        """
+        Fork the server.
+
+        @param runner: the configured runner
+        @type runner: L{twistedchecker.core.runner.Runner}
+        """
+        self._socket, serverSocket = socket.socketpair()
+        # gc.freeze is new in Python 3.7.
+        if hasattr(gc, "freeze"):
+            gc.freeze()
+        pid = os.fork()
+        if pid == 0:
+            self._socket.close()
+            _runChild(_serve, runner, serverSocket)
+        if hasattr(gc, "unfreeze"):
+            gc.unfreeze()
+        serverSocket.close()
+        self.pid = pid
+
+
+    def startWorker(self):
+        """
+        Fork a worker process.
+
+        @return: a 2-tuple of the process identifier of the worker and of
+            the connection to it
+        """
+        self._socket.sendall(b"F")
+        fd = recvfds(self._socket, 1)[0]
+        pid = struct.unpack("!i", _receive(self._socket, 4))[0]
+        return pid, Connection(fd)
+
+
+    def close(self):
+        """
+        Stop the server, once the workers it forked are told to stop.
+        """
+        self._socket.close()
+        os.waitpid(self.pid, 0)
+
+
+
+class _Worker(object):
+    """
+    A worker process, seen from the parent process.
+
+    @ivar pid: the process identifier of the worker
+    @ivar connection: the connection to the worker
+    @ivar checked: the number of modules the worker checked
+    @ivar index: the index of the module being checked, or C{None}
+    @ivar started: when the worker was given the module being checked
+    """
+
+    def __init__(self, pid, connection):
+        """
+        @param pid: the process identifier of the worker
+        @param connection: the connection to the worker
+        """
+        self.pid = pid
+        self.connection = connection
+        self.checked = 0
+        self.index = None
+        self.started = None
+
+
+    def send(self, modules, index):
+        """
+        Give a module to check to the worker.
+
+        @param modules: a list of descriptions of modules
+        @param index: the index of the module in C{modules}
+        """
+        self.index = index
+        self.started = time.time()
+        self.connection.send(modules[index])
+
+
+    def receive(self):
+        """
+        Receive the result of the module being checked.
+
+        @return: a 2-tuple of the index of the module and of its result,
+            describing a C{failure} if the worker died
+        """
+        index = self.index
+        try:
+            result = self.connection.recv()
+        except (EOFError, OSError):
+            result = self.fail("F9802")
+        else:
+            self.index = None
+            self.checked += 1
+        return index, result
+
+
+    def fail(self, msgid, *args):
+        """
+        Give up on the module being checked.
+
+        @param msgid: the identifier of the message reporting the failure
+        @param args: the arguments of the message
+        @return: the result of the module, describing the C{failure}
+        """
+        self.index = None
+        return {"failure": (msgid, args),
+                "seconds": time.time() - self.started}
+
+
+    def kill(self):
+        """
+        Kill the worker.
+        """
+        try:
+            os.kill(self.pid, signal.SIGKILL)
+        except OSError:
+            # It is already dead.
+            pass
+        self.connection.close()
+
+
+    def stop(self):
+        """
+        Tell the worker to exit once idle.
+        """
+        try:
+            self.connection.send(None)
+        except OSError:
+            # It is already dead.
+            pass
+        self.connection.close()
+
+
+
+class ParallelChecker(object):
+    """
+    Check modules with worker processes forked from a configured runner.
+
+    astroid caches every module it builds for the life of the process, so
+    workers are replaced by fresh ones after checking a number of modules
+    or once their memory grows past a limit.
+
+    @ivar runner: the configured runner
+    @type runner: L{twistedchecker.core.runner.Runner}
+    @ivar jobs: the number of worker processes
+    @ivar timings: the time taken by previous checks of modules
+    @type timings: L{TimingHistory}
+    @ivar maxModules: the number of modules after which a worker is
+        replaced, C{0} for no limit
+    @ivar maxRSS: the resident set size, in bytes, past which a worker is
+        replaced, C{0} for no limit
+    @ivar timeout: the number of seconds after which the check of a module
+        is given up, C{0} for no limit
+    @ivar replacedWorkers: the number of workers replaced
+    """
+
+    def __init__(self, runner, jobs, timings, maxModules=0, maxRSS=0,
+                 timeout=0):
+        """
+        Prepare to check modules.
+
+        @param runner: the configured runner
+        @type runner: L{twistedchecker.core.runner.Runner}
+        @param jobs: the number of worker processes
+        @param timings: the time taken by previous checks of modules
+        @type timings: L{TimingHistory}
+        @param maxModules: the number of modules after which a worker is
+            replaced, C{0} for no limit
+        @param maxRSS: the resident set size, in bytes, past which a worker
+            is replaced, C{0} for no limit
+        @param timeout: the number of seconds after which the check of a
+            module is given up, C{0} for no limit
+        """
+        self.runner = runner
+        self.jobs = jobs
+        self.timings = timings
+        self.maxModules = maxModules
+        self.maxRSS = maxRSS
+        self.timeout = timeout
+        self.replacedWorkers = 0
+        self._forkServer = None
+        self._workers = {}
+        self._modules = []
+        self._pending = []
+        self._results = {}
+
+
+    def getModules(self, filesOrModules):
+        """
+        Resolve the modules to check.
+
+        @param filesOrModules: names of the files and modules to check
+        @return: a list of descriptions of modules given by
+            L{pylint.lint.PyLinter.expand_files}
+        """
+        linter = self.runner.linter
+        return [descr for descr in linter.expand_files(filesOrModules)
+                if linter.should_analyze_file(descr["name"], descr["path"],
+                                              is_argument=descr["isarg"])]
+
+
+    def schedule(self, modules):
+        """
+        Order modules by decreasing cost.
+
+        @param modules: a list of descriptions of modules
+        @return: a list of indexes in C{modules}
+        """
+        costs = [self.timings.getCost(descr["path"]) for descr in modules]
+        return sorted(range(len(modules)), key=lambda index: -costs[index])
+
+
+    def check(self, filesOrModules):
+        """
+        Check modules, like L{pylint.lint.PyLinter.check}.
+
+        @param filesOrModules: names of the files and modules to check
+        """
+        linter = self.runner.linter
+        linter.open()
+        modules = self._modules = self.getModules(filesOrModules)
+        self._pending = self.schedule(modules)
+        self._pending.reverse()
+        self._forkServer = ForkServer(self.runner)
+        self._workers = {}
+        results = self._results = {}
+        for _ in range(min(self.jobs, len(modules))):
+            self.next(self.startWorker())
+
+        reported = 0
+        allStats = [linter.stats]
+        while True:
+            # Report in the order of the modules.
+            while reported in results:
+                allStats.append(self.report(modules[reported],
+                                            results.pop(reported)))
+                reported += 1
+            busy = [worker for worker in self._workers.values()
+                    if worker.index is not None]
+            if not busy:
+                break
+            ready = wait([worker.connection for worker in busy],
+                         self.getWaitTimeout(busy))
+            for connection in ready:
+                worker = self._workers[connection]
+                index, results[index] = worker.receive()
+                self.next(worker, results[index])
+            for worker in self.getExpiredWorkers(busy):
+                index = worker.index
+                results[index] = worker.fail("F9801", self.timeout)
+                self.next(worker, results[index])
+
+        for worker in self._workers.values():
+            worker.stop()
+        self._workers = {}
+        self._forkServer.close()
+        linter.stats = _merge_stats(allStats)
+        for checker in linter.get_checkers():
+            if checker is not linter:
+                checker.stats = linter.stats
+        self.timings.save()
+        for cache in (self.runner.scopeCache, self.runner.resultCache):
+            if cache is not None:
+                cache.save()
+
+
+    def startWorker(self):
+        """
+        Start a worker from the fork server.
+
+        @return: the worker
+        @rtype: L{_Worker}
+        """
+        worker = _Worker(*self._forkServer.startWorker())
+        self._workers[worker.connection] = worker
+        return worker
+
+
+    def next(self, worker, result=None):
+        """
+        Give the next pending module to an idle worker, replacing it first
+        if it failed or is exhausted.
+
+        A worker which can not be sent the module died while idle: it is
+        replaced and the module is sent to the fresh worker, and reported by
+        F9802 if that one can not be sent it either.
+
+        @param worker: the worker
+        @type worker: L{_Worker}
+        @param result: the result of the last module it checked, or
+            C{None} if it is a new worker
+        """
+        if result is not None:
+            if "failure" in result:
+                self.discardWorker(worker)
+                worker = None
+            elif self.isExhausted(worker, result):
+                del self._workers[worker.connection]
+                worker.stop()
+                self.replacedWorkers += 1
+                worker = None
+        while self._pending:
+            index = self._pending.pop()
+            for _ in range(2):
+                if worker is None:
+                    worker = self.startWorker()
+                try:
+                    worker.send(self._modules, index)
+                except OSError:
+                    result = worker.fail("F9802")
+                    self.discardWorker(worker)
+                    worker = None
+                else:
+                    return
+            self._results[index] = result
+
+
+    def discardWorker(self, worker):
+        """
+        Kill a worker which failed.
+
+        @param worker: the worker
+        @type worker: L{_Worker}
+        """
+        del self._workers[worker.connection]
+        worker.kill()
+
+
+    def getWaitTimeout(self, busy):
+        """
+        Get how long to wait for results before giving up on a module.
+
+        @param busy: the workers checking a module
+        @return: a number of seconds, or C{None} to wait for ever
+        """
+        if not self.timeout:
+            return None
+        started = min(worker.started for worker in busy)
+        return max(0, started + self.timeout - time.time())
+
+
+    def getExpiredWorkers(self, busy):
+        """
+        Get the workers checking a module for longer than allowed.
+
+        @param busy: the workers which were checking a module
+        @return: a list of workers
+        """
+        if not self.timeout:
+            return []
+        now = time.time()
+        return [worker for worker in busy
+                if worker.index is not None
+                and now - worker.started >= self.timeout]
+
+
+    def isExhausted(self, worker, result):
+        """
+        Tell whether a worker should be replaced by a fresh one.
+
+        @param worker: the worker
+        @type worker: L{_Worker}
+        @param result: the result of the last module it checked
+        @return: C{True} if the worker checked the maximum number of
+            modules or uses more memory than allowed
+        """
+        if self.maxModules and worker.checked >= self.maxModules:
+            return True
+        return bool(self.maxRSS and result["rss"] > self.maxRSS)
+
+
+    def report(self, descr, result):
+        """
+        Report the messages of a module checked by a worker, and record
+        its timing and its entries in the caches.
+
+        A module whose check failed is reported by the message describing
+        the failure only.
+
+        @param descr: the description of the module
+        @param result: the result of L{_checkModule}, or the one of a
+            failure given by L{_Worker.fail}
+        @return: the statistics of the module
+        """
+        linter = self.runner.linter
+        linter.set_current_module(descr["name"], descr["path"])
+        self.timings.record(descr["path"], result["seconds"])
+        if "failure" in result:
+            msgid, args = result["failure"]
+            linter.file_state = FileState(descr["name"])
+            linter.add_message(msgid, args=args or None)
+            return {}
+        for args in result["messages"]:
+            linter.reporter.handle_message(Message(*args))
+        linter.msg_status |= result["status"]
+        if self.runner.scopeCache is not None:
+            self.runner.scopeCache.setModuleEntries(descr["path"],
+                                                    result["scopes"])
+        if (self.runner.resultCache is not None
+                and result["result"] is not None):
+            self.runner.resultCache.set(descr["path"], result["result"])
+        return result["stats"]
+
+
+
+__all__ = ["WorkerFailureChecker", "ForkServer", "ParallelChecker",
+           "canFork", "getJobCount"]
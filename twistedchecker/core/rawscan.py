@@ -0,0 +1,164 @@
+# -*- test-case-name: twistedchecker.test.test_rawscan -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+A single pass scanner over the raw source of modules.
+
+The header and line length checks both need to look at the raw bytes of a
+module. Instead of each of them reading the file and running its own
+regular expressions over the whole text, the source is scanned once and
+every checker consumes the results of that scan. Comments are checked from
+the tokens of the module instead.
+"""
+
+import mmap
+import weakref
+
+from array import array
+
+
+# Files from this size are mapped in memory instead of being read.
+MMAP_THRESHOLD = 1024 * 1024
+
+_scans = weakref.WeakKeyDictionary()
+
+
+
+class RawScan(object):
+    """
+    Results of scanning the raw source of a module.
+
+    @ivar lineOffsets: offset of the start of every line in the source
+    @type lineOffsets: L{array}
+
+    @ivar headerLines: a list of C{(linenum, line)} tuples for the comment
+        and blank lines at the top of the module
+    @type headerLines: L{list}
+
+    @ivar maxLineLength: the line length above which lines are long, or
+        C{None} if long lines were not looked for
+    @type maxLineLength: L{int}
+
+    @ivar longLines: a list of C{(linenum, length, hasURL)} tuples for every
+        line longer than C{maxLineLength} characters
+    @type longLines: L{list}
+    """
+
+    def __init__(self, maxLineLength=None):
+        """
+        Initialize empty results.
+
+        @param maxLineLength: the line length above which lines are long
+        """
+        self.lineOffsets = array("L")
+        self.headerLines = []
+        self.maxLineLength = maxLineLength
+        self.longLines = []
+
+
+    def getHeader(self):
+        """
+        Get the header of the module.
+
+        @return: the comment and blank lines at the top of the module
+        @rtype: L{bytes}
+        """
+        return b"\n".join(line for _, line in self.headerLines)
+
+
+
+def scanSource(source, maxLineLength=None, encoding="utf-8"):
+    """
+    Scan the raw source of a module in one pass.
+
+    @param source: the source, as L{bytes} or as a L{mmap.mmap}
+    @param maxLineLength: the line length above which lines are long, or
+        C{None} to not look for long lines
+    @param encoding: encoding of the source, used to count the characters
+        of lines having more bytes than C{maxLineLength}
+    @return: the results of the scan
+    @rtype: L{RawScan}
+    """
+    scan = RawScan(maxLineLength)
+    inHeader = True
+    size = len(source)
+    start = 0
+    linenum = 0
+    while start < size:
+        linenum += 1
+        scan.lineOffsets.append(start)
+        end = source.find(b"\n", start)
+        if end == -1:
+            end = size
+        line = source[start:end].rstrip(b"\r")
+        start = end + 1
+
+        if inHeader:
+            if not line.strip() or line.lstrip().startswith(b"#"):
+                scan.headerLines.append((linenum, line))
+            else:
+                inHeader = False
+
+        if maxLineLength is not None and len(line) > maxLineLength:
+            # A line can not have more characters than bytes, so only lines
+            # with too many bytes need to be decoded.
+            text = line.decode(encoding, "replace")
+            if len(text) > maxLineLength:
+                scan.longLines.append(
+                    (linenum, len(text),
+                     "http://" in text or "https://" in text))
+    return scan
+
+
+
+def _readModule(node):
+    """
+    Get the raw source of a module.
+
+    @param node: node of a module
+    @return: the source as L{bytes}, or mapped in memory for big files
+    """
+    if node.file_bytes is not None:
+        source = node.file_bytes
+        if not isinstance(source, bytes):
+            source = source.encode(node.file_encoding or "utf-8")
+        return source
+    with open(node.file, "rb") as f:
+        try:
+            if f.seek(0, 2) >= MMAP_THRESHOLD:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            pass
+        f.seek(0)
+        return f.read()
+
+
+
+def scanModule(node, maxLineLength=None):
+    """
+    Get the scan of the raw source of a module, scanning it only once for
+    all the checkers using it.
+
+    @param node: node of a module
+    @param maxLineLength: the line length above which lines are long, or
+        C{None} if the caller does not need long lines
+    @return: the results of the scan
+    @rtype: L{RawScan}
+    """
+    scan = _scans.get(node)
+    if scan is not None and maxLineLength in (None, scan.maxLineLength):
+        return scan
+    source = _readModule(node)
+    try:
+        scan = scanSource(source, maxLineLength,
+                          node.file_encoding or "utf-8")
+    finally:
+        if isinstance(source, mmap.mmap):
+            source.close()
+    _scans[node] = scan
+    return scan
+
+
+
+__all__ = ["RawScan", "scanSource", "scanModule"]
@@ -0,0 +1,304 @@
+# -*- test-case-name: twistedchecker.test.test_resolver -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+A persistent cache of the files of modules given by their dotted names.
+
+astroid finds the file of a module by searching every entry of
+C{sys.path}, and every package on the way, with the import machinery,
+which lists directories again for each name. The resolver searches the
+same directories the same way, listing each directory once for all the
+names resolved, and keeps the files found in the cache directory along
+with the modification times of the directories and files which decided
+them. A file found by a previous run is used for as long as none of them
+changed.
+
+Only modules and regular packages found as source files in directories
+are resolved this way. Builtin, compiled and namespace modules, modules in
+zip files and packages extending their path are left to astroid.
+"""
+
+import os
+import sys
+
+from importlib.machinery import EXTENSION_SUFFIXES, FrozenImporter
+from tokenize import detect_encoding
+
+from astroid.modutils import file_from_modpath
+
+from twistedchecker.core.cache import loadCache, saveCache
+
+
+# Names astroid resolves in its own way.
+_SPECIAL_NAMES = ("xml", "distutils", "os")
+
+# Markers of packages extending their path to other directories, like
+# astroid looks for them.
+_NAMESPACE_MARKERS = [(b"pkgutil", b"extend_path"),
+                      (b"pkg_resources", b"declare_namespace(__name__)")]
+
+
+
+class _Unresolved(Exception):
+    """
+    The module is not a plain module or package in a directory, astroid
+    has to find it.
+    """
+
+
+
+class ModuleResolver(object):
+    """
+    The files of modules, by dotted name.
+
+    Entries are C{dict}s with the C{path} of the file of the module and the
+    C{stamps} of the directories and files which decided it, their
+    modification times by absolute path.
+
+    @ivar cacheDir: the cache directory, or C{None}
+    @ivar hits: number of names resolved by the persisted entries
+    @ivar misses: number of names resolved by searching directories
+    """
+    cacheName = "modulepaths"
+
+    def __init__(self, cacheDir=None):
+        """
+        Load the entries persisted by previous runs.
+
+        @param cacheDir: the cache directory, or C{None} to not persist
+            the entries
+        """
+        self.cacheDir = cacheDir
+        content = loadCache(cacheDir, self.cacheName)
+        self._searchPath = content.get("searchPath")
+        self._entries = content.get("modules", {})
+        self._listings = {}
+        self._stamps = {}
+        self._changed = False
+        self.hits = 0
+        self.misses = 0
+
+
+    def getSearchPath(self):
+        """
+        Get the directories modules are searched in, which decide all the
+        entries.
+
+        @return: the entries of C{sys.path}, and the working directory
+            relative entries refer to
+        """
+        return [os.getcwd()] + list(sys.path)
+
+
+    def getStamp(self, path):
+        """
+        Get the modification time of a file or a directory, once per run.
+
+        @param path: the absolute path
+        @return: the modification time, or C{None} if it does not exist
+        """
+        if path not in self._stamps:
+            try:
+                self._stamps[path] = os.stat(path).st_mtime
+            except OSError:
+                self._stamps[path] = None
+        return self._stamps[path]
+
+
+    def listDirectory(self, directory, stamps):
+        """
+        List a directory, once per run.
+
+        @param directory: the path of the directory, relative to the
+            working directory if not absolute
+        @param stamps: the stamps of the entry being resolved, updated
+            with the one of the directory
+        @return: the set of names in the directory, or C{None} if it is not
+            a directory
+        """
+        absolute = os.path.abspath(directory)
+        stamps[absolute] = self.getStamp(absolute)
+        if absolute not in self._listings:
+            try:
+                self._listings[absolute] = set(os.listdir(absolute))
+            except OSError:
+                self._listings[absolute] = None
+        return self._listings[absolute]
+
+
+    def findInDirectories(self, name, directories, stamps):
+        """
+        Find a module or a package in directories, like the C{imp} finder
+        astroid uses first.
+
+        @param name: the name of the module in its package
+        @param directories: the directories searched, in order
+        @param stamps: the stamps of the entry being resolved
+        @return: the path of the directory of the package, or of the
+            module file, and whether it is a package
+        @raise _Unresolved: if astroid has to find the module
+        """
+        for directory in directories:
+            names = self.listDirectory(directory or os.curdir, stamps)
+            if names is None:
+                if os.path.exists(directory or os.curdir):
+                    # A zip file.
+                    raise _Unresolved(name)
+                continue
+            if name in names:
+                packagePath = os.path.join(directory, name)
+                content = self.listDirectory(packagePath, stamps)
+                if content is not None:
+                    if "__init__.py" in content:
+                        return packagePath, True
+                    if "__init__.pyc" in content:
+                        raise _Unresolved(name)
+            for suffix in EXTENSION_SUFFIXES:
+                if name + suffix in names:
+                    raise _Unresolved(name)
+            if name + ".py" in names:
+                return os.path.join(directory, name + ".py"), False
+            if name + ".pyc" in names:
+                raise _Unresolved(name)
+        raise _Unresolved(name)
+
+
+    def isExtendingPath(self, packagePath, stamps):
+        """
+        Tell whether a package extends its path to directories of the same
+        name, like astroid checks it.
+
+        @param packagePath: the path of the directory of the package
+        @param stamps: the stamps of the entry being resolved, updated
+            with the one of the C{__init__.py} file
+        """
+        initPath = os.path.join(packagePath, "__init__.py")
+        stamps[os.path.abspath(initPath)] = self.getStamp(
+            os.path.abspath(initPath))
+        try:
+            with open(initPath, "rb") as f:
+                data = f.read(4096)
+        except IOError:
+            return True
+        return any(first in data and second in data
+                   for first, second in _NAMESPACE_MARKERS)
+
+
+    def search(self, modname):
+        """
+        Search the file of a module.
+
+        @param modname: the dotted name of the module
+        @return: an entry
+        @raise _Unresolved: if astroid has to find the module
+        """
+        parts = modname.split(".")
+        if (parts[0] in _SPECIAL_NAMES
+                or parts[0] in sys.builtin_module_names
+                or FrozenImporter.find_spec(parts[0]) is not None):
+            raise _Unresolved(modname)
+        stamps = {}
+        directories = list(sys.path)
+        for position, part in enumerate(parts):
+            path, isPackage = self.findInDirectories(part, directories,
+                                                     stamps)
+            if position == len(parts) - 1:
+                break
+            if not isPackage or self.isExtendingPath(path, stamps):
+                raise _Unresolved(modname)
+            directories = [path]
+        if isPackage:
+            path = os.path.join(path, "__init__.py")
+        elif not self.hasValidEncoding(path, stamps):
+            raise _Unresolved(modname)
+        return {"path": path, "stamps": stamps}
+
+
+    def hasValidEncoding(self, path, stamps):
+        """
+        Tell whether the encoding declared by a module file is known, the
+        import machinery failing to find modules declaring unknown ones.
+
+        @param path: the path of the module file
+        @param stamps: the stamps of the entry being resolved, updated
+            with the one of the file
+        """
+        stamps[os.path.abspath(path)] = self.getStamp(os.path.abspath(path))
+        try:
+            with open(path, "rb") as f:
+                detect_encoding(f.readline)
+        except (IOError, SyntaxError):
+            return False
+        return True
+
+
+    def isValid(self, entry):
+        """
+        Tell whether none of the directories and files deciding an entry
+        changed.
+
+        @param entry: the entry
+        """
+        return all(self.getStamp(path) == stamp
+                   for path, stamp in entry["stamps"].items())
+
+
+    def resolve(self, modnames):
+        """
+        Find the files of modules.
+
+        @param modnames: the dotted names of the modules
+        @return: a C{dict} of paths by name, for the modules found by the
+            resolver, the other ones are left to astroid
+        """
+        searchPath = self.getSearchPath()
+        if searchPath != self._searchPath:
+            self._searchPath = searchPath
+            self._entries = {}
+            self._changed = True
+        paths = {}
+        for modname in set(modnames):
+            entry = self._entries.get(modname)
+            if entry is not None and self.isValid(entry):
+                self.hits += 1
+            else:
+                try:
+                    entry = self.search(modname)
+                except _Unresolved:
+                    self._entries.pop(modname, None)
+                    continue
+                self.misses += 1
+                self._entries[modname] = entry
+                self._changed = True
+            paths[modname] = entry["path"]
+        return paths
+
+
+    def getModuleFile(self, modname):
+        """
+        Find the file of a module, like L{file_from_modpath}.
+
+        @param modname: the dotted name of the module
+        @return: the path of the file of the module
+        @raise ImportError: if the module can not be found
+        """
+        path = self.resolve([modname]).get(modname)
+        if path is None:
+            path = file_from_modpath(modname.split("."))
+        return path
+
+
+    def save(self):
+        """
+        Persist the entries in the cache directory.
+        """
+        if not self._changed:
+            return
+        saveCache(self.cacheDir, self.cacheName,
+                  {"searchPath": self._searchPath, "modules": self._entries})
+        self._changed = False
+
+
+
+__all__ = ["ModuleResolver"]
@@ -0,0 +1,407 @@
+# -*- test-case-name: twistedchecker.test.test_resultcache -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+A persistent cache of the messages reported for whole modules.
+
+The messages of a module do not only depend on its source. They also depend
+on the configuration, on the name exceptions found in all the checked
+modules and on the modules defining its base classes or imported by it.
+Each entry records the inputs it was computed from, and is only reused when
+all of them are unchanged, so that a change of one of them invalidates
+exactly the entries depending on it.
+"""
+
+import hashlib
+import json
+
+from pylint.constants import MSG_TYPES, MSG_TYPES_STATUS
+from pylint.interfaces import CONFIDENCE_LEVELS, UNDEFINED
+from pylint.message import Message
+
+from twistedchecker.core.cache import loadCache, saveCache
+
+
+# Bump this whenever a change of the checks changes the messages reported
+# for the same inputs.
+RESULT_CACHE_VERSION = 2
+
+_CONFIDENCES = dict((confidence.name, confidence)
+                    for confidence in CONFIDENCE_LEVELS)
+
+
+
+def _describeValue(value):
+    """
+    Describe a value which can not be serialized to JSON, like a compiled
+    regular expression.
+
+    @param value: the value
+    @return: a JSON serializable description
+    """
+    if hasattr(value, "pattern"):
+        return value.pattern
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    return repr(value)
+
+
+
+def getInputDigest(value):
+    """
+    Get the digest of an input of modules, like the values of options.
+
+    @param value: the input, JSON serializable but for regular expressions
+        and sets
+    @return: a hexadecimal digest
+    """
+    content = json.dumps([RESULT_CACHE_VERSION, value], sort_keys=True,
+                         default=_describeValue)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+
+def getOptionValues(checkers):
+    """
+    Get the values of the options of checkers.
+
+    @param checkers: the checkers
+    @return: a C{dict} mapping names of checkers to C{dict}s mapping the
+        names of their options to their values
+    """
+    values = {}
+    for checker in checkers:
+        options = values.setdefault(checker.name, {})
+        for name, _ in checker.options:
+            options[name] = getattr(checker.config, name.replace("-", "_"),
+                                    None)
+    return values
+
+
+
+def recordMessage(msg):
+    """
+    Describe a message like the entries of L{ResultCache} record it.
+
+    @param msg: the message
+    @type msg: L{pylint.message.Message}
+    @return: a list of the message identifier, symbol, module, object
+        name, line, column, text and name of the confidence
+    """
+    return [msg.msg_id, msg.symbol, msg.module, msg.obj, msg.line,
+            msg.column, msg.msg, msg.confidence.name]
+
+
+
+def replayMessages(linter, messages):
+    """
+    Report the messages recorded for the current module of a linter.
+
+    @param linter: the linter
+    @type linter: L{pylint.lint.PyLinter}
+    @param messages: the recorded messages, described by L{recordMessage}
+    """
+    abspath = linter.current_file
+    path = abspath.replace(linter.reporter.path_strip_prefix, "", 1)
+    for (msgid, symbol, module, obj, line, column, msg,
+         confidence) in messages:
+        category = MSG_TYPES[msgid[0]]
+        linter.msg_status |= MSG_TYPES_STATUS[msgid[0]]
+        linter.stats[category] += 1
+        linter.stats["by_module"][linter.current_name][category] += 1
+        linter.stats["by_msg"][symbol] = (
+            linter.stats["by_msg"].get(symbol, 0) + 1)
+        linter.reporter.handle_message(Message(
+            msgid, symbol, (abspath, path, module, obj, line, column),
+            msg, _CONFIDENCES.get(confidence, UNDEFINED)))
+
+
+
+class ResultCache(object):
+    """
+    The messages of modules, by module path.
+
+    Entries are C{dict}s with:
+        - the name of the C{module}, which messages depend on, like the
+          ones about test modules;
+        - the C{digest} of the source of the module;
+        - the digests of the C{configuration} inputs it depends on, by name
+          of input;
+        - the digests of the C{modules} it depends on, by module name, the
+          digest of a module which could not be found being C{None};
+        - its number of C{statements};
+        - its C{messages}, lists of message identifier, symbol, module,
+          object name, line, column, text and name of the confidence.
+
+    @ivar cacheDir: the cache directory, or C{None}
+    @ivar hits: number of entries reused
+    @ivar misses: number of entries missing or invalidated
+    """
+    cacheName = "results"
+
+    def __init__(self, cacheDir=None):
+        """
+        Load the entries persisted by previous runs.
+
+        @param cacheDir: the cache directory, or C{None} to not persist
+            the entries
+        """
+        self.cacheDir = cacheDir
+        self._entriesByPath = loadCache(cacheDir, self.cacheName)
+        self._changed = {}
+        self.hits = 0
+        self.misses = 0
+
+
+    def getKey(self, path):
+        """
+        Get the key of the entry of a module.
+
+        @param path: path of the module
+        @return: the key, the path itself
+        """
+        return path
+
+
+    def isValid(self, entry, modname, digest, configuration,
+                getModuleDigest):
+        """
+        Tell whether an entry was computed from the current inputs.
+
+        @param entry: the entry
+        @param modname: the current name of the module
+        @param digest: digest of the current source of the module
+        @param configuration: the digests of the current configuration
+            inputs, by name of input
+        @param getModuleDigest: a callable returning the current digest of
+            a module given its name
+        """
+        if entry.get("module") != modname or entry.get("digest") != digest:
+            return False
+        for name, value in entry["configuration"].items():
+            if configuration.get(name) != value:
+                return False
+        for modname, value in entry["modules"].items():
+            if getModuleDigest(modname) != value:
+                return False
+        return True
+
+
+    def get(self, path, modname, digest, configuration, getModuleDigest):
+        """
+        Get the entry of a module, if it is still valid.
+
+        @param path: path of the module
+        @param modname: the current name of the module
+        @param digest: digest of the current source of the module
+        @param configuration: the digests of the current configuration
+            inputs, by name of input
+        @param getModuleDigest: a callable returning the current digest of
+            a module given its name
+        @return: the entry, or C{None} if the module is not cached or if
+            any of the inputs of the entry changed
+        """
+        entry = self._entriesByPath.get(self.getKey(path))
+        if entry is None or not self.isValid(
+                entry, modname, digest, configuration, getModuleDigest):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+
+    def getModuleEntry(self, path):
+        """
+        Get the entry of a module without checking that it is still valid,
+        like it would be persisted.
+
+        @param path: path of the module
+        @return: the entry, or C{None} if the module is not cached
+        """
+        key = self.getKey(path)
+        return self._changed.get(key, self._entriesByPath.get(key))
+
+
+    def set(self, path, entry):
+        """
+        Record the entry of a module.
+
+        @param path: path of the module
+        @param entry: the entry
+        """
+        self._changed[self.getKey(path)] = entry
+
+
+    def save(self):
+        """
+        Persist the entries, replacing the ones of the modules checked
+        since the cache was loaded.
+        """
+        if not self._changed:
+            return
+        self._entriesByPath.update(self._changed)
+        self._changed = {}
+        saveCache(self.cacheDir, self.cacheName, self._entriesByPath)
+
+
+
+class LinterResultCache(object):
+    """
+    Report the messages recorded in a L{ResultCache} for the modules
+    checked by L{pylint.lint.PyLinter.check} whose inputs did not change,
+    without building their astroid trees, and record the messages of the
+    other ones.
+
+    Astroid infers names across imports, so the entries depend on the
+    imported modules and on the modules defining base classes, like the
+    ones of the fast engine checked with astroid.
+
+    @ivar linter: the linter
+    @type linter: L{pylint.lint.PyLinter}
+    @ivar resultCache: the cache of the messages of modules
+    @type resultCache: L{ResultCache}
+    @ivar classIndex: the index of classes telling which modules the
+        entries depend on
+    @type classIndex: L{twistedchecker.core.classindex.ClassIndex}
+    @ivar readSource: a callable returning the source of a module given
+        its path
+    @ivar configuration: the digests of the configuration inputs of
+        modules, with the C{"pylint"} digest of the enabled messages and
+        of the options of all checkers
+    """
+
+    def __init__(self, linter, resultCache, classIndex, readSource):
+        """
+        @param linter: the linter, with its checkers pruned
+        @param resultCache: the cache of the messages of modules
+        @param classIndex: the index of classes
+        @param readSource: a callable returning the source of a module
+            given its path, raising L{IOError} if it can not be read, or
+            C{None} to read the files of modules
+        """
+        self.linter = linter
+        self.resultCache = resultCache
+        self.classIndex = classIndex
+        if readSource is None:
+            readSource = self.readFile
+        self.readSource = readSource
+        checkers = [checker for checker in linter.get_checkers()
+                    if checker is not linter]
+        # The messages which can not be emitted by this version of python
+        # are only disabled by the first check of the linter.
+        enabled = sorted(msg.msgid for msg in linter.msgs_store.messages
+                         if linter.is_message_enabled(msg.msgid)
+                         and msg.may_be_emitted())
+        self.configuration = {
+            "pylint": getInputDigest([enabled, getOptionValues(checkers)])}
+        self._pending = None
+
+
+    def readFile(self, path):
+        """
+        Read the source of a module from its file.
+
+        @param path: path of the module
+        @return: the source
+        @rtype: L{bytes}
+        @raise IOError: if the file can not be read
+        """
+        with open(path, "rb") as f:
+            return f.read()
+
+
+    def getCachedAST(self, getAST, filepath, modname):
+        """
+        Report the messages recorded for a module if none of its inputs
+        changed, or get its astroid tree and start recording its messages.
+
+        @param getAST: the original L{pylint.lint.PyLinter.get_ast}
+        @param filepath: path of the module
+        @param modname: name of the module
+        @return: the astroid tree, or C{None} if the module is not to be
+            checked
+        """
+        try:
+            source = self.readSource(filepath)
+        except IOError:
+            # Reported when building the tree.
+            return getAST(filepath, modname)
+        digest = hashlib.sha1(source).hexdigest()
+        entry = self.resultCache.get(filepath, modname, digest,
+                                     self.configuration,
+                                     self.classIndex.getModuleDigest)
+        if entry is not None:
+            replayMessages(self.linter, entry["messages"])
+            self.linter.stats["by_module"][modname]["statement"] = (
+                entry["statements"])
+            return None
+        self._pending = (filepath, modname, digest, [])
+        return getAST(filepath, modname)
+
+
+    def finishModule(self):
+        """
+        Record the entry of the module whose messages are being recorded.
+        """
+        if self._pending is None:
+            return
+        filepath, modname, digest, messages = self._pending
+        self._pending = None
+        packageName = modname
+        if packageName.endswith(".__init__"):
+            # Like astroid, name packages without their __init__.
+            packageName = packageName[:-len(".__init__")]
+        dependencies = self.classIndex.getModuleDependencies(packageName)
+        self.resultCache.set(filepath, {
+            "module": modname,
+            "digest": digest,
+            "configuration": self.configuration,
+            "modules": dict((dependency,
+                             self.classIndex.getModuleDigest(dependency))
+                            for dependency in dependencies),
+            "statements": self.linter.stats["by_module"].get(
+                self.linter.current_name, {}).get("statement", 0),
+            "messages": messages,
+            })
+
+
+    def install(self):
+        """
+        Check modules through the result cache.
+
+        @return: a callable recording the last module checked and
+            restoring the linter
+        """
+        linter = self.linter
+        reporter = linter.reporter
+        getAST = linter.get_ast
+        setCurrentModule = linter.set_current_module
+        handleMessage = reporter.handle_message
+
+        def cachedGetAST(filepath, modname):
+            return self.getCachedAST(getAST, filepath, modname)
+
+        def finishingSetCurrentModule(*args, **kwargs):
+            self.finishModule()
+            return setCurrentModule(*args, **kwargs)
+
+        def recordingHandleMessage(msg):
+            if self._pending is not None:
+                self._pending[3].append(recordMessage(msg))
+            handleMessage(msg)
+        linter.get_ast = cachedGetAST
+        linter.set_current_module = finishingSetCurrentModule
+        reporter.handle_message = recordingHandleMessage
+
+        def uninstall():
+            self.finishModule()
+            linter.get_ast = getAST
+            linter.set_current_module = setCurrentModule
+            reporter.handle_message = handleMessage
+        return uninstall
+
+
+
+__all__ = ["LinterResultCache", "ResultCache", "getInputDigest",
+           "getOptionValues", "recordMessage", "replayMessages"]
@@ -6,15 +6,47 @@ import sys
 import os
 import re
 
-from astroid.modutils import file_from_modpath
 from pylint.checkers.base import NameChecker
+from pylint.checkers.format import FormatChecker
+from pylint.interfaces import IAstroidChecker, implements
 from pylint.lint import PyLinter
 
 from twisted.python.compat import NativeStringIO
 
 import twistedchecker
-from twistedchecker.checkers import patch_pylint_format
-from twistedchecker.core.exceptionfinder import findAllExceptions
+from twistedchecker.core.archives import (ArchiveError, getArchiveModuleName,
+                                          isArchive, iterArchiveFiles)
+from twistedchecker.core.astroidcache import installModuleCache
+from twistedchecker.core.audit import (BlobResultCache, CommitSources,
+                                       HistoryAudit, iterCommits)
+from twistedchecker.core.cache import getCacheDirectory
+from twistedchecker.core.classindex import ClassIndex
+from twistedchecker.core.discovery import (FileList, isBlacklisted,
+                                           iterArguments, iterModules,
+                                           resolveArguments)
+from twistedchecker.core.exceptionfinder import (ExceptionCache,
+                                                 findAllExceptions,
+                                                 findSourceExceptions)
+from twistedchecker.core.fastengine import FastEngine
+from twistedchecker.core.fused import FusedChecker
+from twistedchecker.core.gitstore import (BlobReader, GitError,
+                                          getRepositoryRoot, iterStagedBlobs)
+from twistedchecker.core.parallel import (ParallelChecker,
+                                          WorkerFailureChecker, canFork,
+                                          getJobCount)
+from twistedchecker.core.resolver import ModuleResolver
+from twistedchecker.core.resultcache import LinterResultCache, ResultCache
+from twistedchecker.core.scopecache import ScopeCache
+from twistedchecker.core.shard import (ORDER_ERRORS, ORDER_MODULES,
+                                       ORDER_OTHERS, getCostShards,
+                                       getHashShard, loadPartialResult,
+                                       mergePartialResults, parseShard,
+                                       writePartialResult)
+from twistedchecker.core.sources import SourceStore, getFileModuleName
+from twistedchecker.core.timings import TimingHistory
+from twistedchecker.core.treecache import (TreeCache, getKeyPath,
+                                           loadSigningKey)
+from twistedchecker.core.walker import Walker
 from twistedchecker.reporters.limited import LimitedReporter
 
 
@@ -26,18 +58,23 @@ class Runner():
     linter = None
     allowOptions = None
     # Customized checkers.
-    checkers = ("header.HeaderChecker",
+    checkers = ("format.TwistedFormatChecker",
+                "header.HeaderChecker",
                 "names.TwistedNamesChecker",
                 "docstring.DocstringChecker",
                 "formattingoperation.FormattingOperationChecker",
                 "comment.CommentChecker",
                 "testclassname.TestClassNameChecker")
     allowedMessagesFromPylint = ("F0001",
-                                 "C0103",
-                                 "C0301",
-                                 "W0311",
-                                 "W0312")
+                                 "C0103")
     diffOption = None
+    classIndex = None
+    scopeCache = None
+    resultCache = None
+    walker = None
+    resolver = None
+    sources = None
+    shard = (1, 1)
     errorResultRead = "Error: Failed to read result file '%s'.\n"
     prefixModuleName = "************* Module "
     regexLineStart = "^[WCEFR]\d{4}\:"
@@ -47,6 +84,8 @@ class Runner():
         Initialize C{PyLinter} object, and load configuration file.
         """
         self.allowOptions = True
+        self.walker = Walker()
+        self.resolver = ModuleResolver()
         self.linter = PyLinter(self._makeOptions())
         # register standard checkers.
         self.linter.load_default_plugins()
@@ -54,10 +93,10 @@ class Runner():
         pathConfig = os.path.join(twistedchecker.abspath,
                                   "configuration", "pylintrc")
         self.linter.read_config_file(pathConfig)
+        allowedMessages = self.registerCheckers()
         # now we can load file config and command line, plugins (which can
         # provide options) have been registered.
         self.linter.load_config_file()
-        allowedMessages = self.registerCheckers()
         # disable messages
         disabledMessages = set(self.linter
                            .cfgfile_parser.get("TWISTEDCHECKER", "disable")
@@ -93,6 +132,138 @@ class Runner():
               'default': False,
               'help': "Check '@type' and '@rtype' in epydoc."}
             ),
+            ('cache-dir',
+             {'type': 'string', 'metavar': '<directory>',
+              'default': None,
+              'help': "Directory where caches are kept between runs, "
+                      "'~/.cache/twistedchecker' by default. Set it to an "
+                      "empty value to not persist caches."}
+            ),
+            ('files-from',
+             {'type': 'string', 'metavar': '<file>',
+              'default': None,
+              'help': "Also check the files and modules listed in a file, "
+                      "or on the standard input with --files-from=-, one "
+                      "per line or separated by NUL characters. The list "
+                      "is read while modules are checked."}
+            ),
+            ('staged',
+             {'type': 'yn', 'metavar': '<y_or_n>',
+              'default': False,
+              'help': "Check the version of the python files added or "
+                      "modified in the git index, read from the object "
+                      "store, instead of the one of the working tree, for "
+                      "pre-commit hooks. Files and directories given as "
+                      "arguments restrict the files checked."}
+            ),
+            ('exclude',
+             {'type': 'csv', 'metavar': '<globs>',
+              'default': (),
+              'help': "Skip the files and directories matching these "
+                      "globs while walking directories, for example "
+                      "--exclude=build,*/vendor/*. A glob matches base "
+                      "names, or paths relative to the working directory."}
+            ),
+            ('gitignore',
+             {'type': 'yn', 'metavar': '<y_or_n>',
+              'default': True,
+              'help': "Skip the files and directories ignored by "
+                      ".gitignore files while walking directories."}
+            ),
+            ('select',
+             {'type': 'csv', 'metavar': '<msg ids>',
+              'default': (),
+              'help': "Only enable the given messages, for example "
+                      "--select=W9001,W9002. Checkers producing none of "
+                      "them are not run."}
+            ),
+            ('fused',
+             {'type': 'yn', 'metavar': '<y_or_n>',
+              'default': False,
+              'help': "Run the twistedchecker checkers of the syntax tree "
+                      "as a single checker, dispatching each node only to "
+                      "the handlers interested in it."}
+            ),
+            ('fast',
+             {'type': 'yn', 'metavar': '<y_or_n>',
+              'default': False,
+              'help': "Report the messages of twistedchecker from tokens "
+                      "and the syntax tree of the standard library, and "
+                      "only build astroid trees for the messages needing "
+                      "them, like C0103 and W9701. Disable these for the "
+                      "fastest runs."}
+            ),
+            ('shard',
+             {'type': 'string', 'metavar': '<I/N>',
+              'default': None,
+              'help': "Only check the modules of the I-th of N shards, "
+                      "for example --shard=2/4, to split a run across "
+                      "several machines."}
+            ),
+            ('shard-by',
+             {'type': 'choice', 'metavar': '<hash|cost>',
+              'choices': ('hash', 'cost'), 'default': 'hash',
+              'help': "Split modules between shards by a stable hash of "
+                      "their names, or by the time their last check took "
+                      "to balance the shards, which requires all the "
+                      "shards to share the same cache directory content."}
+            ),
+            ('partial-result',
+             {'type': 'string', 'metavar': '<file>',
+              'default': None,
+              'help': "Write the messages of the run to a file, to merge "
+                      "the results of all the shards with 'twistedchecker "
+                      "merge <file>...'."}
+            ),
+            ('max-modules-per-worker',
+             {'type': 'int', 'metavar': '<modules>',
+              'default': 0,
+              'help': "Replace each worker of a parallel run by a fresh "
+                      "one after it checked this number of modules, 0 "
+                      "for no limit."}
+            ),
+            ('max-worker-rss',
+             {'type': 'int', 'metavar': '<megabytes>',
+              'default': 0,
+              'help': "Replace each worker of a parallel run by a fresh "
+                      "one once its resident memory grows past this "
+                      "number of megabytes, 0 for no limit."}
+            ),
+            ('timeout',
+             {'type': 'int', 'metavar': '<seconds>',
+              'default': 0,
+              'help': "Give up on a module whose check takes longer than "
+                      "this number of seconds, reporting F9801, 0 for no "
+                      "limit. Modules are checked by worker processes, "
+                      "also with one job, and a module killing its "
+                      "worker is reported by F9802."}
+            ),
+            ('max-astroid-modules',
+             {'type': 'int', 'metavar': '<modules>',
+              'default': 0,
+              'help': "Keep the astroid trees of at most this number of "
+                      "modules between the checks of two modules, "
+                      "evicting the least recently used ones, 0 for no "
+                      "limit."}
+            ),
+            ('max-astroid-source',
+             {'type': 'int', 'metavar': '<megabytes>',
+              'default': 0,
+              'help': "Keep the astroid trees of modules whose sources "
+                      "total at most this number of megabytes between "
+                      "the checks of two modules, evicting the least "
+                      "recently used ones, 0 for no limit."}
+            ),
+            ('tree-cache-size',
+             {'type': 'int', 'metavar': '<megabytes>',
+              'default': 0,
+              'help': "Keep the astroid trees built from sources in the "
+                      "cache directory, up to this number of megabytes, "
+                      "and load them instead of parsing unchanged sources "
+                      "again, 0 to not keep them. Trees are signed with a "
+                      "key kept in ~/.config/twistedchecker, and only the "
+                      "ones signed with it are loaded."}
+            ),
           )
 
 
@@ -120,8 +291,8 @@ class Runner():
 
         @return: a list of allowed messages
         """
-        # We patch the default pylint format checker.
-        patch_pylint_format.patch()
+        # We replace the default pylint format checker.
+        self.unregisterPylintFormatChecker()
 
         # register checkers
         allowedMessages = list(self.allowedMessagesFromPylint)
@@ -135,6 +306,13 @@ class Runner():
             allowedMessages += list(instanceChecker.msgs.keys())
             self.linter.register_checker(instanceChecker)
 
+        # The failures of workers are reported by the parallel checker,
+        # only the messages are registered so that no module is walked for
+        # them.
+        self.linter.msgs_store.register_messages_from_checker(
+            WorkerFailureChecker(self.linter))
+        allowedMessages += list(WorkerFailureChecker.msgs.keys())
+
         self.restrictCheckers(allowedMessages)
         return set(allowedMessages)
 
@@ -152,6 +330,21 @@ class Runner():
             self.linter.options_providers.remove(checker)
 
 
+    def unregisterPylintFormatChecker(self):
+        """
+        Remove the format checker of pylint, together with its options so
+        that L{twistedchecker.checkers.format.TwistedFormatChecker} can
+        provide the ones it uses.
+        """
+        formatChecker = self.getCheckerByName(FormatChecker)
+        if not formatChecker:
+            return
+        self.unregisterChecker(formatChecker)
+        for optionName, _ in formatChecker.options:
+            self.linter.cmdline_parser.remove_option("--" + optionName)
+            del self.linter._all_options[optionName]
+
+
     def findUselessCheckers(self, allowedMessages):
         """
         Find checkers which generate no allowed messages.
@@ -180,6 +373,71 @@ class Runner():
             self.unregisterChecker(checker)
 
 
+    def disableFilteredMessages(self):
+        """
+        Disable in the linter the messages which the reporter would filter
+        out, so that checkers skip the analysis leading to them.
+        """
+        messagesAllowed = getattr(self.linter.reporter, "messagesAllowed",
+                                  None)
+        if messagesAllowed is None:
+            return
+        for checker in self.linter.get_checkers():
+            for msgid in checker.msgs:
+                if msgid not in messagesAllowed:
+                    self.linter.disable(msgid)
+
+
+    def selectMessages(self, messages):
+        """
+        Enable only the given messages.
+
+        @param messages: identifiers of the messages to enable
+        """
+        self.linter.disable("all")
+        # Fatal errors, like a module which can not be found, are always
+        # reported.
+        self.linter.enable("F0001")
+        for msgid in WorkerFailureChecker.msgs:
+            self.linter.enable(msgid)
+        for msgid in messages:
+            self.linter.enable(msgid)
+
+
+    def pruneCheckers(self):
+        """
+        Unregister the checkers whose messages are all disabled, once the
+        configuration files and the command line are applied.
+        """
+        enabledMessages = [msgid for checker in self.linter.get_checkers()
+                           for msgid in checker.msgs
+                           if self.linter.is_message_enabled(msgid)]
+        self.restrictCheckers(enabledMessages)
+
+
+    def fuseCheckers(self):
+        """
+        Replace the registered astroid checkers of twistedchecker by a
+        single L{FusedChecker}.
+
+        @return: the fused checker, or C{None} if there was nothing to fuse
+        """
+        members = [checker for checker in self.linter.get_checkers()
+                   if checker is not self.linter
+                   and implements(checker, IAstroidChecker)
+                   and type(checker).__module__.startswith("twistedchecker.")]
+        if not members:
+            return None
+        for checker in members:
+            # The members keep their messages, options and reports, the
+            # linter just does not walk with them anymore.
+            self.linter._checkers[checker.name].remove(checker)
+        fusedChecker = FusedChecker(self.linter, members)
+        self.linter._checkers.setdefault(fusedChecker.name, []).append(
+            fusedChecker)
+        return fusedChecker
+
+
     def getCheckerByName(self, checkerType):
         """
         Get checker by given name.
@@ -203,12 +461,15 @@ class Runner():
         nameChecker = self.getCheckerByName(NameChecker)
         if not nameChecker:
             return
+        # Sort the patterns, so that the regexes, which are part of the
+        # messages and of the inputs of the result cache, are the same
+        # from a run to another.
         if patternsFunc:
-            regexFuncAdd = "|((%s).+)$" % "|".join(patternsFunc)
+            regexFuncAdd = "|((%s).+)$" % "|".join(sorted(patternsFunc))
         else:
             regexFuncAdd = ""
         if patternsClass:
-            regexClassAdd = "|((%s).+)$" % "|".join(patternsClass)
+            regexClassAdd = "|((%s).+)$" % "|".join(sorted(patternsClass))
         else:
             regexClassAdd = ""
         # Modify regex for function, method and class name.
@@ -227,18 +488,24 @@ class Runner():
 
     def getPathList(self, filesOrModules):
         """
-        Transform a list of modules to path.
+        Transform a list of modules to paths, yielded as they are
+        resolved.
 
         @param filesOrModules: a list of modules (may be foo/bar.py or
         foo.bar)
         """
-        pathList = []
+        # Resolve all the module names at once, sharing the listings of
+        # directories.
+        resolved = self.resolver.resolve(
+            [fileOrMod for fileOrMod in filesOrModules
+             if not os.path.exists(fileOrMod)])
         for fileOrMod in filesOrModules:
             if not os.path.exists(fileOrMod):
                 # May be given module is not not a path,
                 # then transform it to a path.
                 try:
-                    filepath = file_from_modpath(fileOrMod.split('.'))
+                    filepath = (resolved.get(fileOrMod)
+                                or self.resolver.getModuleFile(fileOrMod))
                 except (ImportError, SyntaxError):
                     # Could not load this module.
                     continue
@@ -249,8 +516,7 @@ class Runner():
                     filepath = os.path.dirname(filepath)
             else:
                 filepath = fileOrMod
-            pathList.append(filepath)
-        return pathList
+            yield filepath
 
 
     def setNameExceptions(self, filesOrModules):
@@ -261,10 +527,82 @@ class Runner():
         @param filesOrModules: a list of modules (may be foo/bar.py or
         foo.bar)
         """
-        pathList = self.getPathList(filesOrModules)
-        for path in pathList:
-            patternsFunc, patternsClass = findAllExceptions(path)
+        if not self.getCheckerByName(NameChecker):
+            # Nobody would use the exceptions.
+            return
+        if self.sources is not None:
+            self.allowPatternsForNameChecking(
+                *findSourceExceptions(self.sources.iterSources()))
+            return
+        cache = ExceptionCache(
+            getCacheDirectory(self.linter.option_value("cache-dir")))
+        for path in self.getPathList(filesOrModules):
+            patternsFunc, patternsClass = findAllExceptions(
+                path, cache, self.walker.walk)
             self.allowPatternsForNameChecking(patternsFunc, patternsClass)
+        cache.save()
+
+
+    def buildClassIndex(self, required=False):
+        """
+        Create the index of classes, and give it to the checkers answering
+        questions about class ancestry.
+
+        Nothing is indexed up front: the modules to check are registered
+        by L{indexModules} as they are found, and indexed when first
+        needed.
+
+        @param required: whether to create the index even if no checker
+            uses it
+        """
+        users = [checker for checker in self.linter.get_checkers()
+                 if hasattr(checker, "classIndex")]
+        if not users and not required:
+            return
+        cacheDir = getCacheDirectory(self.linter.option_value("cache-dir"))
+        self.classIndex = ClassIndex(cacheDir)
+        if self.sources is not None:
+            for descr in self.sources.iterModules():
+                modname = descr["name"]
+                if modname.endswith(".__init__"):
+                    # Like astroid, name packages without their __init__.
+                    modname = modname[:-len(".__init__")]
+                self.classIndex.addModuleSource(
+                    descr["path"], self.sources.get(descr["path"]), modname)
+        for checker in users:
+            checker.classIndex = self.classIndex
+
+
+    def indexModules(self, modules):
+        """
+        Register the modules to check in the index of classes as they are
+        found.
+
+        @param modules: an iterable of descriptions of modules
+        @return: an iterator of the same descriptions
+        """
+        for descr in modules:
+            if self.classIndex is not None:
+                self.classIndex.addModuleFile(descr["path"], descr["name"])
+            yield descr
+
+
+    def configureMessages(self):
+        """
+        Enable the messages selected by the options, and only run the
+        checkers which can report them.
+        """
+        # Check for 'strict-epydoc' option.
+        if self.allowOptions and not self.linter.option_value("strict-epydoc"):
+            for msg in ["W9203", "W9205"]:
+                self.linter.disable(msg)
+        # Check for 'select' option.
+        if self.linter.option_value("select"):
+            self.selectMessages(self.linter.option_value("select"))
+        # don't compute messages which would not be reported.
+        self.disableFilteredMessages()
+        # don't run checkers which have nothing left to report.
+        self.pruneCheckers()
 
 
     def run(self, args):
@@ -283,34 +621,490 @@ class Runner():
             if exc.code == 2:  # bad options
                 exc.code = 32
             raise
-        if not args:
+        # read the files to check from a list if asked.
+        filesFrom = self.linter.option_value("files-from")
+        if filesFrom:
+            args = FileList(filesFrom, args)
+        staged = self.linter.option_value("staged")
+        if not args and not staged:
             self.displayHelp()
-        # Check for 'strict-epydoc' option.
-        if self.allowOptions and not self.linter.option_value("strict-epydoc"):
-            for msg in ["W9203", "W9205"]:
-                self.linter.disable(msg)
+        self.configureMessages()
 
         # insert current working directory to the python path to have a correct
         # behaviour.
         sys.path.insert(0, os.getcwd())
+        cacheDir = getCacheDirectory(self.linter.option_value("cache-dir"))
+        # find the files of modules given by name from the cache directory.
+        self.resolver = ModuleResolver(cacheDir)
+        # skip excluded and ignored paths while walking directories.
+        self.walker = Walker(self.linter.option_value("exclude"),
+                             self.linter.option_value("gitignore"))
+        # check the files staged in the git index if asked.
+        if staged:
+            self.sources = self.readStagedSources(args)
+            args = [path for path, _ in self.sources.iterSources()]
+        elif not isinstance(args, FileList) and any(isArchive(arg)
+                                                    for arg in args):
+            # check the members of archives without extracting them.
+            self.sources = self.readArchiveSources(args)
+            args = [path for path, _ in self.sources.iterSources()]
         # set exceptions for name checking.
         self.setNameExceptions(args)
+        # index classes for checks of class ancestry, and for the results
+        # cache to know what modules depend on. The results of staged files
+        # are cached with any engine, so that running a hook again on the
+        # same content is instant.
+        cacheResults = bool((self.linter.option_value("fast") or staged)
+                            and cacheDir)
+        self.buildClassIndex(required=cacheResults)
 
         # check for diff option.
         self.diffOption = self.linter.option_value("diff")
         if self.diffOption:
             self.prepareDiff()
 
+        if cacheResults:
+            self.scopeCache = ScopeCache(cacheDir)
+            self.resultCache = ResultCache(cacheDir)
+        # check modules as they are found under packages.
+        self.linter.expand_files = self.iterFiles
+        # only check the modules of a shard, recording their messages, if
+        # asked.
+        partialResult = self.linter.option_value("partial-result")
+        if self.linter.option_value("shard") or partialResult:
+            try:
+                self.shard = parseShard(
+                    self.linter.option_value("shard") or "1/1")
+            except ValueError as e:
+                sys.stderr.write("Error: %s\n" % (e,))
+                sys.exit(32)
+            self.messageOrder = {}
+            self.linter.expand_files = self.expandFiles
+        if partialResult:
+            self.recordMessages()
+        # walk modules once for all twistedchecker checkers if asked.
+        if (self.linter.option_value("fused")
+                and not self.linter.option_value("fast")):
+            self.fuseCheckers()
+
+        # bound the memory of astroid trees if asked.
+        maxModules = self.linter.option_value("max-astroid-modules")
+        maxSource = self.linter.option_value("max-astroid-source")
+        if maxModules or maxSource:
+            installModuleCache(self.linter, maxModules,
+                               maxSource * 1024 * 1024)
+        # load astroid trees from the cache directory if asked.
+        treeCache = None
+        treeCacheSize = self.linter.option_value("tree-cache-size")
+        if treeCacheSize and cacheDir:
+            treeCache = TreeCache(os.path.join(cacheDir, "trees"),
+                                  treeCacheSize * 1024 * 1024,
+                                  loadSigningKey(getKeyPath()))
+            uninstallTreeCache = treeCache.install()
+        # build the trees of the modules checked from memory from their
+        # sources.
+        if self.sources is not None:
+            uninstallSources = self.sources.install()
+
         # check codes.
-        self.linter.check(args)
+        jobs = getJobCount(self.linter.config.jobs)
+        # pylint's own parallel mode would check with linters missing the
+        # configuration of twistedchecker.
+        self.linter.config.jobs = 1
+        timeout = self.linter.option_value("timeout")
+        if jobs > 1 or (timeout and canFork()):
+            # All the shards of a run must split modules by the same
+            # timings.
+            timings = TimingHistory(cacheDir, readOnly=self.shard[1] > 1)
+            maxRSS = self.linter.option_value("max-worker-rss") * 1024 * 1024
+            ParallelChecker(
+                self, jobs, timings,
+                maxModules=self.linter.option_value("max-modules-per-worker"),
+                maxRSS=maxRSS, timeout=timeout).check(args)
+        else:
+            self.checkModules(args)
+        if self.sources is not None:
+            uninstallSources()
+        if treeCache is not None:
+            uninstallTreeCache()
+            treeCache.prune()
+        if self.classIndex is not None:
+            self.classIndex.save()
+        self.resolver.save()
+        if partialResult:
+            writePartialResult(partialResult, self.shard,
+                               self.linter.msg_status, self.partialMessages)
+        self.exitWithResults(self.linter.msg_status)
+
+
+    def merge(self, args):
+        """
+        Report the messages of all the shards of a run, from their partial
+        results, like a single run would.
+
+        @param args: the partial result files, and options such as C{diff}
+        @type args: list of string
+        """
+        if self.outputStream:
+            self.linter.reporter.set_output(self.outputStream)
+        try:
+            args = self.linter.load_command_line_configuration(args)
+        except SystemExit as exc:
+            if exc.code == 2:  # bad options
+                exc.code = 32
+            raise
+        if not args:
+            self.displayHelp()
+        try:
+            status, messages = mergePartialResults(
+                [loadPartialResult(path) for path in args])
+        except (IOError, ValueError) as e:
+            sys.stderr.write("Error: %s\n" % (e,))
+            sys.exit(32)
 
-        # show diff of warnings if diff option on.
+        self.diffOption = self.linter.option_value("diff")
+        if self.diffOption:
+            self.prepareDiff()
+        self.linter.open()
+        for msg in messages:
+            if msg.module != self.linter.current_name:
+                self.linter.set_current_module(msg.module)
+            self.linter.reporter.handle_message(msg)
+        self.exitWithResults(status)
+
+
+    def audit(self, args):
+        """
+        Count the messages of each commit of a range of the git history,
+        writing one line of JSON per commit, oldest first.
+
+        @param args: the range of commits, followed by the files and
+            directories to restrict the modules to, and options
+        @type args: list of string
+        """
+        try:
+            args = self.linter.load_command_line_configuration(args)
+        except SystemExit as exc:
+            if exc.code == 2:  # bad options
+                exc.code = 32
+            raise
+        if not args:
+            self.displayHelp()
+        self.configureMessages()
+        sys.path.insert(0, os.getcwd())
+        cacheDir = getCacheDirectory(self.linter.option_value("cache-dir"))
+        self.walker = Walker(self.linter.option_value("exclude"),
+                             self.linter.option_value("gitignore"))
+        revisionRange, pathspecs = args[0], args[1:]
+        try:
+            root = getRepositoryRoot()
+            commits = iterCommits(root, revisionRange)
+        except GitError as e:
+            sys.stderr.write("Error: %s\n" % (e,))
+            sys.exit(32)
+        pathspecs = [os.path.relpath(os.path.realpath(path), root)
+                     for path in pathspecs]
+        reader = BlobReader(root)
+        self.sources = CommitSources(root, reader)
+        # the class index tells which modules depend on the modules changed
+        # by a commit.
+        self.buildClassIndex(required=True)
+        if cacheDir:
+            self.scopeCache = ScopeCache(cacheDir)
+        self.resultCache = BlobResultCache(cacheDir, self.sources)
+        self.linter.expand_files = self.iterFiles
+        if (self.linter.option_value("fused")
+                and not self.linter.option_value("fast")):
+            self.fuseCheckers()
+        uninstallSources = self.sources.install()
+        try:
+            HistoryAudit(self, root, self.sources, pathspecs).run(
+                commits, self.outputStream)
+        except GitError as e:
+            sys.stderr.write("Error: %s\n" % (e,))
+            sys.exit(32)
+        finally:
+            uninstallSources()
+            reader.close()
+        self.resultCache.persist()
+        self.classIndex.save()
+        sys.exit(0)
+
+
+    def exitWithResults(self, status):
+        """
+        Show the diff of warnings if the diff option is on, and exit.
+
+        @param status: the status of the run, used as the exit code when
+            the diff option is off
+        """
         if self.diffOption:
             diffCount = self.showDiffResults()
             exitCode = 1 if diffCount else 0
             sys.exit(exitCode)
 
-        sys.exit(self.linter.msg_status)
+        sys.exit(status)
+
+
+    def iterFiles(self, filesOrModules):
+        """
+        Resolve the modules to check, like
+        L{pylint.lint.PyLinter.expand_files}, finding the modules of
+        packages while they are checked.
+
+        The arguments are resolved, and the errors about them reported,
+        right away, unless they are read from a L{FileList}, as they are
+        then resolved while modules are checked.
+
+        @param filesOrModules: names of the files and modules to check
+        @return: an iterator of descriptions of modules
+        """
+        if self.sources is not None:
+            return self.sources.iterModules()
+        filesOrModules = self.unwrapFileList(filesOrModules)
+        if isinstance(filesOrModules, FileList):
+            return self.indexModules(self.iterListedFiles(filesOrModules))
+        linter = self.linter
+        blackList = linter.config.black_list
+        blackListRe = linter.config.black_list_re
+        arguments, errors = resolveArguments(filesOrModules, blackList,
+                                             blackListRe, self.resolver)
+        for error in errors:
+            self.reportArgumentError(error)
+        return self.indexModules(iterModules(arguments, blackList,
+                                             blackListRe, self.walker.walk))
+
+
+    def unwrapFileList(self, filesOrModules):
+        """
+        Get back a L{FileList} given to L{pylint.lint.PyLinter.check}, which
+        makes a tuple of arguments which are not a list.
+
+        @param filesOrModules: the files and modules given to the linter
+        @return: the files and modules to check
+        """
+        if (isinstance(filesOrModules, tuple) and len(filesOrModules) == 1
+                and isinstance(filesOrModules[0], FileList)):
+            return filesOrModules[0]
+        return filesOrModules
+
+
+    def iterListedFiles(self, fileList):
+        """
+        Resolve the modules to check from a list of files and modules, as
+        the list is read.
+
+        @param fileList: the files and modules to check
+        @type fileList: L{FileList}
+        @return: an iterator of descriptions of modules
+        """
+        linter = self.linter
+        blackList = linter.config.black_list
+        blackListRe = linter.config.black_list_re
+        for argument, error in iterArguments(fileList, blackList, blackListRe,
+                                             self.resolver):
+            if error is not None:
+                self.reportArgumentError(error)
+                continue
+            for descr in iterModules([argument], blackList, blackListRe,
+                                     self.walker.walk):
+                yield descr
+
+
+    def reportArgumentError(self, error):
+        """
+        Report a file or module given as argument which can not be
+        checked, like L{pylint.lint.PyLinter.expand_files}.
+
+        @param error: the error, like the ones of
+            L{pylint.utils.expand_modules}
+        """
+        linter = self.linter
+        message = modname = error["mod"]
+        linter.set_current_module(modname)
+        if error["key"] == "fatal":
+            message = str(error["ex"]).replace(os.getcwd() + os.sep, "")
+        linter.add_message(error["key"], args=message)
+
+
+    def expandFiles(self, filesOrModules):
+        """
+        Resolve the modules to check, like
+        L{pylint.lint.PyLinter.expand_files}, keeping only the modules of
+        the shard of the run.
+
+        Errors are split between shards like modules are, by the name of
+        the module they are about. The position of every module in the
+        report of a single run is recorded in C{messageOrder}.
+
+        @param filesOrModules: names of the files and modules to check
+        @return: a list of descriptions of modules
+        """
+        linter = self.linter
+        blackList = linter.config.black_list
+        blackListRe = linter.config.black_list_re
+        if self.sources is not None:
+            errors, modules = [], list(self.sources.iterModules())
+        else:
+            arguments, errors = resolveArguments(
+                self.unwrapFileList(filesOrModules), blackList, blackListRe,
+                self.resolver)
+            modules = list(self.indexModules(iterModules(
+                arguments, blackList, blackListRe, self.walker.walk)))
+        index, count = self.shard
+        if linter.option_value("shard-by") == "cost":
+            timings = TimingHistory(getCacheDirectory(
+                linter.option_value("cache-dir")))
+            costs = dict((error["mod"], 0) for error in errors)
+            for descr in modules:
+                costs[descr["name"]] = timings.getCost(descr["path"])
+            shards = getCostShards(costs, count)
+        else:
+            shards = dict((name, getHashShard(name, count)) for name in
+                          [error["mod"] for error in errors]
+                          + [descr["name"] for descr in modules])
+
+        for position, error in enumerate(errors):
+            modname = error["mod"]
+            self.messageOrder[modname] = (ORDER_ERRORS, position)
+            if shards[modname] != index:
+                continue
+            message = modname
+            linter.set_current_module(modname)
+            if error["key"] == "fatal":
+                message = str(error["ex"]).replace(os.getcwd() + os.sep, "")
+            linter.add_message(error["key"], args=message)
+        for position, descr in enumerate(modules):
+            self.messageOrder[descr["name"]] = (ORDER_MODULES, position)
+        return [descr for descr in modules if shards[descr["name"]] == index]
+
+
+    def isCheckedFile(self, root, relativePath):
+        """
+        Tell whether a file of a git repository is a python module to check,
+        not ignored nor excluded.
+
+        @param root: the root of the working tree
+        @param relativePath: the path of the file relative to the root, with
+            C{/} separators
+        """
+        linter = self.linter
+        blackList = linter.config.black_list
+        blackListRe = linter.config.black_list_re
+        if not relativePath.endswith(".py"):
+            return False
+        if any(name in blackList or isBlacklisted(name, blackListRe)
+               for name in relativePath.split("/")):
+            return False
+        path = os.path.relpath(os.path.join(root, relativePath))
+        return not self.walker.isExcluded(path)
+
+
+    def readStagedSources(self, pathspecs):
+        """
+        Read the version of the python files added or modified in the git
+        index from the object store, skipping ignored and excluded files.
+
+        Exit with an error if the index can not be read.
+
+        @param pathspecs: the files and directories to restrict the files
+            to, all the files of the repository when empty
+        @return: the staged sources
+        @rtype: L{SourceStore}
+        """
+        sources = SourceStore()
+        try:
+            root = getRepositoryRoot()
+            reader = BlobReader(root)
+            try:
+                for relativePath, blob in iterStagedBlobs(root, pathspecs):
+                    if not self.isCheckedFile(root, relativePath):
+                        continue
+                    path = os.path.relpath(os.path.join(root, relativePath))
+                    sources.add(path, getFileModuleName(path),
+                                reader.read(blob))
+            finally:
+                reader.close()
+        except GitError as e:
+            sys.stderr.write("Error: %s\n" % (e,))
+            sys.exit(32)
+        return sources
+
+
+    def readArchiveSources(self, archives):
+        """
+        Read the python files of archives, like source distributions and
+        wheels, skipping ignored and excluded files.
+
+        Exit with an error if an argument is not an archive, or if an
+        archive can not be read.
+
+        @param archives: the paths of the archives
+        @return: the sources of the members of the archives
+        @rtype: L{SourceStore}
+        """
+        sources = SourceStore()
+        for archive in archives:
+            if not isArchive(archive):
+                sys.stderr.write("Error: %s is not an archive, archives can "
+                                 "not be checked with other files.\n"
+                                 % (archive,))
+                sys.exit(32)
+            try:
+                members = list(iterArchiveFiles(
+                    archive,
+                    lambda member: self.isCheckedFile(os.curdir, member)))
+            except ArchiveError as e:
+                sys.stderr.write("Error: %s\n" % (e,))
+                sys.exit(32)
+            packages = set(member for member, _ in members
+                           if member.split("/")[-1] == "__init__.py")
+            for member, source in members:
+                sources.add(os.path.join(archive, *member.split("/")),
+                            getArchiveModuleName(member, packages), source)
+        return sources
+
+
+    def recordMessages(self):
+        """
+        Record the messages handled by the reporter in C{partialMessages},
+        along with their position in the report of a single run.
+        """
+        self.partialMessages = []
+        reporter = self.linter.reporter
+        handleMessage = reporter.handle_message
+
+        def recordingHandleMessage(msg):
+            order = self.messageOrder.get(self.linter.current_name,
+                                          (ORDER_OTHERS, 0))
+            self.partialMessages.append((order, msg))
+            handleMessage(msg)
+        reporter.handle_message = recordingHandleMessage
+
+
+    def checkModules(self, args):
+        """
+        Check modules with the configured engine.
+
+        @param args: the files and modules to check
+        """
+        if self.linter.option_value("fast"):
+            FastEngine(self.linter, self.scopeCache, self.resultCache,
+                       self.classIndex, self.sources).check(args)
+        elif self.resultCache is not None:
+            readSource = None
+            if self.sources is not None:
+                readSource = self.sources.readSource
+            uninstall = LinterResultCache(self.linter, self.resultCache,
+                                          self.classIndex,
+                                          readSource).install()
+            try:
+                self.linter.check(args)
+            finally:
+                uninstall()
+            self.resultCache.save()
+        else:
+            self.linter.check(args)
 
 
     def prepareDiff(self):
@@ -426,4 +1220,9 @@ def main():
     An entry point used in the setup.py to create a runnable script.
     """
     runner = Runner()
-    runner.run(sys.argv[1:])
+    if sys.argv[1:2] == ["merge"]:
+        runner.merge(sys.argv[2:])
+    elif sys.argv[1:2] == ["audit"]:
+        runner.audit(sys.argv[2:])
+    else:
+        runner.run(sys.argv[1:])
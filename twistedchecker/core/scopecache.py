@@ -0,0 +1,151 @@
+# -*- test-case-name: twistedchecker.test.test_scopecache -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+A persistent cache of the messages reported for functions.
+
+Editing one function of a big module should not require checking all the
+other ones again. The messages of a function only depend on its source and
+on a little context, like the names of the other methods of its class, so
+they are recorded under a hash of these and reused while it is unchanged.
+
+Line numbers are recorded relative to the first line of the function, so
+that messages are still valid when code above the function moves it.
+"""
+
+import hashlib
+
+from twistedchecker.core.cache import loadCache, saveCache
+
+
+# Bump this whenever a change of the checks changes the messages reported
+# for the same source.
+SCOPE_CACHE_VERSION = 1
+
+
+
+def getScopeKey(context, source):
+    """
+    Get the key of a scope in the cache.
+
+    @param context: the context of the scope, a list of strings
+    @param source: the source of the scope
+    @type source: L{bytes}
+    @return: a hexadecimal digest
+    """
+    digest = hashlib.sha1()
+    digest.update(("%d\0%s\0" % (SCOPE_CACHE_VERSION,
+                                 "\0".join(context))).encode("utf-8"))
+    digest.update(source)
+    return digest.hexdigest()
+
+
+
+class ScopeCache(object):
+    """
+    The messages of the functions of modules, by module path and by key of
+    function.
+
+    Entries are C{dict}s with the number of C{statements} of the function
+    and its C{messages}, lists of message identifier, line relative to the
+    first line of the function, column, object name and arguments.
+
+    Only the entries used by the last check of a module are persisted.
+
+    @ivar cacheDir: the cache directory, or C{None}
+    @ivar hits: number of entries found
+    @ivar misses: number of entries looked for but not found
+    """
+    cacheName = "scopes"
+
+    def __init__(self, cacheDir=None):
+        """
+        Load the entries persisted by previous runs.
+
+        @param cacheDir: the cache directory, or C{None} to not persist
+            the entries
+        """
+        self.cacheDir = cacheDir
+        self._scopesByPath = loadCache(cacheDir, self.cacheName)
+        self._usedByPath = {}
+        self.hits = 0
+        self.misses = 0
+
+
+    def openModule(self, path):
+        """
+        Start the check of a module, whose entries are replaced by the ones
+        used by this check when the cache is saved.
+
+        @param path: path of the module
+        """
+        self._usedByPath[path] = {}
+
+
+    def get(self, path, key):
+        """
+        Get the entry of a function.
+
+        @param path: path of the module
+        @param key: key of the function, from L{getScopeKey}
+        @return: the entry, or C{None} if the function is not cached
+        """
+        entry = self._scopesByPath.get(path, {}).get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._usedByPath.setdefault(path, {})[key] = entry
+        return entry
+
+
+    def set(self, path, key, entry):
+        """
+        Record the entry of a function.
+
+        @param path: path of the module
+        @param key: key of the function, from L{getScopeKey}
+        @param entry: the entry
+        """
+        self._usedByPath.setdefault(path, {})[key] = entry
+
+
+    def getModuleEntries(self, path):
+        """
+        Get all the entries of a module, like they would be persisted.
+
+        @param path: path of the module
+        @return: a C{dict} of entries by key of function, or C{None} if
+            the module has no entries
+        """
+        return self._usedByPath.get(path, self._scopesByPath.get(path))
+
+
+    def setModuleEntries(self, path, entries):
+        """
+        Replace all the entries of a module, like if it was checked using
+        them.
+
+        @param path: path of the module
+        @param entries: a C{dict} of entries by key of function, or C{None}
+            to leave the entries of the module alone
+        """
+        if entries is not None:
+            self._usedByPath[path] = entries
+
+
+    def save(self):
+        """
+        Persist the entries, replacing the ones of the modules checked
+        since the cache was loaded.
+        """
+        if not self._usedByPath:
+            return
+        self._scopesByPath.update(self._usedByPath)
+        self._usedByPath = {}
+        saveCache(self.cacheDir, self.cacheName, self._scopesByPath)
+
+
+
+__all__ = ["ScopeCache", "getScopeKey"]
@@ -0,0 +1,171 @@
+# -*- test-case-name: twistedchecker.test.test_shard -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Split the checking of a tree across several runs, on several machines.
+
+Every run resolves the same list of modules, and keeps the ones of its
+shard, so that the shards do not need to talk to each other. Each run can
+write its messages as a partial result, and the partial results of all the
+shards are merged into the report a single run would have written.
+"""
+
+import hashlib
+import json
+
+from pylint.interfaces import CONFIDENCE_LEVELS, UNDEFINED
+from pylint.message import Message
+
+
+# Bump this whenever the layout of partial results changes.
+PARTIAL_RESULT_FORMAT = 1
+
+# Order of the messages reported while resolving modules, of the messages
+# of the modules and of any other message, in a single run.
+ORDER_ERRORS = 0
+ORDER_MODULES = 1
+ORDER_OTHERS = 2
+
+_CONFIDENCES = dict((confidence.name, confidence)
+                    for confidence in CONFIDENCE_LEVELS)
+
+
+
+def parseShard(value):
+    """
+    Parse the value of the C{shard} option.
+
+    @param value: a string like C{"2/5"}, for the second shard of five
+    @return: a 2-tuple of the number of the shard, starting at 1, and of
+        the number of shards
+    @raise ValueError: if the value is not a valid shard
+    """
+    index, sep, count = value.partition("/")
+    if not sep:
+        raise ValueError("Invalid shard %r, expected I/N." % (value,))
+    index, count = int(index), int(count)
+    if not 1 <= index <= count:
+        raise ValueError("Invalid shard %r, expected 1 <= I <= N." % (value,))
+    return index, count
+
+
+
+def getHashShard(modname, count):
+    """
+    Get the shard of a module from a stable hash of its name.
+
+    @param modname: name of the module
+    @param count: the number of shards
+    @return: the number of the shard, starting at 1
+    """
+    digest = hashlib.sha1(modname.encode("utf-8")).hexdigest()
+    return int(digest, 16) % count + 1
+
+
+
+def getCostShards(costs, count):
+    """
+    Balance modules between shards, by decreasing cost, each module going
+    to the shard with the smallest total cost so far.
+
+    @param costs: a C{dict} mapping names of modules to their cost
+    @param count: the number of shards
+    @return: a C{dict} mapping names of modules to the numbers of their
+        shards, starting at 1
+    """
+    totals = [0] * count
+    shards = {}
+    for modname in sorted(costs, key=lambda name: (-costs[name], name)):
+        index = totals.index(min(totals))
+        totals[index] += costs[modname]
+        shards[modname] = index + 1
+    return shards
+
+
+
+def writePartialResult(path, shard, status, messages):
+    """
+    Write the partial result of a run.
+
+    @param path: path of the file to write
+    @param shard: a 2-tuple of the number of the shard and of the number
+        of shards
+    @param status: the status of the run
+    @param messages: a list of 2-tuples of the position of messages in the
+        report of a single run, given as a 2-tuple, and of the messages
+    """
+    content = {
+        "format": PARTIAL_RESULT_FORMAT,
+        "shard": list(shard),
+        "status": status,
+        "messages": [
+            list(order) + [msg.msg_id, msg.symbol, msg.abspath, msg.path,
+                           msg.module, msg.obj, msg.line, msg.column,
+                           msg.msg, msg.confidence.name]
+            for order, msg in messages],
+        }
+    with open(path, "w") as f:
+        json.dump(content, f)
+
+
+
+def loadPartialResult(path):
+    """
+    Load the partial result of a run.
+
+    @param path: path of the file written by L{writePartialResult}
+    @return: the content of the partial result
+    @raise ValueError: if the file is not a partial result
+    @raise IOError: if the file can not be read
+    """
+    with open(path) as f:
+        content = json.load(f)
+    if (not isinstance(content, dict)
+            or content.get("format") != PARTIAL_RESULT_FORMAT):
+        raise ValueError("%s is not a partial result." % (path,))
+    return content
+
+
+
+def mergePartialResults(partials):
+    """
+    Merge the partial results of all the shards of a run.
+
+    @param partials: the partial results given by L{loadPartialResult}
+    @return: a 2-tuple of the status of the whole run and of the list of
+        its messages, in the order of a single run
+    @raise ValueError: if the partial results are not the ones of all the
+        shards of a run
+    """
+    counts = set(partial["shard"][1] for partial in partials)
+    if len(counts) != 1:
+        raise ValueError("Partial results of different shardings.")
+    count = counts.pop()
+    indexes = sorted(partial["shard"][0] for partial in partials)
+    if indexes != list(range(1, count + 1)):
+        missing = sorted(set(range(1, count + 1)) - set(indexes))
+        if missing:
+            raise ValueError("Missing shards: %s." % (
+                ", ".join(str(index) for index in missing),))
+        raise ValueError("Duplicate shards.")
+    status = 0
+    records = []
+    for partial in partials:
+        status |= partial["status"]
+        records.extend(partial["messages"])
+    # The sort is stable, messages of a module keep their order.
+    records.sort(key=lambda record: (record[0], record[1]))
+    messages = []
+    for record in records:
+        (msgid, symbol, abspath, path, module, obj, line, column, msg,
+         confidence) = record[2:]
+        messages.append(Message(
+            msgid, symbol, (abspath, path, module, obj, line, column), msg,
+            _CONFIDENCES.get(confidence, UNDEFINED)))
+    return status, messages
+
+
+
+__all__ = ["parseShard", "getHashShard", "getCostShards",
+           "writePartialResult", "loadPartialResult", "mergePartialResults"]
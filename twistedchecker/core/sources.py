@@ -0,0 +1,208 @@
+# -*- test-case-name: twistedchecker.test.test_sources -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Modules checked from sources held in memory instead of their files.
+
+Some sources to check are not in the working tree, like the versions of
+files staged in the git index. They are checked under the path of their
+file and their real module name without being written anywhere: astroid
+builds their trees from memory, and the modules importing them get these
+trees too.
+"""
+
+import io
+import os
+import tokenize
+
+from astroid import MANAGER
+from astroid.builder import AstroidBuilder
+from astroid.exceptions import AstroidBuildingError, AstroidSyntaxError
+from astroid.modutils import modpath_from_file
+
+
+
+def decodeSource(source):
+    """
+    Decode the source of a module like astroid reads module files, with
+    the encoding it declares and universal new lines.
+
+    @param source: the source
+    @type source: L{bytes}
+    @return: the decoded source and its encoding
+    @raise SyntaxError: if the declared encoding is not known
+    @raise UnicodeError: if the source is not in the declared encoding
+    """
+    encoding, _ = tokenize.detect_encoding(io.BytesIO(source).readline)
+    stream = io.TextIOWrapper(io.BytesIO(source), encoding, newline=None)
+    return stream.read(), encoding
+
+
+
+def getFileModuleName(path):
+    """
+    Get the name of the module of a file like pylint names the files given
+    as arguments.
+
+    @param path: the path of the file, which does not have to exist
+    @return: the dotted name of the module
+    """
+    try:
+        return ".".join(modpath_from_file(path))
+    except ImportError:
+        return os.path.splitext(os.path.basename(path))[0]
+
+
+
+class SourceStore(object):
+    """
+    Sources of modules, by path, which are checked instead of the content
+    of the files at these paths.
+    """
+
+    def __init__(self):
+        """
+        Start without sources.
+        """
+        self._sources = {}
+        self._paths = {}
+        self._modules = []
+
+
+    def add(self, path, modname, source):
+        """
+        Add the source of a module to check.
+
+        @param path: the path of the file of the module
+        @param modname: the name of the module
+        @param source: the source
+        @type source: L{bytes}
+        """
+        self._sources[os.path.abspath(path)] = source
+        self._paths[modname] = os.path.abspath(path)
+        self._modules.append({"path": path, "name": modname, "isarg": True,
+                              "basepath": path, "basename": modname})
+
+
+    def get(self, path):
+        """
+        Get the source of a module held in memory.
+
+        @param path: the path of the file of the module
+        @return: the source, or C{None} if it is not held in memory
+        @rtype: L{bytes}
+        """
+        return self._sources.get(os.path.abspath(path))
+
+
+    def readSource(self, path):
+        """
+        Read the source of a module, from memory or from its file.
+
+        @param path: the path of the file of the module
+        @return: the source
+        @rtype: L{bytes}
+        @raise IOError: if the file can not be read
+        """
+        source = self.get(path)
+        if source is None:
+            with open(path, "rb") as f:
+                source = f.read()
+        return source
+
+
+    def iterSources(self):
+        """
+        Iterate over the modules held in memory.
+
+        @return: an iterator of pairs of the path of a module and of its
+            source
+        """
+        for descr in self._modules:
+            yield descr["path"], self.get(descr["path"])
+
+
+    def iterModules(self, filesOrModules=None):
+        """
+        Yield the descriptions of the modules held in memory, like
+        L{pylint.lint.PyLinter.expand_files} does for the modules to check.
+
+        @param filesOrModules: ignored, the modules are the ones added
+        """
+        for descr in self._modules:
+            yield dict(descr)
+
+
+    def __len__(self):
+        """
+        Get the number of modules held in memory.
+        """
+        return len(self._modules)
+
+
+    def buildModule(self, path, modname):
+        """
+        Build the astroid tree of a module from its source, like
+        L{AstroidBuilder.file_build} builds it from its file.
+
+        @param path: the path of the file of the module
+        @param modname: the name of the module
+        @return: the tree, cached by astroid
+        @raise AstroidBuildingError: if the source can not be built
+        """
+        source = self.get(path)
+        try:
+            data, encoding = decodeSource(source)
+        except (SyntaxError, LookupError) as e:
+            raise AstroidSyntaxError(
+                "Python 3 encoding specification error or unknown encoding:\n"
+                "{error}", modname=modname, path=path, error=e)
+        except UnicodeError:
+            raise AstroidBuildingError(
+                "Wrong or no encoding specified for {filename}.",
+                filename=path)
+        builder = AstroidBuilder(MANAGER)
+        module = builder._data_build(data, modname, path)
+        module.file_bytes = source
+        return builder._post_build(module, encoding)
+
+
+    def install(self):
+        """
+        Make astroid build the trees of the modules held in memory from
+        their sources, including when they are imported by name, as their
+        files may not exist.
+
+        @return: a callable restoring the building of trees from files
+        """
+        astFromFile = MANAGER.ast_from_file
+        astFromModuleName = MANAGER.ast_from_module_name
+
+        def memoryAstFromFile(filepath, modname=None, fallback=True,
+                              source=False):
+            if self.get(filepath) is None:
+                return astFromFile(filepath, modname, fallback, source)
+            if modname is None:
+                modname = getFileModuleName(filepath)
+            cached = MANAGER.astroid_cache.get(modname)
+            if cached is not None and cached.file_bytes is self.get(filepath):
+                return cached
+            return self.buildModule(filepath, modname)
+
+        def memoryAstFromModuleName(modname, context_file=None):
+            path = self._paths.get(modname)
+            if path is None:
+                return astFromModuleName(modname, context_file)
+            return memoryAstFromFile(path, modname)
+        MANAGER.ast_from_file = memoryAstFromFile
+        MANAGER.ast_from_module_name = memoryAstFromModuleName
+
+        def uninstall():
+            del MANAGER.ast_from_file
+            del MANAGER.ast_from_module_name
+        return uninstall
+
+
+
+__all__ = ["SourceStore", "decodeSource", "getFileModuleName"]
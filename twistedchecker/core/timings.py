@@ -0,0 +1,112 @@
+# -*- test-case-name: twistedchecker.test.test_timings -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+The time taken to check each module, recorded from a run to another.
+
+Parallel runs check the most expensive modules first, so that a huge
+module is not left for last while the other workers are idle.
+"""
+
+import os
+
+from twistedchecker.core.cache import loadCache, saveCache
+
+
+# Seconds taken to check a byte of source, used to estimate the cost of
+# modules when no module was timed yet. Only the order of the estimates
+# matters.
+DEFAULT_SECONDS_PER_BYTE = 1e-6
+
+
+
+class TimingHistory(object):
+    """
+    The time taken by the last check of modules, by module path.
+
+    Entries are C{dict}s with the C{seconds} taken to check a module and its
+    C{size} at the time.
+
+    @ivar cacheDir: the cache directory, or C{None}
+    @ivar readOnly: whether the persisted timings are left alone
+    """
+    cacheName = "timings"
+
+    def __init__(self, cacheDir=None, readOnly=False):
+        """
+        Load the timings persisted by previous runs.
+
+        @param cacheDir: the cache directory, or C{None} to not persist
+            the timings
+        @param readOnly: whether to leave the persisted timings alone
+        """
+        self.cacheDir = cacheDir
+        self.readOnly = readOnly
+        self._timingsByPath = loadCache(cacheDir, self.cacheName)
+        self._changed = False
+        self._secondsPerByte = None
+
+
+    def getSecondsPerByte(self):
+        """
+        Get the average time taken to check a byte of source.
+
+        @return: a number of seconds
+        """
+        if self._secondsPerByte is None:
+            seconds = sum(timing["seconds"]
+                          for timing in self._timingsByPath.values())
+            size = sum(timing["size"]
+                       for timing in self._timingsByPath.values())
+            self._secondsPerByte = DEFAULT_SECONDS_PER_BYTE
+            if seconds > 0 and size > 0:
+                self._secondsPerByte = float(seconds) / size
+        return self._secondsPerByte
+
+
+    def getCost(self, path):
+        """
+        Get the expected time needed to check a module.
+
+        @param path: path of the module
+        @return: the time taken by its last check, or an estimate from its
+            size if it was never timed
+        """
+        timing = self._timingsByPath.get(path)
+        if timing is not None:
+            return timing["seconds"]
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        return size * self.getSecondsPerByte()
+
+
+    def record(self, path, seconds):
+        """
+        Record the time taken to check a module.
+
+        @param path: path of the module
+        @param seconds: the time taken
+        """
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        self._timingsByPath[path] = {"seconds": seconds, "size": size}
+        self._changed = True
+
+
+    def save(self):
+        """
+        Persist the timings if any was recorded.
+        """
+        if self.readOnly or not self._changed:
+            return
+        self._changed = False
+        saveCache(self.cacheDir, self.cacheName, self._timingsByPath)
+
+
+
+__all__ = ["TimingHistory"]
@@ -0,0 +1,361 @@
+# -*- test-case-name: twistedchecker.test.test_treecache -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+A persistent cache of the astroid trees built from sources.
+
+Building the astroid tree of a module is a large part of its check, and is
+needed again whenever any input of its messages changed. The trees are
+kept in the cache directory, under a hash of the source, of the module
+name and path, and of the versions of Python and astroid, and are loaded
+instead of being built again from unchanged sources.
+
+Only the trees given by the rebuilder are kept, before astroid adds the
+names imported by wildcards, the attributes assigned from other modules
+and the results of its transforms, which all refer to the trees of other
+modules. These steps run on every loaded tree, like on a built one.
+
+The cache is bounded by the total size of the trees: the least recently
+used ones are removed once it is exceeded.
+
+Trees are pickled, and loading a pickle can run any code. Cache
+directories are often shared, or restored by continuous integration
+services, so every tree is signed with a key private to the user, kept
+outside of the cache directory, and trees whose signature does not match
+are never unpickled.
+"""
+
+import copyreg
+import gc
+import hashlib
+import hmac
+import os
+import pickle
+import sys
+import tempfile
+import zlib
+
+from io import BytesIO
+
+import astroid
+
+from astroid.__pkginfo__ import version as astroidVersion
+from astroid.builder import AstroidBuilder
+from pylint.__pkginfo__ import version as pylintVersion
+
+
+# Bump this whenever the layout of cached trees changes.
+TREE_CACHE_VERSION = 2
+
+# The size of the signing key and of the signatures of trees.
+KEY_SIZE = 32
+SIGNATURE_SIZE = hashlib.sha256().digest_size
+
+# astroid defines the context of names as an enumeration which can not be
+# found by its name.
+_Context = type(astroid.Load)
+
+
+
+def _getContext(name):
+    """
+    Get the context of a name, when loading a tree.
+
+    @param name: the name of the context, like C{"Load"}
+    @return: the context
+    """
+    return getattr(astroid, name)
+
+
+
+def _reduceContext(context):
+    """
+    Reduce the context of a name to the name of the context, when dumping
+    a tree.
+
+    @param context: the context
+    @return: a reduction for L{pickle}
+    """
+    return _getContext, (context.name,)
+
+
+
+def getTreeKey(source, modname, path):
+    """
+    Get the key of the tree of a module in the cache.
+
+    @param source: the source of the module
+    @type source: L{str}
+    @param modname: name of the module
+    @param path: path of the module
+    @return: a hexadecimal digest
+    """
+    digest = hashlib.sha1()
+    context = [str(TREE_CACHE_VERSION), sys.version, astroidVersion,
+               pylintVersion, modname, path]
+    digest.update(("\0".join(context) + "\0").encode("utf-8"))
+    digest.update(source.encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
+
+
+
+def getKeyPath():
+    """
+    Get the path of the key signing the trees of the user, in the
+    configuration directory of twistedchecker rather than in the cache
+    directory.
+
+    @return: the path of the key
+    """
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(
+        os.path.expanduser("~"), ".config")
+    return os.path.join(base, "twistedchecker", "treecache.key")
+
+
+
+def loadSigningKey(path):
+    """
+    Load the key signing trees, creating it, only readable by the user, if
+    it does not exist yet.
+
+    @param path: the path of the key
+    @return: the key, or C{None} if it can not be read nor created
+    @rtype: L{bytes}
+    """
+    try:
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory, 0o700)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except (IOError, OSError):
+        pass
+    else:
+        with os.fdopen(fd, "wb") as f:
+            f.write(os.urandom(KEY_SIZE))
+    try:
+        with open(path, "rb") as f:
+            key = f.read()
+    except (IOError, OSError):
+        return None
+    if len(key) != KEY_SIZE:
+        return None
+    return key
+
+
+
+class TreeCache(object):
+    """
+    Astroid trees, one signed file per tree in a directory.
+
+    @ivar directory: the directory of the trees
+    @ivar maxBytes: the total size of the trees kept
+    @ivar key: the key signing the trees, or C{None} to neither load nor
+        store trees
+    @ivar hits: number of trees loaded
+    @ivar misses: number of trees missing
+    """
+
+    def __init__(self, directory, maxBytes, key):
+        """
+        @param directory: the directory of the trees
+        @param maxBytes: the total size of the trees kept
+        @param key: the key signing the trees, which must not be readable
+            by whoever can write to the directory of the trees, or C{None}
+            to neither load nor store trees
+        @type key: L{bytes}
+        """
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.key = key
+        self.hits = 0
+        self.misses = 0
+        self._dispatchTable = copyreg.dispatch_table.copy()
+        self._dispatchTable[_Context] = _reduceContext
+
+
+    def getPath(self, key):
+        """
+        Get the path of the file of a tree.
+
+        @param key: the key of the tree
+        """
+        return os.path.join(self.directory, key + ".tree")
+
+
+    def sign(self, data):
+        """
+        Sign the serialization of a tree.
+
+        @param data: the serialization
+        @type data: L{bytes}
+        @return: the signature
+        @rtype: L{bytes}
+        """
+        return hmac.new(self.key, data, hashlib.sha256).digest()
+
+
+    def load(self, key):
+        """
+        Load a tree.
+
+        @param key: the key of the tree
+        @return: the tree, or C{None} if it is not cached, can not be read or
+            was not signed with the key of the cache
+        """
+        if self.key is None:
+            self.misses += 1
+            return None
+        path = self.getPath(key)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+        except (IOError, OSError):
+            self.misses += 1
+            return None
+        signature, data = content[:SIGNATURE_SIZE], content[SIGNATURE_SIZE:]
+        if not hmac.compare_digest(signature, self.sign(data)):
+            # Not stored by this user, never unpickled.
+            self.misses += 1
+            self.remove(path)
+            return None
+        try:
+            # Collecting while loading many linked objects only wastes time.
+            enabled = gc.isenabled()
+            gc.disable()
+            try:
+                module = pickle.loads(zlib.decompress(data))
+            finally:
+                if enabled:
+                    gc.enable()
+        except (pickle.UnpicklingError, zlib.error, EOFError, AttributeError):
+            # A truncated file, or a tree of classes which changed.
+            self.misses += 1
+            self.remove(path)
+            return None
+        self.hits += 1
+        # Mark the tree as used.
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return module
+
+
+    def store(self, key, module):
+        """
+        Store a tree.
+
+        Failing to store a tree is not an error, the tree is simply not
+        cached.
+
+        @param key: the key of the tree
+        @param module: the tree
+        """
+        if self.key is None:
+            return
+        try:
+            data = self.dump(module)
+        except (RecursionError, pickle.PicklingError):
+            # Too deep, or holding something else than nodes.
+            return
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            fd, pathTemp = tempfile.mkstemp(dir=self.directory, prefix=key)
+        except (IOError, OSError):
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self.sign(data))
+                f.write(data)
+            os.replace(pathTemp, self.getPath(key))
+        except (IOError, OSError):
+            self.remove(pathTemp)
+
+
+    def dump(self, module):
+        """
+        Serialize a tree.
+
+        @param module: the tree
+        @return: the compressed serialization
+        @rtype: L{bytes}
+        """
+        stream = BytesIO()
+        pickler = pickle.Pickler(stream, pickle.HIGHEST_PROTOCOL)
+        pickler.dispatch_table = self._dispatchTable
+        pickler.dump(module)
+        return zlib.compress(stream.getvalue(), 1)
+
+
+    def remove(self, path):
+        """
+        Remove a file, if it still exists.
+
+        @param path: the path of the file
+        """
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+    def prune(self):
+        """
+        Remove the least recently used trees until the total size of the
+        trees is within the limit.
+
+        @return: the number of trees removed
+        """
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return 0
+        entries = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        size = sum(entry[1] for entry in entries)
+        removed = 0
+        for _, entrySize, path in entries:
+            if size <= self.maxBytes:
+                break
+            self.remove(path)
+            size -= entrySize
+            removed += 1
+        return removed
+
+
+    def install(self):
+        """
+        Build the trees of the modules of source files from this cache.
+
+        @return: a callable restoring the building of trees from sources
+        """
+        dataBuild = AstroidBuilder._data_build
+        cache = self
+
+        def cachedDataBuild(builder, data, modname, path):
+            if path is None:
+                return dataBuild(builder, data, modname, path)
+            key = getTreeKey(data, modname, path)
+            module = cache.load(key)
+            if module is None:
+                module = dataBuild(builder, data, modname, path)
+                cache.store(key, module)
+            return module
+        AstroidBuilder._data_build = cachedDataBuild
+
+        def uninstall():
+            AstroidBuilder._data_build = dataBuild
+        return uninstall
+
+
+
+__all__ = ["TreeCache", "getKeyPath", "getTreeKey", "loadSigningKey"]
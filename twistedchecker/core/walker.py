@@ -0,0 +1,326 @@
+# -*- test-case-name: twistedchecker.test.test_walker -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Walking of the directories to check, skipping what is not part of them.
+
+Trees usually hold build directories, virtual environments and vendored
+packages which nobody wants checked. The walker skips the files and the
+directories ignored by C{.gitignore} files, and the ones matching the
+globs given with C{--exclude}, and never descends into skipped
+directories, so their files are not even listed.
+
+The globs of C{--exclude} are compiled into a single regular expression.
+Like for flake8, a glob matches the base name of files and directories, or
+their path relative to the working directory.
+"""
+
+import fnmatch
+import os
+import re
+
+
+# Name of the files listing the paths git ignores.
+GITIGNORE = ".gitignore"
+
+
+
+def translateGitignorePattern(pattern):
+    """
+    Translate a pattern of a C{.gitignore} file into a regular expression
+    matching paths relative to the directory of the file.
+
+    @param pattern: the pattern, without negation nor trailing slash
+    @return: the regular expression
+    @rtype: L{str}
+    """
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            parts.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            content = pattern[i + 1:end]
+            if content.startswith("!"):
+                content = "^" + content[1:]
+            parts.append("[%s]" % (content.replace("\\", "\\\\"),))
+            i = end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    regex = "".join(parts)
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+    return "(?s:%s)\\Z" % (regex,)
+
+
+
+class GitignoreRules(object):
+    """
+    The rules of a C{.gitignore} file.
+
+    @ivar base: the directory of the file, the patterns are relative to
+    @ivar prefix: the prefix of the paths under the directory
+    @ivar rules: a list of compiled patterns, with whether they negate
+        and whether they only match directories, in the order of the file
+    """
+
+    def __init__(self, base, lines):
+        """
+        @param base: the directory of the file
+        @param lines: the lines of the file
+        """
+        self.base = base
+        self.prefix = os.path.join(base, "")
+        self.rules = []
+        for line in lines:
+            line = line.rstrip("\n")
+            if not line.endswith("\\ "):
+                line = line.rstrip(" ")
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            directoryOnly = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            self.rules.append(
+                (re.compile(translateGitignorePattern(line)).match,
+                 negated, directoryOnly))
+
+
+    def match(self, relativePath, isDirectory):
+        """
+        Tell whether a path is ignored by the rules.
+
+        @param relativePath: the path relative to the directory of the
+            file, with slashes as separators
+        @param isDirectory: whether the path is a directory
+        @return: C{True} if the path is ignored, C{False} if a negated rule
+            includes it again, C{None} if no rule matches it
+        """
+        for match, negated, directoryOnly in reversed(self.rules):
+            if directoryOnly and not isDirectory:
+                continue
+            if match(relativePath):
+                return not negated
+        return None
+
+
+
+def compileExcludes(globs):
+    """
+    Compile globs of paths to exclude into a single matcher.
+
+    @param globs: the globs, like C{build} or C{*/vendor/*}
+    @return: a callable telling whether a base name or a path matches any
+        of the globs, or C{None} if there are no globs
+    """
+    globs = [glob.rstrip("/" + os.sep) for glob in globs if glob]
+    if not globs:
+        return None
+    return re.compile("|".join(fnmatch.translate(glob)
+                               for glob in globs)).match
+
+
+
+class Walker(object):
+    """
+    Walk directories like L{os.walk}, skipping excluded and ignored files
+    and directories.
+
+    @ivar exclude: the matcher of the globs of excluded paths, or C{None}
+    @ivar gitignore: whether to honour C{.gitignore} files
+    @ivar ceilings: the absolute paths of the directories above which
+        repositories are not looked for, like git's
+        C{GIT_CEILING_DIRECTORIES}
+    """
+
+    def __init__(self, excludes=(), gitignore=True, ceilings=None):
+        """
+        @param excludes: globs of the paths to exclude
+        @param gitignore: whether to honour C{.gitignore} files
+        @param ceilings: the directories above which repositories are not
+            looked for, the ones of C{GIT_CEILING_DIRECTORIES} by default
+        """
+        self.exclude = compileExcludes(excludes)
+        self.gitignore = gitignore
+        if ceilings is None:
+            ceilings = [path for path in os.environ.get(
+                "GIT_CEILING_DIRECTORIES", "").split(os.pathsep) if path]
+        self.ceilings = set(os.path.abspath(path) for path in ceilings)
+        self._rulesByDirectory = {}
+
+
+    def getRules(self, directory):
+        """
+        Get the rules of the C{.gitignore} file of a directory.
+
+        @param directory: an absolute path of a directory
+        @return: the L{GitignoreRules}, or C{None} if the directory has no
+            C{.gitignore} file
+        """
+        if directory not in self._rulesByDirectory:
+            try:
+                with open(os.path.join(directory, GITIGNORE)) as f:
+                    rules = GitignoreRules(directory, f.readlines())
+            except (IOError, OSError, UnicodeDecodeError):
+                rules = None
+            self._rulesByDirectory[directory] = rules
+        return self._rulesByDirectory[directory]
+
+
+    def getParentRules(self, directory):
+        """
+        Get the rules of the C{.gitignore} files of the parents of a
+        directory, up to the root of its git repository.
+
+        @param directory: an absolute path of a directory
+        @return: a list of L{GitignoreRules}, from the root down, empty if
+            the directory is not in a git repository below the ceiling
+            directories
+        """
+        if os.path.exists(os.path.join(directory, ".git")):
+            return []
+        parents = []
+        parent = os.path.dirname(directory)
+        while True:
+            if parent in self.ceilings:
+                # Not in a repository below the ceilings.
+                return []
+            parents.append(parent)
+            if os.path.exists(os.path.join(parent, ".git")):
+                break
+            grandParent = os.path.dirname(parent)
+            if grandParent == parent:
+                # Not in a repository.
+                return []
+            parent = grandParent
+        return [rules for rules in map(self.getRules, reversed(parents))
+                if rules is not None]
+
+
+    def isSkipped(self, path, name, isDirectory, rulesList):
+        """
+        Tell whether a file or a directory is excluded or ignored.
+
+        @param path: the absolute path
+        @param name: the base name
+        @param isDirectory: whether the path is a directory
+        @param rulesList: the L{GitignoreRules} applying to the path
+        """
+        if self.exclude is not None and (
+                self.exclude(name) or self.exclude(os.path.relpath(path))):
+            return True
+        ignored = None
+        for rules in reversed(rulesList):
+            relativePath = path[len(rules.prefix):].replace(os.sep, "/")
+            ignored = rules.match(relativePath, isDirectory)
+            if ignored is not None:
+                break
+        return bool(ignored)
+
+
+    def isExcluded(self, path):
+        """
+        Tell whether a file, or any of its parent directories under the
+        working directory, matches the globs of excluded paths, like for
+        files found while walking directories.
+
+        @param path: the path of the file
+        """
+        if self.exclude is None:
+            return False
+        path = os.path.relpath(path)
+        while path and path != os.curdir and not path.startswith(os.pardir):
+            if self.exclude(os.path.basename(path)) or self.exclude(path):
+                return True
+            path = os.path.dirname(path)
+        return False
+
+
+    def walk(self, top):
+        """
+        Walk a directory top-down, like L{os.walk} with no options.
+
+        The directory itself is walked even if it is excluded or ignored.
+
+        @param top: the path of the directory
+        @return: an iterator of tuples of the path of a directory, the
+            names of its subdirectories and the names of its other files;
+            subdirectories removed from the list are not walked
+        """
+        rulesList = []
+        if self.gitignore:
+            rulesList = self.getParentRules(os.path.abspath(top))
+        return self._walk(top, rulesList)
+
+
+    def _walk(self, top, rulesList):
+        """
+        Walk a directory.
+
+        @param top: the path of the directory
+        @param rulesList: the L{GitignoreRules} of the parent directories
+        """
+        try:
+            entries = list(os.scandir(top))
+        except OSError:
+            return
+        absoluteTop = os.path.abspath(top)
+        if self.gitignore:
+            rules = self.getRules(absoluteTop)
+            if rules is not None:
+                rulesList = rulesList + [rules]
+        dirnames = []
+        filenames = []
+        links = set()
+        for entry in entries:
+            try:
+                isDirectory = entry.is_dir()
+            except OSError:
+                isDirectory = False
+            path = os.path.join(absoluteTop, entry.name)
+            if self.isSkipped(path, entry.name, isDirectory, rulesList):
+                continue
+            if isDirectory:
+                dirnames.append(entry.name)
+                if entry.is_symlink():
+                    links.add(entry.name)
+            else:
+                filenames.append(entry.name)
+        yield top, dirnames, filenames
+        for name in dirnames:
+            # Like os.walk, symbolic links to directories are listed but
+            # not walked.
+            if name not in links:
+                for result in self._walk(os.path.join(top, name),
+                                         rulesList):
+                    yield result
+
+
+
+__all__ = ["GitignoreRules", "Walker", "compileExcludes",
+           "translateGitignorePattern"]
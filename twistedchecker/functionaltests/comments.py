@@ -48,3 +48,9 @@ var = 1 + 2  # \r\n same for inline comments.
 
 # `literal` is fine at the start.
 
+
+someString = '''
+#Strings are never comments, even when they do not start a line.
+'''
+
+someString = "#Nor is this one."
@@ -20,3 +20,9 @@ formattedString = "%d" % (num,)
 # no warnings should be generated
 constantFormat = "a format %(value)s"
 constantFormat % {"value": "value"}
+
+# a mapping used as the value is fine too.
+formattedString = "%s" % {"num": num}
+
+# patterns containing quotes should use a tuple as well.
+formattedString = "don't %d" % num
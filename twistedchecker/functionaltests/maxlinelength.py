@@ -9,3 +9,12 @@ print("this line is long long  long  long long long long long ends at column 81"
 Long url form docstrings are ignored.
 See U{https://thisurlisverylongandwillneverfitinto80columnsnomatterwhat.example.com/somegreatcontent.html}
 """
+
+# The inner lines of multi-line strings are checked when the string starts
+# its line, like docstrings, and are not otherwise.
+"""
+this line is long long  long  long long long long long long long long ends at col 84
+"""
+ignored = """
+this line is long long  long  long long long long long long long long ends at col 84
+"""
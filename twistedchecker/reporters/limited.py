@@ -30,6 +30,11 @@ class LimitedReporter(TextReporter):
     def handle_message(self, msg):
         """
         Manage message of different type and in the context of path.
+
+        Messages are flushed as they are reported, so that the messages of
+        a module show up while the next modules are checked, even when the
+        output is not a terminal.
         """
         if msg.msg_id in self.messagesAllowed:
             super(LimitedReporter, self).handle_message(msg)
+            self.out.flush()
@@ -0,0 +1,76 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Helpers running twistedchecker from the tests.
+"""
+
+from io import StringIO
+
+from twistedchecker.core.runner import Runner
+
+
+# The package of the functional tests, whose modules exercise every checker.
+FUNCTIONAL_TESTS = "twistedchecker.functionaltests"
+
+
+
+def runChecker(testCase, args, options=("--cache-dir=",), command="run",
+               runner=None):
+    """
+    Run twistedchecker like the command line does, until it exits.
+
+    @param testCase: the test running twistedchecker
+    @type testCase: L{twisted.trial.unittest.TestCase}
+    @param args: the arguments following the options
+    @param options: the options given first, by default only disabling the
+        cache directory
+    @param command: the name of the method of the runner to call, like
+        C{"merge"} or C{"audit"}
+    @param runner: the runner, a new one by default
+    @type runner: L{Runner}
+    @return: a 3-tuple of the runner, its exit code and the lines of its
+        output
+    """
+    if runner is None:
+        runner = Runner()
+    output = StringIO()
+    runner.setOutput(output)
+    exception = testCase.assertRaises(SystemExit, getattr(runner, command),
+                                      list(options) + list(args))
+    return runner, exception.code, output.getvalue().splitlines()
+
+
+
+def assertSameResults(testCase, options, args=(FUNCTIONAL_TESTS,),
+                      baseOptions=("--cache-dir=",), normalize=list,
+                      runner=None):
+    """
+    Assert that twistedchecker reports the same messages, with the same exit
+    code, with some options as without them.
+
+    @param testCase: the test running twistedchecker
+    @type testCase: L{twisted.trial.unittest.TestCase}
+    @param options: the options whose results are compared
+    @param args: the arguments following the options, the functional tests
+        by default
+    @param baseOptions: the options given to both runs
+    @param normalize: a callable applied to the lines of both outputs
+        before comparing them, like L{sorted} when the order of messages
+        may differ
+    @param runner: the runner of the run with the options, a new one by
+        default
+    @type runner: L{Runner}
+    @return: the lines of the output of the run with the options
+    """
+    _, expectedCode, expected = runChecker(testCase, args, baseOptions)
+    _, code, output = runChecker(testCase, args,
+                                 list(baseOptions) + list(options),
+                                 runner=runner)
+    testCase.assertEqual((expectedCode, normalize(expected)),
+                         (code, normalize(output)))
+    return output
+
+
+
+__all__ = ["FUNCTIONAL_TESTS", "runChecker", "assertSameResults"]
@@ -0,0 +1,219 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twistedchecker.core.archives}.
+"""
+
+import io
+import os
+import sys
+import tarfile
+import zipfile
+
+from io import StringIO
+
+from astroid import MANAGER
+from twisted.python.filepath import FilePath
+from twisted.trial import unittest
+
+from twistedchecker.core.archives import (ArchiveError, getArchiveModuleName,
+                                          isArchive, iterArchiveFiles)
+from twistedchecker.test.helpers import runChecker
+
+
+# The members of the archives of the tests.
+MEMBERS = [
+    ("demo-1.0/setup.py", b"setup = 1\n"),
+    ("demo-1.0/README", b"Read me.\n"),
+    ("demo-1.0/demo/__init__.py", b""),
+    ("demo-1.0/demo/base.py", b"class Base:\n    pass\n"),
+    ("demo-1.0/demo/sub.py", b"from demo.base import Base\n"
+                             b"class Sub(Base):\n"
+                             b"    x = '" + b"x" * 80 + b"'\n"),
+    ]
+
+# The options of the runs, disabling the messages about missing docstrings,
+# headers and names.
+OPTIONS = ["--cache-dir=", "--disable=W9001,W9002,W9208,C0103"]
+
+
+
+def createTar(path, members):
+    """
+    Create a gzipped tar archive.
+
+    @param path: the path of the archive
+    @param members: pairs of the paths and of the contents of its files
+    """
+    with tarfile.open(path, "w:gz") as archive:
+        for name, content in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+
+
+
+def createZip(path, members):
+    """
+    Create a zip archive.
+
+    @param path: the path of the archive
+    @param members: pairs of the paths and of the contents of its files
+    """
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, content in members:
+            archive.writestr(name, content)
+
+
+
+class ArchiveTests(unittest.TestCase):
+    """
+    Tests for the reading of archives.
+    """
+
+    def setUp(self):
+        """
+        Create a directory for the archives.
+        """
+        self.directory = FilePath(self.mktemp())
+        self.directory.makedirs()
+
+
+    def test_isArchive(self):
+        """
+        Existing files with the extension of an archive are archives.
+        """
+        path = self.directory.child("demo-1.0.tar.gz").path
+        self.assertFalse(isArchive(path))
+        createTar(path, MEMBERS)
+        self.assertTrue(isArchive(path))
+        self.assertFalse(isArchive(self.directory.path))
+
+
+    def test_tar(self):
+        """
+        The files of tar archives accepted are read in the order of the
+        archive, without the leading C{./} of their paths.
+        """
+        path = self.directory.child("demo-1.0.tar.gz").path
+        createTar(path, [("./a.py", b"a = 1\n"), ("b.txt", b"b\n"),
+                         ("c.py", b"c = 1\n")])
+        self.assertEqual(
+            [("a.py", b"a = 1\n"), ("c.py", b"c = 1\n")],
+            list(iterArchiveFiles(path, lambda name: name.endswith(".py"))))
+
+
+    def test_zip(self):
+        """
+        The files of zip archives accepted, like wheels, are read in the
+        order of the archive.
+        """
+        path = self.directory.child("demo-1.0-py3-none-any.whl").path
+        createZip(path, [("b.py", b"b = 1\n"), ("a.py", b"a = 1\n"),
+                         ("c.txt", b"c\n")])
+        self.assertEqual(
+            [("b.py", b"b = 1\n"), ("a.py", b"a = 1\n")],
+            list(iterArchiveFiles(path, lambda name: name.endswith(".py"))))
+
+
+    def test_corrupted(self):
+        """
+        Reading a corrupted archive raises L{ArchiveError}.
+        """
+        for name in ["demo.tar.gz", "demo.zip"]:
+            path = self.directory.child(name)
+            path.setContent(b"not an archive")
+            self.assertRaises(ArchiveError, list,
+                              iterArchiveFiles(path.path, lambda name: True))
+
+
+    def test_getArchiveModuleName(self):
+        """
+        Members are named after the packages of the archive containing
+        them, whatever the directories containing the packages.
+        """
+        packages = ["demo-1.0/src/demo/__init__.py",
+                    "demo-1.0/src/demo/sub/__init__.py"]
+        self.assertEqual("demo.sub.a", getArchiveModuleName(
+            "demo-1.0/src/demo/sub/a.py", packages))
+        self.assertEqual("demo.sub", getArchiveModuleName(
+            "demo-1.0/src/demo/sub/__init__.py", packages))
+        self.assertEqual("setup", getArchiveModuleName("demo-1.0/setup.py",
+                                                       packages))
+
+
+
+class RunnerArchiveTests(unittest.TestCase):
+    """
+    Tests for the checks of archives by the runner.
+    """
+
+    def setUp(self):
+        """
+        Create a source distribution and a wheel, and redirect stdout to a
+        temp C{StringIO} stream.
+        """
+        self.directory = FilePath(self.mktemp())
+        self.directory.makedirs()
+        self.sdist = self.directory.child("demo-1.0.tar.gz").path
+        createTar(self.sdist, MEMBERS)
+        self.wheel = self.directory.child("demo-1.0-py3-none-any.whl").path
+        createZip(self.wheel, [(name.split("/", 1)[1], content)
+                               for name, content in MEMBERS])
+        self.patch(sys, "path", list(sys.path))
+        self.patch(sys, "stdout", StringIO())
+        self.patch(sys, "stderr", StringIO())
+        self.addCleanup(self.forgetModules)
+
+
+    def forgetModules(self):
+        """
+        Remove the modules of the archives from the cache of astroid.
+        """
+        for modname in ["setup", "demo", "demo.base", "demo.sub"]:
+            MANAGER.astroid_cache.pop(modname, None)
+
+
+    def test_sdist(self):
+        """
+        The python files of source distributions are checked under the
+        names of the modules of their packages, and importing modules of
+        the archive finds them in the archive.
+        """
+        _, _, output = runChecker(self, [self.sdist], OPTIONS)
+        self.assertEqual(["************* Module demo.sub",
+                          "C0301:3 Line too long (90/79)"], output)
+        self.assertEqual(
+            os.path.join(self.sdist, "demo-1.0", "demo", "base.py"),
+            MANAGER.astroid_cache["demo.base"].file)
+
+
+    def test_wheel(self):
+        """
+        The python files of wheels are checked.
+        """
+        _, _, output = runChecker(self, [self.wheel], OPTIONS + ["--fast=y"])
+        self.assertEqual(["************* Module demo.sub",
+                          "C0301:3 Line too long (90/79)"], output)
+
+
+    def test_otherFiles(self):
+        """
+        Archives can not be checked with other files.
+        """
+        _, code, _ = runChecker(self, [self.sdist, self.directory.path],
+                                OPTIONS)
+        self.assertEqual(32, code)
+        self.assertIn("is not an archive", sys.stderr.getvalue())
+
+
+    def test_corrupted(self):
+        """
+        Checking a corrupted archive exits with an error.
+        """
+        corrupted = self.directory.child("corrupted.zip")
+        corrupted.setContent(b"not an archive")
+        _, code, _ = runChecker(self, [corrupted.path], OPTIONS)
+        self.assertEqual(32, code)
+        self.assertIn("Error: can not read", sys.stderr.getvalue())
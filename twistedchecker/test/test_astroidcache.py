@@ -0,0 +1,117 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twistedchecker.core.astroidcache}.
+"""
+
+import sys
+
+from io import StringIO
+
+import astroid
+
+from twisted.python.filepath import FilePath
+from twisted.trial import unittest
+
+from twistedchecker.core.astroidcache import BoundedModuleCache
+from twistedchecker.test.helpers import assertSameResults
+
+
+
+class BoundedModuleCacheTests(unittest.TestCase):
+    """
+    Tests for L{BoundedModuleCache}.
+    """
+
+    def setUp(self):
+        """
+        Create modules of different sizes, cached by astroid until the end
+        of the test only.
+        """
+        self.patch(astroid.MANAGER, "astroid_cache",
+                   dict(astroid.MANAGER.astroid_cache))
+        directory = FilePath(self.mktemp())
+        directory.makedirs()
+        self.modules = {}
+        for name, size in [("a", 10), ("b", 20), ("c", 30)]:
+            path = directory.child(name + ".py")
+            source = "#" * (size - 1) + "\n"
+            path.setContent(source.encode("ascii"))
+            self.modules[name] = astroid.parse(source, name, path.path)
+
+
+    def fillCache(self, cache):
+        """
+        Add the modules to a cache, from C{a} to C{c}.
+
+        @param cache: the cache
+        """
+        for name in sorted(self.modules):
+            cache.setdefault(name, self.modules[name])
+
+
+    def test_maxModules(self):
+        """
+        The least recently used modules are evicted once the cache holds
+        more modules than allowed.
+        """
+        cache = BoundedModuleCache(maxModules=2)
+        self.fillCache(cache)
+        self.assertIs(self.modules["a"], cache["a"])
+        self.assertEqual(1, cache.evict())
+        self.assertEqual(["c", "a"], list(cache))
+        self.assertEqual(1, cache.evicted)
+        self.assertEqual(0, cache.evict())
+
+
+    def test_maxBytes(self):
+        """
+        The least recently used modules are evicted once the sources of
+        the modules in the cache are bigger than allowed.
+        """
+        cache = BoundedModuleCache(maxBytes=50)
+        self.fillCache(cache)
+        self.assertEqual(60, cache.getSize())
+        cache.get("a")
+        cache.evict()
+        self.assertEqual(["c", "a"], list(cache))
+        self.assertEqual(40, cache.getSize())
+
+
+    def test_keep(self):
+        """
+        The modules to keep and the builtins are never evicted.
+        """
+        cache = BoundedModuleCache(maxModules=1)
+        self.fillCache(cache)
+        cache["builtins"] = astroid.MANAGER.builtins_module
+        cache.get("a")
+        self.assertEqual(2, cache.evict(keep=("b",)))
+        self.assertEqual(["b", "builtins"], list(cache))
+
+
+
+class InstallModuleCacheTests(unittest.TestCase):
+    """
+    Tests for the bounded cache installed by the runner.
+    """
+
+    def setUp(self):
+        """
+        Redirect stdout to a temp C{StringIO} stream, and restore the cache
+        of astroid afterwards.
+        """
+        self.patch(sys, "stdout", StringIO())
+        self.patch(astroid.MANAGER, "astroid_cache",
+                   astroid.MANAGER.astroid_cache)
+
+
+    def test_sameResults(self):
+        """
+        The same messages are reported when trees are evicted.
+        """
+        assertSameResults(self, ["--max-astroid-modules=2"])
+        cache = astroid.MANAGER.astroid_cache
+        self.assertIsInstance(cache, BoundedModuleCache)
+        self.assertTrue(cache.evicted > 0)
@@ -0,0 +1,219 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twistedchecker.core.audit}.
+"""
+
+import json
+import os
+import sys
+
+from io import StringIO
+
+from astroid import MANAGER
+from twisted.python.procutils import which
+from twisted.trial import unittest
+
+from twistedchecker.core.audit import (getTreeModuleName, iterCommits,
+                                       iterTreeChanges, listTree)
+from twistedchecker.core.gitstore import GitError, runGit
+from twistedchecker.core.runner import Runner
+from twistedchecker.test.helpers import runChecker
+from twistedchecker.test.test_gitstore import commit, createRepository
+
+
+
+class TreeTests(unittest.TestCase):
+    """
+    Tests for the listing of the files of commits.
+    """
+    if not which("git"):
+        skip = "git is not installed"
+
+    def setUp(self):
+        """
+        Create a repository with two commits.
+        """
+        self.addCleanup(os.chdir, os.getcwd())
+        self.root = createRepository(self.mktemp())
+        package = self.root.child("pkg")
+        package.child("a.py").setContent(b"a = 2\n")
+        package.child("b.py").remove()
+        runGit(["add", "-A", "pkg"])
+        commit()
+        self.commits = iterCommits(self.root.path, "HEAD")
+
+
+    def test_iterCommits(self):
+        """
+        Commits are listed oldest first, with their parent.
+        """
+        first, second = self.commits
+        self.assertEqual(None, first[1])
+        self.assertEqual(first[0], second[1])
+
+
+    def test_iterCommitsError(self):
+        """
+        Listing an invalid range raises L{GitError}.
+        """
+        self.assertRaises(GitError, iterCommits, self.root.path,
+                          "no-such-ref")
+
+
+    def test_listTree(self):
+        """
+        The files of a commit are listed with their blobs.
+        """
+        files = listTree(self.root.path, self.commits[0][0])
+        self.assertEqual(["pkg/__init__.py", "pkg/a.py", "pkg/b.py"],
+                         sorted(files))
+        self.assertEqual({}, listTree(self.root.path, self.commits[0][0],
+                                      ["other"]))
+
+
+    def test_iterTreeChanges(self):
+        """
+        The files modified by a commit are listed with their new blob, and
+        the deleted files without blob.
+        """
+        (first, _), (second, _) = self.commits
+        changes = dict(iterTreeChanges(self.root.path, first, second))
+        self.assertEqual(["pkg/a.py", "pkg/b.py"], sorted(changes))
+        self.assertEqual(listTree(self.root.path, second)["pkg/a.py"],
+                         changes["pkg/a.py"])
+        self.assertIdentical(None, changes["pkg/b.py"])
+
+
+    def test_getTreeModuleName(self):
+        """
+        Modules are named from the packages of the commit containing them.
+        """
+        packages = ["pkg/__init__.py", "pkg/sub/__init__.py",
+                    "tools/sub/__init__.py"]
+        self.assertEqual("pkg.sub.a",
+                         getTreeModuleName("pkg/sub/a.py", packages))
+        self.assertEqual("pkg", getTreeModuleName("pkg/__init__.py",
+                                                  packages))
+        self.assertEqual("b", getTreeModuleName("tools/sub/b.py", packages))
+
+
+
+class RunnerAuditTests(unittest.TestCase):
+    """
+    Tests for the audits of the history by the runner.
+    """
+    if not which("git"):
+        skip = "git is not installed"
+
+    def setUp(self):
+        """
+        Create a repository with a history changing a module with a long
+        line, and a base class, and redirect stdout to a temp C{StringIO}
+        stream.
+        """
+        self.addCleanup(os.chdir, os.getcwd())
+        self.root = createRepository(self.mktemp())
+        self.package = self.root.child("pkg")
+        self.commitFiles(("a.py", b"a = '" + b"a" * 80 + b"'\n"),
+                         ("base.py", b"class Base:\n    pass\n"),
+                         ("b.py", b"from pkg.base import Base\n"
+                                  b"class B(Base):\n    pass\n"))
+        self.commitFiles(("a.py", b"a = 3\n"))
+        self.commitFiles(("base.py", b"class Base:\n    pass\n"
+                                     b"class Other:\n    pass\n"))
+        self.commitFiles(("a.py", b"a = '" + b"a" * 80 + b"'\n"))
+        self.cacheDir = self.mktemp()
+        self.patch(sys, "path", list(sys.path))
+        self.patch(sys, "stdout", StringIO())
+        self.addCleanup(self.forgetModules)
+
+
+    def commitFiles(self, *files):
+        """
+        Commit new contents of modules of the package.
+
+        @param files: pairs of the names and of the contents of the files
+        """
+        for name, content in files:
+            self.package.child(name).setContent(content)
+        runGit(["add", "pkg"])
+        commit()
+
+
+    def forgetModules(self):
+        """
+        Remove the modules of the package from the cache of astroid.
+        """
+        for modname in ["pkg", "pkg.a", "pkg.b", "pkg.base"]:
+            MANAGER.astroid_cache.pop(modname, None)
+
+
+    def runAudit(self, *args):
+        """
+        Audit the history of the repository.
+
+        @param args: the arguments following the options
+        @return: the records of the commits
+        """
+        _, code, output = runChecker(
+            self, args, ["--cache-dir=" + self.cacheDir,
+                         "--disable=W9001,W9002,W9208,C0103"], "audit")
+        self.assertEqual(0, code)
+        return [json.loads(line) for line in output]
+
+
+    def test_audit(self):
+        """
+        The messages of every commit are counted, and only the modules
+        changed by a commit, or depending on the modules changed, are
+        checked.
+        """
+        records = self.runAudit("HEAD")
+        self.assertEqual(
+            [(3, 3, {}), (4, 3, {"C0301": 1}), (4, 1, {}), (4, 2, {}),
+             (4, 0, {"C0301": 1})],
+            [(record["modules"], record["checked"], record["counts"])
+             for record in records])
+        self.assertEqual([0, 1, 0, 0, 1],
+                         [record["messages"] for record in records])
+        self.assertEqual([commit for commit, _
+                          in iterCommits(self.root.path, "HEAD")],
+                         [record["commit"] for record in records])
+
+
+    def test_cachedBlobs(self):
+        """
+        Blobs already checked, by the same audit or by a previous one, are
+        not checked again.
+        """
+        self.runAudit("HEAD")
+        records = self.runAudit("HEAD")
+        self.assertEqual([0, 0, 0, 0, 0],
+                         [record["checked"] for record in records])
+        self.assertEqual([0, 1, 0, 0, 1],
+                         [record["messages"] for record in records])
+
+
+    def test_range(self):
+        """
+        Only the commits of the range are audited, and only the modules
+        under the paths given.
+        """
+        records = self.runAudit("HEAD~2..HEAD", "pkg/a.py")
+        self.assertEqual([(1, 1, {}), (1, 1, {"C0301": 1})],
+                         [(record["modules"], record["checked"],
+                           record["counts"]) for record in records])
+
+
+    def test_invalidRange(self):
+        """
+        Auditing an invalid range exits with an error.
+        """
+        self.patch(sys, "stderr", StringIO())
+        runner = Runner()
+        exception = self.assertRaises(SystemExit, runner.audit,
+                                      ["no-such-ref"])
+        self.assertEqual(32, exception.code)
+        self.assertIn("Error: ", sys.stderr.getvalue())
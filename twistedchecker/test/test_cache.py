@@ -0,0 +1,60 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twistedchecker.core.cache}.
+"""
+
+import os
+
+from twisted.python.filepath import FilePath
+from twisted.trial import unittest
+
+from twistedchecker.core.cache import (getCacheDirectory, loadCache,
+                                       saveCache)
+
+
+
+class CacheTests(unittest.TestCase):
+    """
+    Tests for the persistence of caches.
+    """
+
+    def test_getCacheDirectory(self):
+        """
+        The configured directory is used, an empty value disables
+        persistence, and the default is in the user cache directory.
+        """
+        self.patch(os, "environ", {"XDG_CACHE_HOME": "/cache"})
+        self.assertEqual("foo", getCacheDirectory("foo"))
+        self.assertIsNone(getCacheDirectory(""))
+        self.assertEqual(os.path.join("/cache", "twistedchecker"),
+                         getCacheDirectory(None))
+
+
+    def test_roundTrip(self):
+        """
+        Saved documents are loaded back.
+        """
+        cacheDir = self.mktemp()
+        saveCache(cacheDir, "foo", {"bar": [1, 2]})
+        self.assertEqual({"bar": [1, 2]}, loadCache(cacheDir, "foo"))
+        self.assertEqual({}, loadCache(cacheDir, "other"))
+
+
+    def test_notPersisted(self):
+        """
+        Without a cache directory nothing is saved and nothing is loaded.
+        """
+        saveCache(None, "foo", {"bar": 1})
+        self.assertEqual({}, loadCache(None, "foo"))
+
+
+    def test_corrupted(self):
+        """
+        A document which can not be parsed is treated as empty.
+        """
+        cacheDir = FilePath(self.mktemp())
+        cacheDir.makedirs()
+        cacheDir.child("foo.json").setContent(b"{not json")
+        self.assertEqual({}, loadCache(cacheDir.path, "foo"))
@@ -0,0 +1,276 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twistedchecker.core.classindex}.
+"""
+
+import sys
+
+from twisted.python.filepath import FilePath
+from twisted.trial import unittest
+
+from twistedchecker.core.classindex import ClassIndex, moduleNameFromPath
+
+
+
+def createPackage(tempPath):
+    """
+    Create a package whose classes inherit from each other across modules.
+
+    @param tempPath: path of a temporary directory
+    @return: the L{FilePath} of the package
+    """
+    tempDir = FilePath(tempPath)
+    package = tempDir.child("indexed")
+    package.makedirs()
+    package.child("__init__.py").setContent(
+        b"from indexed.base import Base as PublicBase\n")
+    package.child("base.py").setContent(b"""
+from twisted.trial import unittest
+
+class Base(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    class Nested(object):
+        def nestedMethod(self):
+            pass
+""")
+    package.child("derived.py").setContent(b"""
+import indexed
+from . import base
+from .missing import Unknown
+
+class Derived(indexed.PublicBase):
+    if True:
+        def conditional(self):
+            pass
+
+class FromNested(base.Base.Nested):
+    pass
+
+class FromUnknown(Unknown, dict):
+    pass
+""")
+    return package
+
+
+
+class ClassIndexTests(unittest.TestCase):
+    """
+    Tests for L{ClassIndex}.
+    """
+
+    def setUp(self):
+        """
+        Create a package importable from C{sys.path}.
+        """
+        self.package = createPackage(self.mktemp())
+        sys.path.insert(0, self.package.parent().path)
+        self.addCleanup(sys.path.remove, self.package.parent().path)
+
+
+    def test_moduleNameFromPath(self):
+        """
+        Module names are computed from the packages containing the file.
+        """
+        self.assertEqual(
+            "indexed.base",
+            moduleNameFromPath(self.package.child("base.py").path))
+        self.assertEqual(
+            "indexed",
+            moduleNameFromPath(self.package.child("__init__.py").path))
+
+
+    def test_ancestorsAcrossModules(self):
+        """
+        Bases are resolved through imports, re-exports and relative imports,
+        including modules outside of the indexed paths.
+        """
+        index = ClassIndex()
+        index.indexPath(self.package.path)
+        ancestors, complete = index.lookupAncestors(
+            "indexed.derived", "Derived")
+        names = [qualname for _, qualname in ancestors]
+        self.assertTrue(complete)
+        self.assertEqual(("indexed.base", "Base"), ancestors[0])
+        self.assertIn("TestCase", names)
+        self.assertIn("setUp", index.getMethods(*ancestors[0]))
+        self.assertEqual(["conditional"],
+                         index.getMethods("indexed.derived", "Derived"))
+
+
+    def test_nestedClasses(self):
+        """
+        Nested classes are indexed with their qualified name.
+        """
+        index = ClassIndex()
+        index.indexPath(self.package.path)
+        ancestors, complete = index.lookupAncestors(
+            "indexed.derived", "FromNested")
+        self.assertEqual(("indexed.base", "Base.Nested"), ancestors[0])
+        self.assertEqual(["nestedMethod"], index.getMethods(*ancestors[0]))
+
+
+    def test_unresolvedBases(self):
+        """
+        Bases which can not be resolved are skipped and reported as such,
+        builtin bases are resolved.
+        """
+        index = ClassIndex()
+        ancestors, complete = index.lookupAncestors(
+            "indexed.derived", "FromUnknown")
+        self.assertFalse(complete)
+        self.assertEqual(("builtins", "dict"), ancestors[0])
+        self.assertIn("keys", index.getMethods(*ancestors[0]))
+
+
+    def test_unknownClass(self):
+        """
+        Looking up a class which is not indexed returns C{None}.
+        """
+        index = ClassIndex()
+        self.assertIsNone(index.lookupAncestors("indexed.derived", "Nope"))
+        self.assertIsNone(index.lookupAncestors("no.such.module", "Nope"))
+
+
+    def test_persisted(self):
+        """
+        Summaries are persisted in the cache directory and are reused by
+        the next index for as long as the file is not modified.
+        """
+        cacheDir = self.mktemp()
+        index = ClassIndex(cacheDir)
+        index.indexPath(self.package.path)
+        index.save()
+
+        reloaded = ClassIndex(cacheDir)
+        pathBase = self.package.child("base.py").path
+        self.assertIn(pathBase, reloaded._summariesByPath)
+        summary = reloaded._summariesByPath[pathBase]
+        self.assertIs(summary, reloaded.indexFile(pathBase))
+        self.assertFalse(reloaded._changed)
+
+        self.package.child("base.py").setContent(b"class Base: pass\n")
+        self.assertEqual([], reloaded.indexFile(pathBase)["classes"]
+                         ["Base"]["methods"])
+        self.assertTrue(reloaded._changed)
+
+
+    def test_dependencies(self):
+        """
+        The modules the ancestors of a class were looked up in are its
+        dependencies, including the modules which could not be found, and
+        the modules of a module also include the modules it imports.
+        """
+        index = ClassIndex()
+        index.indexPath(self.package.path)
+        self.assertTrue(
+            {"indexed.derived", "indexed", "indexed.base",
+             "twisted.trial.unittest"}
+            <= index.getAncestorDependencies("indexed.derived", "Derived"))
+        self.assertIn(
+            "indexed.missing",
+            index.getAncestorDependencies("indexed.derived", "FromUnknown"))
+        self.assertEqual(
+            set(), index.getAncestorDependencies("indexed.derived", "Nope"))
+        dependencies = index.getModuleDependencies("indexed.derived")
+        self.assertNotIn("indexed.derived", dependencies)
+        self.assertTrue(
+            {"indexed", "indexed.base", "indexed.missing"} <= dependencies)
+
+
+    def test_moduleDigest(self):
+        """
+        The digest of a module changes with its imports and classes only.
+        """
+        index = ClassIndex()
+        digest = index.getModuleDigest("indexed.base")
+        self.assertIsNone(index.getModuleDigest("indexed.missing"))
+
+        pathBase = self.package.child("base.py")
+        pathBase.setContent(pathBase.getContent() + b"\nx = 1\n")
+        self.assertEqual(digest, ClassIndex().getModuleDigest("indexed.base"))
+        pathBase.setContent(pathBase.getContent() + b"\nclass Other: pass\n")
+        self.assertNotEqual(digest,
+                            ClassIndex().getModuleDigest("indexed.base"))
+
+
+    def test_indexSource(self):
+        """
+        A module indexed from a source held in memory is summarized from
+        that source instead of its file, and the summary is not persisted.
+        """
+        cacheDir = self.mktemp()
+        index = ClassIndex(cacheDir)
+        pathBase = self.package.child("base.py")
+        index.indexSource(pathBase.path, b"class Base(object): pass\n")
+        self.assertEqual(([("builtins", "object")], True),
+                         index.lookupAncestors("indexed.base", "Base"))
+        index.save()
+        ancestors, _ = ClassIndex(cacheDir).lookupAncestors("indexed.base",
+                                                            "Base")
+        self.assertIn("TestCase", [qualname for _, qualname in ancestors])
+
+
+
+class LazyClassIndexTests(unittest.TestCase):
+    """
+    Tests for the modules registered in a L{ClassIndex} and indexed when
+    they are first needed.
+    """
+
+    def setUp(self):
+        """
+        Create a package which can not be imported from C{sys.path}, and an
+        index recording the files it indexes.
+        """
+        self.package = createPackage(self.mktemp())
+        self.index = ClassIndex()
+        self.indexed = []
+        indexFile = self.index.indexFile
+
+        def recordingIndexFile(filepath, modname=None):
+            self.indexed.append(modname)
+            return indexFile(filepath, modname)
+        self.index.indexFile = recordingIndexFile
+
+
+    def test_addModuleFile(self):
+        """
+        Registered modules are only indexed when needed, and other modules
+        are found under the directory of their packages.
+        """
+        self.index.addModuleFile(self.package.child("derived.py").path,
+                                 "indexed.derived")
+        self.assertEqual([], self.indexed)
+        ancestors, _ = self.index.lookupAncestors("indexed.derived",
+                                                  "Derived")
+        self.assertEqual(("indexed.base", "Base"), ancestors[0])
+        self.assertEqual(["indexed.derived", "indexed", "indexed.base"],
+                         self.indexed[:3])
+
+
+    def test_addModuleFileAfterMissing(self):
+        """
+        A module registered after it was found missing is looked for again.
+        """
+        self.assertIsNone(self.index.lookupAncestors("indexed.base", "Base"))
+        self.index.addModuleFile(self.package.child("base.py").path)
+        self.assertIsNotNone(self.index.lookupAncestors("indexed.base",
+                                                        "Base"))
+
+
+    def test_addModuleSource(self):
+        """
+        Registered sources are indexed instead of the files of their
+        modules when needed.
+        """
+        pathBase = self.package.child("base.py")
+        self.index.addModuleSource(pathBase.path,
+                                   b"class Base(object): pass\n",
+                                   "indexed.base")
+        self.assertEqual(([("builtins", "object")], True),
+                         self.index.lookupAncestors("indexed.base", "Base"))
+        self.assertEqual([], self.indexed)
@@ -0,0 +1,163 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twistedchecker.core.discovery}.
+"""
+
+import os
+import re
+import sys
+
+from io import BytesIO, StringIO
+
+from pylint.utils import expand_modules
+from twisted.python.filepath import FilePath
+from twisted.trial import unittest
+
+import twistedchecker
+from twistedchecker.core import discovery
+from twistedchecker.core.discovery import (FileList, iterModules,
+                                           resolveArguments)
+from twistedchecker.test.helpers import runChecker
+
+
+
+class IterModulesTests(unittest.TestCase):
+    """
+    Tests for L{resolveArguments} and L{iterModules}.
+    """
+
+    def expand(self, filesOrModules, blackList=(), blackListRe=()):
+        """
+        Resolve arguments and list all the modules under them.
+
+        @param filesOrModules: names of the files and modules to check
+        @param blackList: base names of ignored files and directories
+        @param blackListRe: compiled regular expressions of ignored names
+        @return: the list of modules and the list of errors
+        """
+        arguments, errors = resolveArguments(filesOrModules, blackList,
+                                             blackListRe)
+        return list(iterModules(arguments, blackList, blackListRe)), errors
+
+
+    def test_likePylint(self):
+        """
+        Modules and errors are the ones pylint lists, in the same order.
+        """
+        workingDir = os.getcwd()
+        os.chdir(os.path.dirname(twistedchecker.__path__[0]))
+        self.addCleanup(os.chdir, workingDir)
+        args = ["twistedchecker.functionaltests",
+                os.path.join("twistedchecker", "checkers"),
+                os.path.join("twistedchecker", "core", "util.py"),
+                "twistedchecker.nosuchmodule"]
+        blackList = ["comment.py"]
+        blackListRe = [re.compile("^header")]
+        modules, errors = self.expand(args, blackList, blackListRe)
+        expectedModules, expectedErrors = expand_modules(args, blackList,
+                                                         blackListRe)
+        self.assertEqual(expectedModules, modules)
+        self.assertEqual([(error["key"], error["mod"])
+                          for error in expectedErrors],
+                         [(error["key"], error["mod"]) for error in errors])
+        self.assertEqual(1, len(errors))
+
+
+    def test_streamed(self):
+        """
+        Modules are found while they are iterated, the ones created after
+        the first module was yielded are found too.
+        """
+        directory = FilePath(self.mktemp())
+        directory.makedirs()
+        directory.child("__init__.py").setContent(b"")
+        self.patch(sys, "path", [directory.dirname()] + sys.path)
+        arguments, _ = resolveArguments([directory.path], (), ())
+        modules = iterModules(arguments, (), ())
+        self.assertEqual(os.path.join(directory.path, "__init__.py"),
+                         next(modules)["path"])
+        directory.child("late.py").setContent(b"")
+        self.assertEqual([directory.child("late.py").path],
+                         [descr["path"] for descr in modules])
+
+
+
+class FileListTests(unittest.TestCase):
+    """
+    Tests for L{FileList}.
+    """
+
+    def setUp(self):
+        """
+        Read lists in small chunks, so that files are split across chunks.
+        """
+        self.patch(discovery, "FILE_LIST_CHUNK_SIZE", 3)
+
+
+    def test_lines(self):
+        """
+        Files listed one per line follow the arguments, blank lines are
+        skipped.
+        """
+        listing = FilePath(self.mktemp())
+        listing.setContent(b"a.py\r\n\nsub/b.py\nc.py")
+        self.assertEqual(["pkg", "a.py", "sub/b.py", "c.py"],
+                         list(FileList(listing.path, ["pkg"])))
+
+
+    def test_nul(self):
+        """
+        Files may be separated by NUL characters, and then hold new lines.
+        """
+        listing = FilePath(self.mktemp())
+        listing.setContent(b"a.py\0new\nline.py\0")
+        self.assertEqual(["a.py", "new\nline.py"],
+                         list(FileList(listing.path)))
+
+
+    def test_stdin(self):
+        """
+        The list is read from the standard input as it is iterated, and
+        can be iterated again.
+        """
+        stdin = BytesIO(b"a.py\nb.py\nc.py\n")
+        fileList = FileList("-", stdin=stdin)
+        files = iter(fileList)
+        self.assertEqual("a.py", next(files))
+        self.assertTrue(stdin.tell() < len(stdin.getvalue()))
+        self.assertEqual(["a.py", "b.py", "c.py"], list(fileList))
+        self.assertEqual(["b.py", "c.py"], list(files))
+        self.assertEqual(["a.py", "b.py", "c.py"], list(fileList))
+
+
+
+class RunnerFileListTests(unittest.TestCase):
+    """
+    Tests for the files listed with C{--files-from}.
+    """
+
+    def setUp(self):
+        """
+        Redirect stdout to a temp C{StringIO} stream.
+        """
+        self.patch(sys, "stdout", StringIO())
+
+
+    def test_sameResults(self):
+        """
+        Listed files and modules are checked like the ones given as
+        arguments, errors included.
+        """
+        modules = ["twistedchecker.nosuchmodule",
+                   "twistedchecker.functionaltests.comments",
+                   "twistedchecker.functionaltests.docstring_pass"]
+        listing = FilePath(self.mktemp())
+        listing.setContent("\n".join(modules[1:]).encode("ascii"))
+        for fast in ["n", "y"]:
+            options = ["--cache-dir=", "--fast=" + fast]
+            self.assertEqual(
+                runChecker(self, modules, options)[1:],
+                runChecker(self, [modules[0]],
+                           options + ["--files-from=" + listing.path])[1:])
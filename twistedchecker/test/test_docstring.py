@@ -1,5 +1,12 @@
+import astroid
+
+from pylint.lint import PyLinter
+from pylint.reporters import CollectingReporter
+from pylint.utils import ASTWalker
+
 from twisted.trial import unittest
 
+from twistedchecker.checkers import docstring
 from twistedchecker.checkers.docstring import DocstringChecker
 
 
@@ -20,3 +27,34 @@ class DocstringTestCase(unittest.TestCase):
         self.assertEqual(indentNoSpace, 0)
         self.assertEqual(indentTwoSpaces, 2)
         self.assertEqual(indentFourSpaces, 4)
+
+
+    def test_disabledMessagesNotComputed(self):
+        """
+        The analysis leading to disabled messages is skipped.
+        """
+        linter = PyLinter()
+        linter.set_reporter(CollectingReporter())
+        linter.open()
+        checker = DocstringChecker(linter)
+        linter.register_checker(checker)
+        linter.disable("W9206")
+        linter.disable("W9208")
+        checker.open()
+        calls = []
+        self.patch(docstring, "_checkIndentationIssue",
+                   lambda *args: calls.append(args))
+        module = astroid.parse('''
+class Foo(object):
+    """
+    Foo.
+      Badly indented.
+    """
+    def bar(self):
+        pass
+''')
+        walker = ASTWalker(linter)
+        walker.add_checker(checker)
+        linter.set_current_module("module")
+        walker.walk(module)
+        self.assertEqual([], calls)
@@ -1,8 +1,11 @@
 from twisted.trial import unittest
 
+from twistedchecker.core import exceptionfinder
+from twistedchecker.core.exceptionfinder import ExceptionCache
 from twistedchecker.core.exceptionfinder import PatternFinder
 from twistedchecker.core.exceptionfinder import findPatternsInFile
 from twistedchecker.core.exceptionfinder import findAllExceptions
+from twistedchecker.core.exceptionfinder import findSourceExceptions
 from twisted.python.filepath import FilePath
 
 
@@ -40,6 +43,47 @@ getattr(obj, "baz_%s" % something)()
         self.assertEqual(patternsClass, {"Bar_"})
 
 
+    def test_findAllExceptionsCached(self):
+        """
+        The patterns found in files are kept in the cache directory, and
+        files are only read again once they are modified.
+        """
+        pathTestFiles = createTestFiles(self.mktemp())
+        cacheDir = self.mktemp()
+        cache = ExceptionCache(cacheDir)
+        self.assertEqual(({"foo_", "baz_"}, {"Bar_"}),
+                         findAllExceptions(pathTestFiles, cache))
+        cache.save()
+
+        moduleA = FilePath(pathTestFiles).child("a.py")
+        reads = []
+        self.patch(exceptionfinder, "findPatternsInFile",
+                   lambda codes, finder: reads.append(codes))
+        cache = ExceptionCache(cacheDir)
+        self.assertEqual(({"foo_", "baz_"}, {"Bar_"}),
+                         findAllExceptions(pathTestFiles, cache))
+        self.assertEqual([], reads)
+
+        moduleA.setContent(b"# No more patterns.\n")
+        self.assertEqual((set(), {"Bar_"}),
+                         findAllExceptions(pathTestFiles, cache))
+        self.assertEqual(["# No more patterns.\n"], reads)
+
+
+    def test_findSourceExceptions(self):
+        """
+        Patterns are found in sources held in memory, in the encoding they
+        declare, skipping the ones which can not be decoded.
+        """
+        sources = [
+            ("a.py", b"# -*- coding: latin-1 -*-\n# \xe9\n"
+                     b"f = getattr(obj, 'foo_' + something)\n"),
+            ("b.py", b"# -*- coding: unknown -*-\n"
+                     b"f = getattr(obj, 'Bar_' + something)\n")]
+        self.assertEqual(({"foo_"}, set()), findSourceExceptions(sources))
+
+
+
 
 def createTestFiles(tempPath):
     """
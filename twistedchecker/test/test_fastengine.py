@@ -0,0 +1,334 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twistedchecker.core.fastengine}.
+"""
+
+import ast
+import sys
+import tokenize
+
+from io import BytesIO, StringIO
+
+import astroid
+
+from pylint.utils import FileState
+from twisted.python.filepath import FilePath
+from twisted.trial import unittest
+
+from twistedchecker.core.fastengine import (FastEngine, _ModuleChecks,
+                                             collectBlockLines)
+from twistedchecker.core.runner import Runner
+from twistedchecker.test.helpers import assertSameResults, runChecker
+
+
+# A module with pragmas at the module, class, function and line levels.
+PRAGMAS_SOURCE = b'''\
+# pylint: disable=W9401
+"""
+Docstring.
+"""
+
+class Foo(object):
+    # pylint: disable=W9208
+    def bar(self):
+        x = 1  # pylint: disable=C0103
+        # pylint: enable=W9208
+        return x
+
+    def baz(self):
+        pass
+
+
+
+def qux():
+    # pylint: disable=W9208,W9202
+    pass
+'''
+
+
+
+class CollectBlockLinesTests(unittest.TestCase):
+    """
+    Tests for L{collectBlockLines}.
+    """
+
+    def getFileState(self, linter, tokens):
+        """
+        Get the state of a module once the pragmas in its tokens are
+        processed.
+
+        @param linter: the linter
+        @param tokens: the tokens of the module
+        @return: a L{FileState}
+        """
+        linter.file_state = FileState("pragmas")
+        linter.process_tokens(tokens)
+        return linter.file_state
+
+
+    def test_sameAsAstroid(self):
+        """
+        Pragmas are applied to the same lines as when they are collected
+        from the astroid tree of the module.
+        """
+        linter = Runner().linter
+        linter.open()
+        linter.set_current_module("pragmas")
+        tokens = list(tokenize.tokenize(BytesIO(PRAGMAS_SOURCE).readline))
+        fileState = self.getFileState(linter, tokens)
+        collectBlockLines(fileState, linter.msgs_store,
+                          ast.parse(PRAGMAS_SOURCE))
+        expected = self.getFileState(linter, tokens)
+        expected.collect_block_lines(linter.msgs_store,
+                                     astroid.parse(PRAGMAS_SOURCE.decode()))
+        self.assertEqual(expected._module_msgs_state,
+                         fileState._module_msgs_state)
+        self.assertEqual(expected._raw_module_msgs_state,
+                         fileState._raw_module_msgs_state)
+        self.assertEqual(expected._effective_max_line_number,
+                         fileState._effective_max_line_number)
+
+
+
+class FastEngineTests(unittest.TestCase):
+    """
+    Tests for L{FastEngine}, run with C{--fast=y}.
+    """
+
+    def setUp(self):
+        """
+        Redirect stdout to a temp C{StringIO} stream.
+        """
+        self.patch(sys, "stdout", StringIO())
+
+
+    def recordingRunner(self, astroidModules):
+        """
+        Create a runner recording the modules astroid trees are built for.
+
+        @param astroidModules: a list to append the names of the modules
+            astroid trees are built for
+        @return: the runner
+        @rtype: L{Runner}
+        """
+        runner = Runner()
+        getAST = runner.linter.get_ast
+
+        def recordingGetAST(filepath, modname):
+            astroidModules.append(modname)
+            return getAST(filepath, modname)
+        self.patch(runner.linter, "get_ast", recordingGetAST)
+        return runner
+
+
+    def test_sameResults(self):
+        """
+        The engine reports the same messages as the checkers.
+        """
+        assertSameResults(self, ["--fast=y"], normalize=sorted)
+
+
+    def test_sameResultsWithPragmas(self):
+        """
+        Messages disabled by pragmas are not reported.
+        """
+        path = FilePath(self.mktemp())
+        path.setContent(PRAGMAS_SOURCE)
+        assertSameResults(self, ["--fast=y"], [path.path], normalize=sorted)
+
+
+    def test_noAstroidTrees(self):
+        """
+        No astroid tree is built when the enabled messages do not need any.
+        """
+        astroidModules = []
+        assertSameResults(self, ["--fast=y"],
+                          baseOptions=["--cache-dir=", "--disable=C0103"],
+                          normalize=sorted,
+                          runner=self.recordingRunner(astroidModules))
+        self.assertEqual([], astroidModules)
+
+
+    def test_astroidTreesForNameChecks(self):
+        """
+        Astroid trees are built for the messages of pylint's name checker.
+        """
+        astroidModules = []
+        module = "twistedchecker.functionaltests.comments"
+        runChecker(self, [module], ["--cache-dir=", "--fast=y"],
+                   runner=self.recordingRunner(astroidModules))
+        self.assertEqual([module], astroidModules)
+
+
+    def test_scopeCache(self):
+        """
+        Functions which did not change are not checked again when a cache
+        directory is given, and the messages reported for them are the
+        same, even when their lines moved.
+        """
+        path = FilePath(self.mktemp())
+        path.setContent(PRAGMAS_SOURCE)
+        options = ["--fast=y", "--cache-dir=" + self.mktemp()]
+        runChecker(self, [path.path], options)
+
+        path.setContent(b"\n\n" + PRAGMAS_SOURCE.replace(b"baz(self)",
+                                                          b"baz(self, a)"))
+        checkedFunctions = []
+        checkFunction = _ModuleChecks.checkFunction
+
+        def recordingCheckFunction(checks, node, parent):
+            checkedFunctions.append(node.name)
+            return checkFunction(checks, node, parent)
+        self.patch(_ModuleChecks, "checkFunction", recordingCheckFunction)
+        _, _, output = runChecker(self, [path.path], options)
+        self.assertEqual(["baz"], checkedFunctions)
+        _, _, expected = runChecker(self, [path.path],
+                                    ["--cache-dir=", "--fast=y"])
+        self.assertEqual(sorted(expected), sorted(output))
+
+
+
+def createPackage(tempPath):
+    """
+    Create a package with a test module whose test case inherits from a
+    class of another module.
+
+    @param tempPath: path of a temporary directory
+    @return: the L{FilePath} of the package
+    """
+    package = FilePath(tempPath).child("cached")
+    package.child("test").makedirs()
+    package.child("__init__.py").setContent(b"")
+    package.child("base.py").setContent(b"""
+from twisted.trial.unittest import TestCase
+
+class Base(TestCase):
+    pass
+""")
+    package.child("other.py").setContent(b"""
+def do_Thing():
+    pass
+""")
+    package.child("test").child("__init__.py").setContent(b"")
+    package.child("test").child("test_foo.py").setContent(b"""
+from cached.base import Base
+
+class FooTest(Base):
+    def test_foo(self):
+        pass
+""")
+    return package
+
+
+
+class ResultCacheTests(unittest.TestCase):
+    """
+    Tests for the result cache of L{FastEngine}.
+    """
+
+    def setUp(self):
+        """
+        Redirect stdout to a temp C{StringIO} stream, create a package
+        importable from C{sys.path} and record the modules checked.
+        """
+        self.patch(sys, "stdout", StringIO())
+        self.package = createPackage(self.mktemp())
+        sys.path.insert(0, self.package.parent().path)
+        self.addCleanup(sys.path.remove, self.package.parent().path)
+        self.cacheDir = self.mktemp()
+        self.checked = []
+        checkModuleSource = FastEngine.checkModuleSource
+
+        def recordingCheckModuleSource(engine, descr, *args):
+            self.checked.append(descr["name"])
+            return checkModuleSource(engine, descr, *args)
+        self.patch(FastEngine, "checkModuleSource",
+                   recordingCheckModuleSource)
+
+
+    def checkPackage(self, args=(), cacheDir=None, paths=None):
+        """
+        Run twistedchecker on the package and get its output.
+
+        @param args: other arguments of the run
+        @param cacheDir: the cache directory, the one of the test by
+            default
+        @param paths: the paths to check, the package by default
+        @return: the output
+        """
+        if cacheDir is None:
+            cacheDir = self.cacheDir
+        if paths is None:
+            paths = [self.package.path]
+        del self.checked[:]
+        _, _, output = runChecker(self, list(args) + paths,
+                                  ["--fast=y", "--cache-dir=" + cacheDir])
+        return sorted(output)
+
+
+    def test_unchanged(self):
+        """
+        Modules which did not change are not checked again and the same
+        messages are reported.
+        """
+        output = self.checkPackage()
+        self.assertEqual(5, len(self.checked))
+        self.assertEqual(output, self.checkPackage())
+        self.assertEqual([], self.checked)
+
+
+    def test_baseClassChanged(self):
+        """
+        Changing a module only invalidates the results of the modules
+        whose classes inherit from its classes.
+        """
+        output = self.checkPackage(["--disable=C0103"])
+        self.assertTrue(any(line.startswith("W9701") for line in output))
+        self.package.child("base.py").setContent(b"""
+class Base(object):
+    pass
+""")
+        output = self.checkPackage(["--disable=C0103"])
+        self.assertEqual(["cached.base", "cached.test.test_foo"],
+                         sorted(self.checked))
+        self.assertFalse(any(line.startswith("W9701") for line in output))
+        self.assertEqual(output, self.checkPackage(["--disable=C0103"],
+                                                   cacheDir=""))
+
+
+    def test_moduleRenamed(self):
+        """
+        Modules whose name changed are checked again, as the messages about
+        test modules and the name of the module in the report depend on it.
+        """
+        test = self.package.child("test")
+        path = test.child("test_foo.py").path
+        test.child("__init__.py").remove()
+        output = self.checkPackage(paths=[path])
+        self.assertIn("************* Module test_foo", output)
+        test.child("__init__.py").setContent(b"")
+        output = self.checkPackage(paths=[path])
+        self.assertEqual(["cached.test.test_foo"], self.checked)
+        self.assertIn("************* Module cached.test.test_foo", output)
+        self.assertEqual(output, self.checkPackage(cacheDir="", paths=[path]))
+
+
+    def test_nameExceptionsChanged(self):
+        """
+        Finding new name exceptions invalidates the results of the modules
+        whose names were checked, while other changes do not.
+        """
+        output = self.checkPackage()
+        self.assertTrue(any(line.startswith("C0103") for line in output))
+        self.package.child("__init__.py").setContent(b"x = 1\n")
+        self.checkPackage()
+        self.assertEqual(["cached"], self.checked)
+
+        self.package.child("__init__.py").setContent(
+            b"getattr(object, 'do_%s' % 'name')\n")
+        output = self.checkPackage()
+        self.assertEqual(5, len(self.checked))
+        self.assertFalse(any(line.startswith("C0103") for line in output))
+        self.assertEqual(output, self.checkPackage(cacheDir=""))
@@ -0,0 +1,114 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twistedchecker.checkers.format}.
+"""
+
+from astroid import MANAGER
+from pylint.lint import PyLinter
+from pylint.reporters import CollectingReporter
+from pylint.utils import tokenize_module
+from twisted.python.filepath import FilePath
+from twisted.trial import unittest
+
+from twistedchecker.checkers.format import TwistedFormatChecker
+
+
+
+class TwistedFormatCheckerTests(unittest.TestCase):
+    """
+    Tests for L{TwistedFormatChecker}.
+    """
+
+    def setUp(self):
+        """
+        Create a linter with only the format checker registered.
+        """
+        self.linter = PyLinter()
+        self.linter.set_reporter(CollectingReporter())
+        self.linter.open()
+        self.checker = TwistedFormatChecker(self.linter)
+        self.linter.register_checker(self.checker)
+
+
+    def checkSource(self, source):
+        """
+        Check a module like pylint does, its raw source first and its
+        tokens then.
+
+        @param source: the source of the module
+        @type source: L{bytes}
+        @return: a list of C{(msgid, line)} tuples for the messages reported
+        """
+        path = FilePath(self.mktemp() + ".py")
+        path.setContent(source)
+        node = MANAGER.ast_from_file(path.path, "module", source=True)
+        self.linter.set_current_module("module", path.path)
+        self.checker.process_module(node)
+        self.checker.process_tokens(tokenize_module(node))
+        return [(message.msg_id, message.line)
+                for message in self.linter.reporter.messages]
+
+
+    def test_longLines(self):
+        """
+        Lines longer than the maximum are reported, unless they contain an
+        URL.
+        """
+        self.assertEqual(
+            [("C0301", 2)],
+            self.checkSource(b"x = 1\n" + b"y = '" + b"y" * 80 + b"'\n"
+                             b"# https://" + b"z" * 80 + b"\n"))
+
+
+    def test_maxLineLength(self):
+        """
+        The maximum length of lines is configurable.
+        """
+        self.linter.global_set_option("max-line-length", 10)
+        self.assertEqual([("C0301", 2)],
+                         self.checkSource(b"x = 1\nxyz = 123456\n"))
+
+
+    def test_multiLineStrings(self):
+        """
+        The inner lines of multi-line strings are only checked when the
+        string starts its line, like the ones of docstrings.
+        """
+        longLine = b"x" * 80 + b"\n"
+        self.assertEqual(
+            [("C0301", 3), ("C0301", 14)],
+            self.checkSource(
+                b'"""\nDocstring.\n' + longLine + b'"""\n'
+                b'x = """\n' + longLine + longLine + b'"""\n'
+                b"if x:\n    f(x, '''\n" + longLine + b"''',\n"
+                b"      '''\n" + longLine + b"''')\n"))
+
+
+    def test_lineLengthDisabled(self):
+        """
+        The lines of modules are not scanned when C0301 is disabled.
+        """
+        self.linter.disable("C0301")
+        self.assertEqual([], self.checkSource(b"x = '" + b"x" * 80 + b"'\n"))
+        self.assertIsNone(self.checker._scan)
+
+
+    def test_badIndentation(self):
+        """
+        Statements not indented by a multiple of the indentation string are
+        reported.
+        """
+        self.assertEqual(
+            [("W0311", 2), ("W0311", 5)],
+            self.checkSource(b"if True:\n  x = 1\nif True:\n"
+                             b"    if x:\n         y = 1\n"))
+
+
+    def test_mixedIndentation(self):
+        """
+        Statements indented with tabs instead of spaces are reported.
+        """
+        self.assertEqual([("W0312", 2)],
+                         self.checkSource(b"if True:\n\tx = 1\n"))
@@ -0,0 +1,172 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twistedchecker.core.fused}.
+"""
+
+import sys
+
+from io import StringIO
+
+from pylint.checkers import BaseChecker
+from pylint.checkers.utils import check_messages
+from pylint.interfaces import IAstroidChecker
+
+from twisted.trial import unittest
+
+from twistedchecker.checkers.header import HeaderChecker
+from twistedchecker.core.fused import FusedChecker
+from twistedchecker.core.runner import Runner
+from twistedchecker.test.helpers import assertSameResults
+
+
+
+class RecordingChecker(BaseChecker):
+    """
+    A checker recording the nodes it visits.
+    """
+    __implements__ = IAstroidChecker
+    name = 'recording'
+    msgs = {
+        'W9991': ('Function', 'A function.', 'recorded-function'),
+        'W9992': ('Class', 'A class.', 'recorded-class'),
+    }
+
+    def __init__(self, linter, events):
+        """
+        Initialize the checker.
+
+        @param linter: the linter
+        @param events: a list to append visits to
+        """
+        BaseChecker.__init__(self, linter)
+        self.events = events
+
+
+    def visit_functiondef(self, node):
+        """
+        Record a function.
+
+        @param node: a function node
+        """
+        self.events.append((self.name, "functiondef", node.name))
+
+
+    @check_messages('W9992')
+    def visit_classdef(self, node):
+        """
+        Record a class.
+
+        @param node: a class node
+        """
+        self.events.append((self.name, "classdef", node.name))
+
+
+    def leave_classdef(self, node):
+        """
+        Record the end of a class.
+
+        @param node: a class node
+        """
+        self.events.append((self.name, "leave_classdef", node.name))
+
+
+
+class FusedCheckerTests(unittest.TestCase):
+    """
+    Tests for L{FusedChecker}.
+    """
+
+    def setUp(self):
+        """
+        Make a linter with two recording checkers.
+        """
+        self.linter = Runner().linter
+        self.events = []
+        self.first = RecordingChecker(self.linter, self.events)
+        self.second = RecordingChecker(self.linter, self.events)
+        self.second.name = 'other'
+        self.linter.register_checker(self.first)
+
+
+    def test_dispatchTable(self):
+        """
+        The handlers of all members are found for each type of node, in the
+        order of the members.
+        """
+        fused = FusedChecker(self.linter, [self.first, self.second])
+        visits, leaves = fused.buildDispatchTable()
+        self.assertEqual([self.first.visit_functiondef,
+                          self.second.visit_functiondef],
+                         visits["functiondef"])
+        self.assertEqual([self.first.leave_classdef,
+                          self.second.leave_classdef],
+                         leaves["classdef"])
+        self.assertNotIn("module", visits)
+
+
+    def test_disabledHandlers(self):
+        """
+        Handlers declaring only disabled messages are left out of the
+        dispatch table.
+        """
+        self.linter.disable('W9992')
+        fused = FusedChecker(self.linter, [self.first])
+        visits, _ = fused.buildDispatchTable()
+        self.assertNotIn("classdef", visits)
+
+
+    def test_open(self):
+        """
+        Once opened, the fused checker has one handler per node type, calling
+        the handlers of the members in turn. A single handler is exposed
+        as is.
+        """
+        fused = FusedChecker(self.linter, [self.first, self.second])
+        fused.open()
+        fused.visit_functiondef(type("Node", (), {"name": "f"}))
+        self.assertEqual([("recording", "functiondef", "f"),
+                          ("other", "functiondef", "f")], self.events)
+
+        fused = FusedChecker(self.linter, [self.first])
+        fused.open()
+        self.assertEqual(self.first.visit_functiondef,
+                         fused.visit_functiondef)
+        self.assertEqual(set(self.first.msgs), set(fused.msgs))
+
+
+
+class FuseCheckersTests(unittest.TestCase):
+    """
+    Tests for L{Runner.fuseCheckers}.
+    """
+
+    def setUp(self):
+        """
+        Redirect stdout to a temp C{StringIO} stream.
+        """
+        self.patch(sys, "stdout", StringIO())
+
+
+    def test_fuseCheckers(self):
+        """
+        The astroid checkers of twistedchecker are replaced by a fused
+        checker, while token checkers and pylint's checkers are left alone.
+        """
+        runner = Runner()
+        headerChecker = runner.getCheckerByName(HeaderChecker)
+        fused = runner.fuseCheckers()
+        self.assertIn(headerChecker, fused.members)
+        self.assertIsNone(runner.getCheckerByName(HeaderChecker))
+        self.assertIn(fused, runner.linter.get_checkers())
+        for member in fused.members:
+            self.assertTrue(type(member).__module__.startswith(
+                "twistedchecker.checkers."))
+
+
+    def test_sameResults(self):
+        """
+        The fused checker reports the same messages as the separate ones.
+        """
+        assertSameResults(self, ["--fused=y"], normalize=sorted)
@@ -0,0 +1,198 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twistedchecker.core.gitstore}.
+"""
+
+import os
+import sys
+
+from io import StringIO
+
+from twisted.python.filepath import FilePath
+from twisted.python.procutils import which
+from twisted.trial import unittest
+
+from twistedchecker.core.gitstore import (BlobReader, GitError,
+                                          getRepositoryRoot, iterStagedBlobs,
+                                          runGit)
+from twistedchecker.test.helpers import runChecker
+
+
+
+def createRepository(tempPath):
+    """
+    Create a repository with a committed package, and make it the working
+    directory.
+
+    @param tempPath: path of a temporary directory
+    @return: the L{FilePath} of the root of the repository
+    """
+    root = FilePath(tempPath)
+    root.makedirs()
+    os.chdir(root.path)
+    runGit(["init", "--quiet"])
+    package = root.child("pkg")
+    package.makedirs()
+    package.child("__init__.py").setContent(b"")
+    package.child("a.py").setContent(b"a = 1\n")
+    package.child("b.py").setContent(b"b = 1\n")
+    runGit(["add", "pkg"])
+    commit()
+    return root
+
+
+
+def commit():
+    """
+    Commit the index of the repository of the working directory.
+    """
+    runGit(["-c", "user.name=twistedchecker",
+            "-c", "user.email=twistedchecker@example.com",
+            "commit", "--quiet", "-m", "Commit."])
+
+
+
+class GitStoreTests(unittest.TestCase):
+    """
+    Tests for the reading of staged files.
+    """
+    if not which("git"):
+        skip = "git is not installed"
+
+    def setUp(self):
+        """
+        Create a repository with staged and unstaged changes.
+        """
+        self.addCleanup(os.chdir, os.getcwd())
+        self.root = createRepository(self.mktemp())
+        package = self.root.child("pkg")
+        package.child("a.py").setContent(b"a = 2\n")
+        package.child("c.py").setContent(b"c = 1\n")
+        self.root.child("README").setContent(b"Read me.\n")
+        runGit(["add", "pkg", "README"])
+        package.child("a.py").setContent(b"a = 3\n")
+        package.child("b.py").setContent(b"b = 3\n")
+
+
+    def readStaged(self, pathspecs=()):
+        """
+        Read the staged files.
+
+        @param pathspecs: the paths to restrict the files to
+        @return: a C{dict} of their content by path
+        """
+        root = getRepositoryRoot()
+        reader = BlobReader(root)
+        try:
+            return dict((path, reader.read(blob)) for path, blob
+                        in iterStagedBlobs(root, pathspecs))
+        finally:
+            reader.close()
+
+
+    def test_getRepositoryRoot(self):
+        """
+        The root of a repository is found from any of its directories.
+        """
+        self.assertEqual(os.path.realpath(self.root.path),
+                         getRepositoryRoot(self.root.child("pkg").path))
+
+
+    def test_error(self):
+        """
+        Failing commands raise L{GitError} with the error of git.
+        """
+        error = self.assertRaises(GitError, runGit,
+                                  ["rev-parse", "--verify", "no-such-ref"])
+        self.assertEqual("fatal: Needed a single revision", str(error))
+
+
+    def test_staged(self):
+        """
+        The staged versions of the added and modified files are read, not
+        the ones of the working tree.
+        """
+        self.assertEqual({"README": b"Read me.\n", "pkg/a.py": b"a = 2\n",
+                          "pkg/c.py": b"c = 1\n"},
+                         self.readStaged())
+
+
+    def test_pathspecs(self):
+        """
+        Files are restricted to the paths given, relative to the working
+        directory.
+        """
+        os.chdir(self.root.child("pkg").path)
+        self.assertEqual({"pkg/c.py": b"c = 1\n"}, self.readStaged(["c.py"]))
+
+
+    def test_noCommit(self):
+        """
+        All the files of the index are staged in a repository without
+        commits.
+        """
+        createRepository(self.mktemp())
+        runGit(["update-ref", "-d", "HEAD"])
+        self.assertEqual(["pkg/__init__.py", "pkg/a.py", "pkg/b.py"],
+                         sorted(self.readStaged()))
+
+
+    def test_missingBlob(self):
+        """
+        Reading a blob which is not in the object store is an error.
+        """
+        reader = BlobReader(self.root.path)
+        self.addCleanup(reader.close)
+        self.assertRaises(GitError, reader.read, "0" * 40)
+
+
+
+class RunnerStagedTests(unittest.TestCase):
+    """
+    Tests for the checks of staged files by the runner.
+    """
+    if not which("git"):
+        skip = "git is not installed"
+
+    def setUp(self):
+        """
+        Stage a module with a long line, removed from the working tree, and
+        redirect stdout to a temp C{StringIO} stream.
+        """
+        self.addCleanup(os.chdir, os.getcwd())
+        self.root = createRepository(self.mktemp())
+        module = self.root.child("pkg").child("a.py")
+        module.setContent(b"a = '" + b"a" * 80 + b"'\n")
+        runGit(["add", "pkg"])
+        module.setContent(b"a = 1\n")
+        self.root.child("pkg").child("d.py").setContent(b"d = 1\n")
+        self.options = ["--staged=y", "--cache-dir=" + self.mktemp(),
+                        "--disable=W9001,W9002,W9208,C0103"]
+        self.patch(sys, "path", list(sys.path))
+        self.patch(sys, "stdout", StringIO())
+
+
+    def test_staged(self):
+        """
+        The staged version of the modified modules is checked under its
+        module name, and the unstaged modules are not checked.
+        """
+        _, _, output = runChecker(self, [], self.options)
+        self.assertEqual(["************* Module pkg.a",
+                          "C0301:1 Line too long (86/79)"], output)
+
+
+    def test_cached(self):
+        """
+        The messages of staged modules are kept in the cache directory, and
+        reported again without checking them while nothing changed.
+        """
+        runner, _, output = runChecker(self, [], self.options)
+        self.assertEqual((0, 1), (runner.resultCache.hits,
+                                  runner.resultCache.misses))
+        runner, _, cachedOutput = runChecker(self, [], self.options)
+        self.assertEqual((1, 0), (runner.resultCache.hits,
+                                  runner.resultCache.misses))
+        self.assertEqual(output, cachedOutput)
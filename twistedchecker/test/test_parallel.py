@@ -0,0 +1,278 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twistedchecker.core.parallel}.
+"""
+
+import gc
+import os
+import sys
+import time
+
+from io import StringIO
+
+from twisted.python.filepath import FilePath
+from twisted.trial import unittest
+
+from twistedchecker.core import parallel
+from twistedchecker.core.parallel import (ForkServer, ParallelChecker,
+                                          getJobCount)
+from twistedchecker.core.runner import Runner
+from twistedchecker.test.helpers import (FUNCTIONAL_TESTS, assertSameResults,
+                                         runChecker)
+from twistedchecker.core.timings import TimingHistory
+
+
+
+class GetJobCountTests(unittest.TestCase):
+    """
+    Tests for L{getJobCount}.
+    """
+
+    def test_jobs(self):
+        """
+        The given number of jobs is used, C{0} means one job per CPU.
+        """
+        self.assertEqual(3, getJobCount(3))
+        self.assertTrue(getJobCount(0) >= 1)
+
+
+
+class ForkServerTests(unittest.TestCase):
+    """
+    Tests for L{ForkServer}.
+    """
+
+    def test_startWorker(self):
+        """
+        Workers are forked by the server, and the objects of the runner are
+        frozen in them.
+        """
+        def work(runner, connection):
+            freezeCount = None
+            if hasattr(gc, "get_freeze_count"):
+                freezeCount = gc.get_freeze_count()
+            connection.send((os.getpid(), os.getppid(), freezeCount))
+            connection.close()
+        self.patch(parallel, "_work", work)
+        server = ForkServer(Runner())
+        self.addCleanup(server.close)
+        if hasattr(gc, "get_freeze_count"):
+            self.assertEqual(0, gc.get_freeze_count())
+        for _ in range(2):
+            pid, connection = server.startWorker()
+            workerPid, parentPid, freezeCount = connection.recv()
+            connection.close()
+            self.assertEqual((pid, server.pid), (workerPid, parentPid))
+            if freezeCount is not None:
+                self.assertTrue(freezeCount > 0)
+
+
+
+class ParallelCheckerTests(unittest.TestCase):
+    """
+    Tests for L{ParallelChecker}.
+    """
+
+    def setUp(self):
+        """
+        Redirect stdout to a temp C{StringIO} stream.
+        """
+        self.patch(sys, "stdout", StringIO())
+
+
+    def test_schedule(self):
+        """
+        Modules are scheduled by decreasing cost.
+        """
+        timings = TimingHistory()
+        modules = [{"path": "a.py"}, {"path": "b.py"}, {"path": "c.py"}]
+        for descr, seconds in zip(modules, [1.0, 3.0, 2.0]):
+            timings.record(descr["path"], seconds)
+        checker = ParallelChecker(Runner(), 2, timings)
+        self.assertEqual([1, 2, 0], checker.schedule(modules))
+
+
+    def test_sameResults(self):
+        """
+        Workers report the same messages as a serial run, in the same
+        order, with the same exit code.
+        """
+        for options in ([], ["--fast=y"]):
+            assertSameResults(self, ["-j", "2"],
+                              baseOptions=["--cache-dir="] + options)
+
+
+    def test_timingsRecorded(self):
+        """
+        The time taken to check each module is recorded in the cache
+        directory.
+        """
+        cacheDir = self.mktemp()
+        module = FilePath(__file__).sibling("test_util.py").path
+        runChecker(self, [module], ["--cache-dir=" + cacheDir, "-j", "2"])
+        self.assertTrue(TimingHistory(cacheDir).getCost(module) > 0)
+
+
+    def test_replaceWorkers(self):
+        """
+        Workers are replaced once they checked the maximum number of
+        modules, and the same messages are reported.
+        """
+        checked = []
+        isExhausted = ParallelChecker.isExhausted
+
+        def recordingIsExhausted(checker, worker, result):
+            checked.append(worker.checked)
+            return isExhausted(checker, worker, result)
+        self.patch(ParallelChecker, "isExhausted", recordingIsExhausted)
+        assertSameResults(self, ["-j", "2", "--max-modules-per-worker=1"])
+        self.assertTrue(len(checked) > 2)
+        self.assertEqual(set([1]), set(checked))
+
+
+    def test_failures(self):
+        """
+        A module whose check takes longer than the timeout, or kills its
+        worker, is reported by a fatal message and the other modules are
+        checked by fresh workers.
+        """
+        checkModule = parallel._checkModule
+
+        def failingCheckModule(runner, descr):
+            if descr["name"].endswith(".comments"):
+                time.sleep(60)
+            elif descr["name"].endswith(".constname"):
+                os._exit(1)
+            return checkModule(runner, descr)
+        self.patch(parallel, "_checkModule", failingCheckModule)
+        _, _, expected = runChecker(self, [FUNCTIONAL_TESTS])
+        _, code, output = runChecker(
+            self, [FUNCTIONAL_TESTS],
+            ["--cache-dir=", "-j", "2", "--timeout=2"])
+        self.assertEqual(1, code & 1)
+        failures = {
+            "twistedchecker.functionaltests.comments":
+                "F9801:1 Checking the module took longer than 2 seconds",
+            "twistedchecker.functionaltests.constname":
+                "F9802:1 Checking the module killed its worker"}
+        self.assertEqual(
+            self.replaceModules(expected, failures),
+            output)
+
+
+    def replaceModules(self, output, failures):
+        """
+        Replace the messages of modules in the output of a run.
+
+        @param output: the lines of the output
+        @param failures: a C{dict} mapping names of modules to the line
+            of their message
+        @return: the lines of the output
+        """
+        prefix = Runner.prefixModuleName
+        lines = []
+        modname = None
+        for line in output:
+            if line.startswith(prefix):
+                modname = line[len(prefix):]
+                if modname in failures:
+                    lines.extend([line, failures[modname]])
+            if modname not in failures:
+                lines.append(line)
+        return lines
+
+
+    def test_isExhausted(self):
+        """
+        A worker is exhausted once it checked the maximum number of modules
+        or once it uses more memory than allowed.
+        """
+        worker = parallel._Worker(None, None)
+        worker.checked = 2
+        checker = ParallelChecker(Runner(), 2, TimingHistory(),
+                                  maxModules=3, maxRSS=1000)
+        self.assertFalse(checker.isExhausted(worker, {"rss": 1000}))
+        self.assertTrue(checker.isExhausted(worker, {"rss": 1001}))
+        worker.checked = 3
+        self.assertTrue(checker.isExhausted(worker, {"rss": 0}))
+        self.assertFalse(ParallelChecker(Runner(), 2, TimingHistory())
+                         .isExhausted(worker, {"rss": 10 ** 12}))
+
+
+    def test_stopDeadWorker(self):
+        """
+        Stopping a worker which already died closes its connection without
+        raising.
+        """
+        connection = BrokenConnection()
+        parallel._Worker(None, connection).stop()
+        self.assertTrue(connection.closed)
+
+
+    def test_sendFailures(self):
+        """
+        A worker which can not be sent a module is killed and replaced, and
+        the module is sent to the fresh worker, or reported by F9802 if it
+        can not be sent either.
+        """
+        workers = []
+        broken = [True, False, True, True]
+
+        def startWorker(checker):
+            connection = BrokenConnection()
+            if not broken[len(workers)]:
+                connection.send = connection.sent.append
+            worker = parallel._Worker(None, connection)
+            self.patch(worker, "kill", connection.close)
+            checker._workers[connection] = worker
+            workers.append(worker)
+            return worker
+        self.patch(ParallelChecker, "startWorker", startWorker)
+        checker = ParallelChecker(Runner(), 1, TimingHistory())
+        checker._modules = [{"path": "a.py"}, {"path": "b.py"}]
+        checker._pending = [1, 0]
+        checker.next(checker.startWorker())
+        self.assertEqual([True, False],
+                         [worker.connection.closed for worker in workers])
+        self.assertEqual([{"path": "a.py"}], workers[1].connection.sent)
+        self.assertEqual([workers[1]], list(checker._workers.values()))
+        self.assertEqual([1], checker._pending)
+        self.assertEqual({}, checker._results)
+
+        checker.next(None)
+        self.assertEqual(4, len(workers))
+        self.assertEqual([], checker._pending)
+        self.assertEqual([1], list(checker._results))
+        self.assertEqual(("F9802", ()), checker._results[1]["failure"])
+        self.assertEqual([workers[1]], list(checker._workers.values()))
+
+
+class BrokenConnection(object):
+    """
+    A connection to a worker which died.
+
+    @ivar closed: whether the connection was closed
+    @ivar sent: the objects sent on the connection
+    """
+
+    def __init__(self):
+        self.closed = False
+        self.sent = []
+
+
+    def send(self, obj):
+        """
+        Fail to send an object, as the worker died.
+
+        @param obj: the object
+        """
+        raise BrokenPipeError()
+
+
+    def close(self):
+        """
+        Close the connection.
+        """
+        self.closed = True
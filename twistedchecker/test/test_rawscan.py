@@ -0,0 +1,93 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twistedchecker.core.rawscan}.
+"""
+
+import astroid
+
+from twisted.python.filepath import FilePath
+from twisted.trial import unittest
+
+from twistedchecker.core import rawscan
+from twistedchecker.core.rawscan import scanModule, scanSource
+
+
+
+class ScanSourceTests(unittest.TestCase):
+    """
+    Tests for L{scanSource}.
+    """
+
+    def test_lineOffsets(self):
+        """
+        The offset of the start of every line is recorded.
+        """
+        scan = scanSource(b"a = 1\n\nb = 2\r\nc")
+        self.assertEqual([0, 6, 7, 14], list(scan.lineOffsets))
+
+
+    def test_header(self):
+        """
+        The header is made of the comment and blank lines at the top of the
+        module.
+        """
+        scan = scanSource(b"#!/usr/bin/python\n\n# Copyright\n"
+                          b'"""\nDoc.\n"""\n# Not header\n')
+        self.assertEqual([(1, b"#!/usr/bin/python"), (2, b""),
+                          (3, b"# Copyright")], scan.headerLines)
+        self.assertEqual(b"#!/usr/bin/python\n\n# Copyright",
+                         scan.getHeader())
+
+
+    def test_longLines(self):
+        """
+        Lines having more characters than the maximum are reported, with a
+        flag telling whether they contain an URL.
+        """
+        scan = scanSource(
+            b"x" * 10 + b"\n" + u"\xe9".encode("utf-8") * 10 + b"\n" +
+            b"x" * 11 + b"\n" + b"# http://" + b"x" * 10 + b"\r\n", 10)
+        self.assertEqual([(3, 11, False), (4, 19, True)], scan.longLines)
+
+
+    def test_noLongLines(self):
+        """
+        Long lines are not looked for without a maximum length.
+        """
+        scan = scanSource(b"x" * 1000)
+        self.assertEqual([], scan.longLines)
+
+
+
+class ScanModuleTests(unittest.TestCase):
+    """
+    Tests for L{scanModule}.
+    """
+
+    def test_shared(self):
+        """
+        A module is scanned once for all the callers, unless long lines are
+        asked with a different maximum.
+        """
+        node = astroid.parse("# Header\nx = 1\n")
+        scan = scanModule(node, 79)
+        self.assertIs(scan, scanModule(node))
+        self.assertIs(scan, scanModule(node, 79))
+        otherScan = scanModule(node, 10)
+        self.assertIsNot(scan, otherScan)
+        self.assertEqual([(1, b"# Header")], otherScan.headerLines)
+
+
+    def test_mmap(self):
+        """
+        Big files are mapped in memory.
+        """
+        self.patch(rawscan, "MMAP_THRESHOLD", 10)
+        path = FilePath(self.mktemp())
+        path.setContent(b"# Header\nx = 1\n")
+        node = astroid.MANAGER.ast_from_file(path.path, "bigmodule")
+        scan = scanModule(node)
+        self.assertEqual([(1, b"# Header")], scan.headerLines)
+        self.assertEqual([0, 9], list(scan.lineOffsets))
@@ -0,0 +1,105 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twistedchecker.core.resolver}.
+"""
+
+import os
+import sys
+
+from astroid.modutils import file_from_modpath
+from twisted.python.filepath import FilePath
+from twisted.trial import unittest
+
+from twistedchecker.core.resolver import ModuleResolver
+
+
+
+class ModuleResolverTests(unittest.TestCase):
+    """
+    Tests for L{ModuleResolver}.
+    """
+
+    def setUp(self):
+        """
+        Put two directories in front of the path, the second one holding a
+        package.
+        """
+        self.first = FilePath(self.mktemp())
+        self.second = FilePath(self.mktemp())
+        package = self.second.child("pkg")
+        package.makedirs()
+        self.first.makedirs()
+        for name in ["__init__.py", "a.py", "b.py"]:
+            package.child(name).setContent(b"")
+        self.patch(sys, "path", [self.first.path, self.second.path]
+                   + sys.path)
+        self.cacheDir = self.mktemp()
+        self.listed = []
+        listdir = os.listdir
+
+        def recordingListdir(path):
+            self.listed.append(path)
+            return listdir(path)
+        self.patch(os, "listdir", recordingListdir)
+
+
+    def test_likeAstroid(self):
+        """
+        Modules and packages are found in the files astroid finds them in.
+        """
+        names = ["pkg", "pkg.a", "twisted.internet.reactor",
+                 "twistedchecker.core.util"]
+        resolved = ModuleResolver().resolve(names)
+        self.assertEqual(
+            dict((name, file_from_modpath(name.split("."))) for name in names),
+            resolved)
+
+
+    def test_leftToAstroid(self):
+        """
+        Builtin and missing modules are left to astroid.
+        """
+        resolver = ModuleResolver()
+        self.assertEqual({}, resolver.resolve(["sys", "nosuchmodule"]))
+        self.assertRaises(ImportError, resolver.getModuleFile,
+                          "nosuchmodule")
+
+
+    def test_listedOnce(self):
+        """
+        The directories searched for several modules are listed once.
+        """
+        ModuleResolver().resolve(["pkg.a", "pkg.b"])
+        self.assertEqual(len(self.listed), len(set(self.listed)))
+        self.assertIn(self.second.child("pkg").path, self.listed)
+
+
+    def test_persisted(self):
+        """
+        Modules found by a previous run are found without listing
+        directories, for as long as the directories which decided them
+        did not change.
+        """
+        resolver = ModuleResolver(self.cacheDir)
+        self.assertEqual(self.second.child("pkg").child("a.py").path,
+                         resolver.getModuleFile("pkg.a"))
+        resolver.save()
+        del self.listed[:]
+
+        resolver = ModuleResolver(self.cacheDir)
+        self.assertEqual(self.second.child("pkg").child("a.py").path,
+                         resolver.getModuleFile("pkg.a"))
+        self.assertEqual([], self.listed)
+        self.assertEqual((1, 0), (resolver.hits, resolver.misses))
+
+        shadow = self.first.child("pkg")
+        shadow.makedirs()
+        shadow.child("__init__.py").setContent(b"")
+        shadow.child("a.py").setContent(b"")
+        os.utime(self.first.path, (0, 0))
+        resolver = ModuleResolver(self.cacheDir)
+        self.assertEqual(shadow.child("a.py").path,
+                         resolver.getModuleFile("pkg.a"))
+        self.assertEqual((0, 1), (resolver.hits, resolver.misses))
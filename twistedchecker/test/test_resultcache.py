@@ -0,0 +1,132 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twistedchecker.core.resultcache}.
+"""
+
+import re
+
+from twisted.trial import unittest
+
+from twistedchecker.core.resultcache import ResultCache, getInputDigest
+
+
+
+class GetInputDigestTests(unittest.TestCase):
+    """
+    Tests for L{getInputDigest}.
+    """
+
+    def test_digest(self):
+        """
+        Digests change with the input, regular expressions are described
+        by their pattern and sets do not depend on their order.
+        """
+        digest = getInputDigest({"rgx": re.compile("[a-z]+"), "n": 1})
+        self.assertEqual(digest,
+                         getInputDigest({"n": 1, "rgx": re.compile("[a-z]+")}))
+        self.assertNotEqual(digest,
+                            getInputDigest({"n": 1, "rgx": re.compile("a")}))
+        self.assertEqual(getInputDigest({"b", "a", "c"}),
+                         getInputDigest({"c", "a", "b"}))
+
+
+
+class ResultCacheTests(unittest.TestCase):
+    """
+    Tests for L{ResultCache}.
+    """
+
+    def setUp(self):
+        """
+        Persist an entry of a module depending on a configuration input
+        and on two modules.
+        """
+        self.cacheDir = self.mktemp()
+        self.entry = {"module": "m", "digest": "source",
+                      "configuration": {"fast": "f"},
+                      "modules": {"a": "digestA", "missing": None},
+                      "statements": 3, "messages": []}
+        self.modules = {"a": "digestA"}
+        cache = ResultCache(self.cacheDir)
+        cache.set("m.py", self.entry)
+        cache.save()
+
+
+    def getEntry(self, digest="source", configuration=None, modname="m"):
+        """
+        Get the entry of the module from a new cache.
+
+        @param digest: digest of the source of the module
+        @param configuration: the configuration inputs
+        @param modname: the name of the module
+        @return: the entry, or C{None}
+        """
+        if configuration is None:
+            configuration = {"fast": "f", "other": "o"}
+        return ResultCache(self.cacheDir).get("m.py", modname, digest,
+                                              configuration,
+                                              self.modules.get)
+
+
+    def test_persisted(self):
+        """
+        Entries are persisted, and are valid while their inputs are the
+        same, regardless of the inputs they do not depend on.
+        """
+        self.assertEqual(self.entry, self.getEntry())
+        self.assertEqual(self.entry,
+                         self.getEntry(configuration={"fast": "f",
+                                                      "other": "changed"}))
+
+
+    def test_sourceChanged(self):
+        """
+        Entries are invalidated by a change of the source of the module.
+        """
+        self.assertIsNone(self.getEntry(digest="changed"))
+
+
+    def test_moduleRenamed(self):
+        """
+        Entries are invalidated by a change of the name of the module, as
+        when its directory becomes a package.
+        """
+        self.assertIsNone(self.getEntry(modname="pkg.m"))
+
+
+    def test_configurationChanged(self):
+        """
+        Entries are invalidated by a change of a configuration input they
+        depend on.
+        """
+        self.assertIsNone(self.getEntry(configuration={"fast": "changed"}))
+
+
+    def test_moduleChanged(self):
+        """
+        Entries are invalidated by a change of a module they depend on,
+        including modules appearing.
+        """
+        self.modules["a"] = "changed"
+        self.assertIsNone(self.getEntry())
+        self.modules["a"] = "digestA"
+        self.modules["missing"] = "found"
+        self.assertIsNone(self.getEntry())
+
+
+    def test_otherEntriesKept(self):
+        """
+        Saving the cache keeps the entries of the modules which were not
+        checked again, and counts hits and misses.
+        """
+        cache = ResultCache(self.cacheDir)
+        cache.set("other.py", dict(self.entry))
+        cache.save()
+        cache = ResultCache(self.cacheDir)
+        self.assertIsNotNone(cache.get("m.py", "m", "source", {"fast": "f"},
+                                       self.modules.get))
+        self.assertIsNone(cache.get("other.py", "m", "changed",
+                                    {"fast": "f"}, self.modules.get))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
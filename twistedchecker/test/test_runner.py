@@ -19,7 +19,10 @@ from twisted.trial import unittest
 
 import twistedchecker
 from twistedchecker.core.runner import Runner
+from twistedchecker.checkers.docstring import DocstringChecker
 from twistedchecker.checkers.header import HeaderChecker
+from twistedchecker.checkers.testclassname import TestClassNameChecker
+from twistedchecker.core.parallel import WorkerFailureChecker
 
 from twistedchecker.test.test_exceptionfinder import (
     createTestFiles as createTestFilesForFindingExceptions)
@@ -67,6 +70,8 @@ class RunnerTestCase(unittest.TestCase):
                            [[os.path.join(pathDir, f) for f in files if f.endswith(".py")]
                             for pathDir, _, files in os.walk(pathTests)])
         messagesAllowed = set(Runner.allowedMessagesFromPylint)
+        # The failures of workers can not be reproduced by checking a file.
+        messagesAllowed.update(WorkerFailureChecker.msgs)
         for testfile in testfiles:
             with open(testfile) as f:
                 firstline = f.readline().strip()
@@ -139,6 +144,29 @@ class RunnerTestCase(unittest.TestCase):
         self.assertEqual(type(registeredCheckers[0]), HeaderChecker)
 
 
+    def test_disableFilteredMessages(self):
+        """
+        Messages which the reporter would filter out are disabled in the
+        linter, so that checkers do not compute them.
+        """
+        runner = Runner()
+        runner.linter.reporter.messagesAllowed = {"F0001", "W9001"}
+        runner.disableFilteredMessages()
+        self.assertTrue(runner.linter.is_message_enabled("W9001"))
+        self.assertFalse(runner.linter.is_message_enabled("W9002"))
+        self.assertFalse(runner.linter.is_message_enabled("W9208"))
+
+
+    def test_disableFilteredMessagesOtherReporter(self):
+        """
+        Nothing is disabled when the reporter does not filter messages.
+        """
+        runner = Runner()
+        runner.linter.set_reporter(TextReporter())
+        runner.disableFilteredMessages()
+        self.assertTrue(runner.linter.is_message_enabled("W9208"))
+
+
     def test_allMessagesAreRegistered(self):
         """
         A test to assume all tests are registered to reporter.
@@ -199,6 +227,42 @@ class RunnerTestCase(unittest.TestCase):
         self.assertNotEqual(0, exitResult.code)
 
 
+    def test_runSelect(self):
+        """
+        With C{--select} only the given messages are reported, and only the
+        checkers producing them are run.
+        """
+        runner = Runner()
+        runner.setOutput(self.outputStream)
+
+        exitResult = self.assertRaises(SystemExit, runner.run, [
+            "--select=W9001", "twistedchecker.functionaltests.comments"])
+
+        self.assertEqual(["************* Module "
+                          "twistedchecker.functionaltests.comments",
+                          "W9001:1 Missing copyright header"],
+                         self.outputStream.getvalue().splitlines())
+        self.assertNotEqual(0, exitResult.code)
+        registeredCheckers = sum(list(runner.linter._checkers.values()), [])
+        self.assertEqual(
+            [runner.linter, runner.getCheckerByName(HeaderChecker)],
+            registeredCheckers)
+        self.assertIsNone(runner.classIndex)
+
+
+    def test_pruneCheckers(self):
+        """
+        Checkers whose messages are all disabled once the configuration is
+        complete are unregistered.
+        """
+        runner = Runner()
+        for msgid in HeaderChecker.msgs:
+            runner.linter.disable(msgid)
+        runner.pruneCheckers()
+        self.assertIsNone(runner.getCheckerByName(HeaderChecker))
+        self.assertIsNotNone(runner.getCheckerByName(DocstringChecker))
+
+
     def test_parseWarnings(self):
         """
         Test for twistedchecker.core.runner.Runner.parseWarnings.
@@ -448,3 +512,24 @@ W9001:  1,0: Missing copyright header
         outputResult = self.outputStream.getvalue()
         self.assertEqual(outputResult, predictResult)
         self.assertEqual(16, exitResult.code)
+
+
+    def test_buildClassIndex(self):
+        """
+        The checked modules are registered in the index of classes as they
+        are found, the index is given to the checkers using it and the
+        modules it indexed are persisted in the cache directory.
+        """
+        cacheDir = self.mktemp()
+        runner = self.makeRunner()
+
+        self.assertRaises(SystemExit, runner.run, [
+            "--fast=y", "--cache-dir", cacheDir,
+            "twistedchecker.checkers.header"])
+
+        testClassNameChecker = runner.getCheckerByName(TestClassNameChecker)
+        self.assertIs(runner.classIndex, testClassNameChecker.classIndex)
+        self.assertIsNotNone(runner.classIndex.lookupAncestors(
+            "twistedchecker.checkers.header", "HeaderChecker"))
+        self.assertTrue(
+            os.path.exists(os.path.join(cacheDir, "classindex.json")))
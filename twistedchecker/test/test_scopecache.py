@@ -0,0 +1,78 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twistedchecker.core.scopecache}.
+"""
+
+from twisted.trial import unittest
+
+from twistedchecker.core.scopecache import ScopeCache, getScopeKey
+
+
+
+class GetScopeKeyTests(unittest.TestCase):
+    """
+    Tests for L{getScopeKey}.
+    """
+
+    def test_key(self):
+        """
+        Keys change with the context and the source of the scope.
+        """
+        key = getScopeKey(["a", "b"], b"def f():\n    pass\n")
+        self.assertEqual(key, getScopeKey(["a", "b"],
+                                          b"def f():\n    pass\n"))
+        self.assertNotEqual(key, getScopeKey(["a", "c"],
+                                             b"def f():\n    pass\n"))
+        self.assertNotEqual(key, getScopeKey(["ab"],
+                                             b"def f():\n    pass\n"))
+        self.assertNotEqual(key, getScopeKey(["a", "b"],
+                                             b"def g():\n    pass\n"))
+
+
+
+class ScopeCacheTests(unittest.TestCase):
+    """
+    Tests for L{ScopeCache}.
+    """
+
+    def test_persisted(self):
+        """
+        Entries are persisted in the cache directory.
+        """
+        cacheDir = self.mktemp()
+        cache = ScopeCache(cacheDir)
+        cache.openModule("a.py")
+        self.assertIsNone(cache.get("a.py", "key"))
+        cache.set("a.py", "key", {"statements": 1, "messages": []})
+        cache.save()
+
+        cache = ScopeCache(cacheDir)
+        self.assertEqual({"statements": 1, "messages": []},
+                         cache.get("a.py", "key"))
+        self.assertEqual((1, 0), (cache.hits, cache.misses))
+
+
+    def test_onlyUsedEntries(self):
+        """
+        Only the entries used by the last check of a module are kept, the
+        entries of the other modules are left alone.
+        """
+        cacheDir = self.mktemp()
+        cache = ScopeCache(cacheDir)
+        cache.openModule("a.py")
+        cache.set("a.py", "old", {"statements": 1, "messages": []})
+        cache.openModule("b.py")
+        cache.set("b.py", "other", {"statements": 1, "messages": []})
+        cache.save()
+
+        cache = ScopeCache(cacheDir)
+        cache.openModule("a.py")
+        cache.set("a.py", "new", {"statements": 2, "messages": []})
+        cache.save()
+
+        cache = ScopeCache(cacheDir)
+        self.assertIsNone(cache.get("a.py", "old"))
+        self.assertIsNotNone(cache.get("a.py", "new"))
+        self.assertIsNotNone(cache.get("b.py", "other"))
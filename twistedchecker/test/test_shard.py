@@ -0,0 +1,179 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twistedchecker.core.shard}.
+"""
+
+import sys
+
+from io import StringIO
+
+from pylint.interfaces import HIGH
+from pylint.message import Message
+from twisted.trial import unittest
+
+from twistedchecker.test.helpers import FUNCTIONAL_TESTS, runChecker
+from twistedchecker.core.shard import (getCostShards, getHashShard,
+                                       loadPartialResult, mergePartialResults,
+                                       parseShard, writePartialResult)
+
+
+
+class ShardTests(unittest.TestCase):
+    """
+    Tests for the partition of modules between shards.
+    """
+
+    def test_parseShard(self):
+        """
+        Shards are given as I/N, I starting at 1.
+        """
+        self.assertEqual((2, 5), parseShard("2/5"))
+        for value in ("2", "0/5", "6/5", "a/b"):
+            self.assertRaises(ValueError, parseShard, value)
+
+
+    def test_hashShard(self):
+        """
+        Modules are split between shards by a stable hash of their names.
+        """
+        self.assertEqual(3, getHashShard("twisted.internet.defer", 4))
+        shards = set(getHashShard("module%d" % (i,), 4) for i in range(100))
+        self.assertEqual({1, 2, 3, 4}, shards)
+
+
+    def test_costShards(self):
+        """
+        Modules are balanced between shards by decreasing cost.
+        """
+        self.assertEqual(
+            {"a": 1, "b": 2, "c": 2, "d": 1},
+            getCostShards({"a": 5, "b": 3, "c": 2, "d": 0}, 2))
+
+
+
+class PartialResultTests(unittest.TestCase):
+    """
+    Tests for the partial results of shards.
+    """
+
+    def writeShard(self, shard, messages, status=0):
+        """
+        Write and load a partial result.
+
+        @param shard: the shard of the partial result
+        @param messages: a list of order and message ids
+        @param status: the status of the run
+        @return: the partial result
+        """
+        path = self.mktemp()
+        writePartialResult(path, shard, status, [
+            (order, Message(msgid, "symbol", ("/m.py", "m.py", "m", "", 1, 0),
+                            "text", HIGH))
+            for order, msgid in messages])
+        return loadPartialResult(path)
+
+
+    def test_merge(self):
+        """
+        Messages are merged in the order of a single run, and statuses are
+        combined.
+        """
+        status, messages = mergePartialResults([
+            self.writeShard((2, 2), [((1, 1), "W9001"), ((1, 1), "W9002")],
+                            4),
+            self.writeShard((1, 2), [((1, 0), "W9003"), ((0, 0), "F0001")],
+                            1),
+            ])
+        self.assertEqual(5, status)
+        self.assertEqual(["F0001", "W9003", "W9001", "W9002"],
+                         [msg.msg_id for msg in messages])
+        self.assertEqual(HIGH, messages[0].confidence)
+        self.assertEqual(("/m.py", "m", 1), (messages[0].abspath,
+                                             messages[0].module,
+                                             messages[0].line))
+
+
+    def test_invalidShards(self):
+        """
+        Only the partial results of all the shards of a run are merged.
+        """
+        self.assertRaises(ValueError, mergePartialResults,
+                          [self.writeShard((1, 2), [])])
+        self.assertRaises(ValueError, mergePartialResults,
+                          [self.writeShard((1, 1), []),
+                           self.writeShard((1, 1), [])])
+        self.assertRaises(ValueError, mergePartialResults,
+                          [self.writeShard((1, 1), []),
+                           self.writeShard((1, 2), [])])
+
+
+    def test_notPartialResult(self):
+        """
+        Files which are not partial results are rejected.
+        """
+        path = self.mktemp()
+        with open(path, "w") as f:
+            f.write("{}")
+        self.assertRaises(ValueError, loadPartialResult, path)
+
+
+
+class ShardRunTests(unittest.TestCase):
+    """
+    Tests for sharded runs and L{Runner.merge}.
+    """
+
+    def setUp(self):
+        """
+        Redirect stdout to a temp C{StringIO} stream.
+        """
+        self.patch(sys, "stdout", StringIO())
+
+
+    def test_sameResults(self):
+        """
+        Merging the partial results of all the shards gives the report and
+        the exit code of a single run.
+        """
+        modules = [FUNCTIONAL_TESTS, "no.such.module"]
+        for shardBy in ("hash", "cost"):
+            paths = []
+            for index in range(1, 4):
+                paths.append(self.mktemp())
+                runChecker(self, modules,
+                           ["--cache-dir=", "--shard=%d/3" % (index,),
+                            "--shard-by=" + shardBy,
+                            "--partial-result=" + paths[-1]])
+            self.assertEqual(runChecker(self, modules)[1:],
+                             runChecker(self, paths, (), "merge")[1:])
+
+
+    def test_diff(self):
+        """
+        The merged results can be compared to a previous result.
+        """
+        module = "twistedchecker.functionaltests.comments"
+        path = self.mktemp()
+        _, _, output = runChecker(
+            self, [module],
+            ["--cache-dir=", "--shard=1/1", "--partial-result=" + path])
+        previous = self.mktemp()
+        with open(previous, "w") as f:
+            f.write("\n".join(output) + "\n")
+        self.assertEqual(
+            (0, []),
+            runChecker(self, [path], ["--diff=" + previous], "merge")[1:])
+
+
+    def test_missingShard(self):
+        """
+        Merging without all the shards is an error.
+        """
+        path = self.mktemp()
+        runChecker(self, ["twistedchecker.functionaltests.comments"],
+                   ["--cache-dir=", "--shard=1/2", "--partial-result=" + path])
+        self.patch(sys, "stderr", StringIO())
+        self.assertEqual(32, runChecker(self, [path], (), "merge")[1])
+        self.assertIn("Missing shards: 2.", sys.stderr.getvalue())
@@ -0,0 +1,154 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twistedchecker.core.sources}.
+"""
+
+import sys
+
+from astroid import MANAGER
+from astroid.exceptions import AstroidSyntaxError
+from twisted.python.filepath import FilePath
+from twisted.trial import unittest
+
+from twistedchecker.core.sources import (SourceStore, decodeSource,
+                                         getFileModuleName)
+
+
+
+class DecodeSourceTests(unittest.TestCase):
+    """
+    Tests for L{decodeSource}.
+    """
+
+    def test_declaredEncoding(self):
+        """
+        Sources are decoded with the encoding they declare, and new lines
+        are translated.
+        """
+        self.assertEqual(
+            (u"# coding: latin-1\n# \xe9\n", "iso-8859-1"),
+            decodeSource(b"# coding: latin-1\r\n# \xe9\r\n"))
+
+
+    def test_unknownEncoding(self):
+        """
+        Declaring an unknown encoding is a syntax error.
+        """
+        self.assertRaises(SyntaxError, decodeSource,
+                          b"# coding: unknown\n")
+
+
+
+class SourceStoreTests(unittest.TestCase):
+    """
+    Tests for L{SourceStore}.
+    """
+
+    def setUp(self):
+        """
+        Create a package importable from C{sys.path}, whose module files
+        differ from the sources held in memory.
+        """
+        root = FilePath(self.mktemp())
+        self.package = root.child("inmemory")
+        self.package.makedirs()
+        self.package.child("__init__.py").setContent(b"")
+        self.package.child("a.py").setContent(b"def onDisk(): pass\n")
+        self.package.child("b.py").setContent(
+            b"from inmemory.a import inMemory\n")
+        self.patch(sys, "path", [root.path] + sys.path)
+        self.addCleanup(self.forgetModules)
+        self.sources = SourceStore()
+        self.path = self.package.child("a.py").path
+        self.sources.add(self.path, "inmemory.a", b"def inMemory(): pass\n")
+
+
+    def forgetModules(self):
+        """
+        Remove the modules of the package from the cache of astroid.
+        """
+        for modname in ["inmemory", "inmemory.a", "inmemory.b"]:
+            MANAGER.astroid_cache.pop(modname, None)
+
+
+    def test_getFileModuleName(self):
+        """
+        Files are named after the packages containing them, even when they
+        do not exist.
+        """
+        self.assertEqual("inmemory.a", getFileModuleName(self.path))
+        self.assertEqual("inmemory.c", getFileModuleName(
+            self.package.child("c.py").path))
+
+
+    def test_readSource(self):
+        """
+        Sources are read from memory, or from files for other modules.
+        """
+        self.assertEqual(b"def inMemory(): pass\n",
+                         self.sources.readSource(self.path))
+        self.assertEqual(
+            b"from inmemory.a import inMemory\n",
+            self.sources.readSource(self.package.child("b.py").path))
+
+
+    def test_iterModules(self):
+        """
+        The modules held in memory are described like the modules to check
+        found by the linter.
+        """
+        self.assertEqual([{"path": self.path, "name": "inmemory.a",
+                           "isarg": True, "basepath": self.path,
+                           "basename": "inmemory.a"}],
+                         list(self.sources.iterModules(["ignored"])))
+
+
+    def test_install(self):
+        """
+        Once installed, astroid builds the trees of the modules held in
+        memory from their sources, for the modules importing them too.
+        """
+        uninstall = self.sources.install()
+        try:
+            module = MANAGER.ast_from_file(self.path, "inmemory.a")
+            self.assertIn("inMemory", module.locals)
+            self.assertEqual(b"def inMemory(): pass\n",
+                             module.stream().read())
+            importing = MANAGER.ast_from_module_name("inmemory.b")
+            self.assertEqual("inMemory", next(
+                importing.igetattr("inMemory")).name)
+        finally:
+            uninstall()
+        self.forgetModules()
+        module = MANAGER.ast_from_file(self.path, "inmemory.a")
+        self.assertIn("onDisk", module.locals)
+
+
+    def test_installModuleName(self):
+        """
+        Once installed, astroid finds the modules held in memory by name,
+        even when their files do not exist.
+        """
+        path = self.package.child("missing").child("c.py").path
+        self.sources.add(path, "elsewhere.c", b"def fromMemory(): pass\n")
+        self.addCleanup(MANAGER.astroid_cache.pop, "elsewhere.c", None)
+        uninstall = self.sources.install()
+        try:
+            module = MANAGER.ast_from_module_name("elsewhere.c")
+        finally:
+            uninstall()
+        self.assertEqual(path, module.file)
+        self.assertIn("fromMemory", module.locals)
+
+
+    def test_syntaxError(self):
+        """
+        Sources which can not be parsed raise the errors astroid raises for
+        files.
+        """
+        sources = SourceStore()
+        sources.add(self.path, "inmemory.a", b"def (:\n")
+        self.assertRaises(AstroidSyntaxError, sources.buildModule,
+                          self.path, "inmemory.a")
@@ -0,0 +1,55 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twistedchecker.core.timings}.
+"""
+
+from twisted.python.filepath import FilePath
+from twisted.trial import unittest
+
+from twistedchecker.core.timings import TimingHistory
+
+
+
+class TimingHistoryTests(unittest.TestCase):
+    """
+    Tests for L{TimingHistory}.
+    """
+
+    def setUp(self):
+        """
+        Create two modules of different sizes.
+        """
+        directory = FilePath(self.mktemp())
+        directory.makedirs()
+        self.small = directory.child("small.py")
+        self.small.setContent(b"x = 1\n")
+        self.big = directory.child("big.py")
+        self.big.setContent(b"x = 1\n" * 100)
+
+
+    def test_estimatedCost(self):
+        """
+        The cost of modules which were never timed is estimated from their
+        size, using the average time per byte of the timed modules.
+        """
+        timings = TimingHistory()
+        self.assertTrue(timings.getCost(self.big.path)
+                        > timings.getCost(self.small.path))
+        timings = TimingHistory()
+        timings.record(self.small.path, 6.0)
+        self.assertEqual(600.0, timings.getCost(self.big.path))
+        self.assertEqual(0, timings.getCost(self.big.sibling("no.py").path))
+
+
+    def test_persisted(self):
+        """
+        Timings are persisted in the cache directory.
+        """
+        cacheDir = self.mktemp()
+        timings = TimingHistory(cacheDir)
+        timings.record(self.small.path, 2.0)
+        timings.save()
+        self.assertEqual(2.0,
+                         TimingHistory(cacheDir).getCost(self.small.path))
@@ -0,0 +1,244 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twistedchecker.core.treecache}.
+"""
+
+import os
+import pickle
+import sys
+
+from io import StringIO
+
+import astroid
+
+from astroid.builder import AstroidBuilder
+from twisted.python.filepath import FilePath
+from twisted.trial import unittest
+
+from twistedchecker.test.helpers import runChecker
+from twistedchecker.core.treecache import (TreeCache, getKeyPath,
+                                           getTreeKey, loadSigningKey)
+
+
+SOURCE = u'''\
+"""
+Docstring.
+"""
+a, b = c[0]
+
+class Foo(object):
+    def bar(self, *args):
+        return [x for x in args]
+'''
+
+
+
+class GetTreeKeyTests(unittest.TestCase):
+    """
+    Tests for L{getTreeKey}.
+    """
+
+    def test_inputs(self):
+        """
+        The key changes with the source, the name and the path of the
+        module.
+        """
+        key = getTreeKey(SOURCE, "foo", "foo.py")
+        self.assertEqual(key, getTreeKey(SOURCE, "foo", "foo.py"))
+        self.assertNotEqual(key, getTreeKey(SOURCE + "\n", "foo", "foo.py"))
+        self.assertNotEqual(key, getTreeKey(SOURCE, "bar", "foo.py"))
+        self.assertNotEqual(key, getTreeKey(SOURCE, "foo", "bar.py"))
+
+
+
+class SigningKeyTests(unittest.TestCase):
+    """
+    Tests for L{loadSigningKey}.
+    """
+
+    def test_getKeyPath(self):
+        """
+        The key is kept in the configuration directory of the user.
+        """
+        self.patch(os, "environ", {"XDG_CONFIG_HOME": "/config"})
+        self.assertEqual(
+            os.path.join("/config", "twistedchecker", "treecache.key"),
+            getKeyPath())
+
+
+    def test_created(self):
+        """
+        A random key only readable by the user is created the first time,
+        and loaded the next times.
+        """
+        path = FilePath(self.mktemp()).child("treecache.key")
+        key = loadSigningKey(path.path)
+        self.assertEqual(32, len(key))
+        self.assertEqual(0o600, os.stat(path.path).st_mode & 0o777)
+        self.assertEqual(key, loadSigningKey(path.path))
+        self.assertNotEqual(key, loadSigningKey(self.mktemp()))
+
+
+    def test_invalid(self):
+        """
+        No key is loaded from a file which is not a key.
+        """
+        path = FilePath(self.mktemp())
+        path.setContent(b"short")
+        self.assertIs(None, loadSigningKey(path.path))
+
+
+
+class TreeCacheTests(unittest.TestCase):
+    """
+    Tests for L{TreeCache}.
+    """
+
+    def setUp(self):
+        """
+        Create a module and a cache.
+        """
+        self.directory = FilePath(self.mktemp())
+        self.cache = TreeCache(self.directory.path, 1024 * 1024, b"k" * 32)
+        self.module = FilePath(self.mktemp())
+        self.module.setContent(SOURCE.encode("utf-8"))
+        self.builds = []
+        dataBuild = AstroidBuilder._data_build
+
+        def recordingDataBuild(builder, data, modname, path):
+            self.builds.append(modname)
+            return dataBuild(builder, data, modname, path)
+        self.patch(AstroidBuilder, "_data_build", recordingDataBuild)
+
+
+    def test_loadStored(self):
+        """
+        A stored tree is loaded as it was stored.
+        """
+        module = AstroidBuilder()._data_build(SOURCE, "foo", "foo.py")
+        self.cache.store("key", module)
+        loaded = self.cache.load("key")
+        self.assertEqual(module.as_string(), loaded.as_string())
+        self.assertIs(loaded, loaded.body[0].parent)
+        self.assertIs(astroid.Store, loaded.body[0].targets[0].ctx)
+        self.assertEqual((1, 0), (self.cache.hits, self.cache.misses))
+
+
+    def test_missing(self):
+        """
+        Loading a tree which is not stored gives C{None}.
+        """
+        self.assertIs(None, self.cache.load("key"))
+        self.assertEqual((0, 1), (self.cache.hits, self.cache.misses))
+
+
+    def test_corrupt(self):
+        """
+        A signed tree which can not be loaded is removed.
+        """
+        self.directory.makedirs()
+        path = FilePath(self.cache.getPath("key"))
+        path.setContent(self.cache.sign(b"garbage") + b"garbage")
+        self.assertIs(None, self.cache.load("key"))
+        self.assertFalse(path.exists())
+
+
+    def test_notSigned(self):
+        """
+        A tree stored with another key is not unpickled, and is removed.
+        """
+        module = AstroidBuilder()._data_build(SOURCE, "foo", "foo.py")
+        TreeCache(self.directory.path, 1024 * 1024, b"o" * 32).store(
+            "key", module)
+        loads = []
+        self.patch(pickle, "loads", loads.append)
+        self.assertIs(None, self.cache.load("key"))
+        self.assertEqual([], loads)
+        self.assertFalse(os.path.exists(self.cache.getPath("key")))
+
+
+    def test_noKey(self):
+        """
+        Without key, trees are neither stored nor loaded.
+        """
+        module = AstroidBuilder()._data_build(SOURCE, "foo", "foo.py")
+        cache = TreeCache(self.directory.path, 1024 * 1024, None)
+        cache.store("key", module)
+        self.assertFalse(os.path.exists(cache.getPath("key")))
+        self.cache.store("key", module)
+        self.assertIs(None, cache.load("key"))
+
+
+    def test_prune(self):
+        """
+        The least recently used trees are removed once the trees take more
+        space than allowed.
+        """
+        module = AstroidBuilder()._data_build(SOURCE, "foo", "foo.py")
+        for key in ("a", "b", "c"):
+            self.cache.store(key, module)
+        size = os.path.getsize(self.cache.getPath("a"))
+        for when, key in enumerate(["b", "c", "a"]):
+            os.utime(self.cache.getPath(key), (when, when))
+        self.cache.maxBytes = 2 * size
+        self.assertEqual(1, self.cache.prune())
+        self.assertEqual(["a.tree", "c.tree"],
+                         sorted(os.listdir(self.directory.path)))
+
+
+    def test_install(self):
+        """
+        Once installed, trees built from unchanged sources are loaded from
+        the cache, until uninstalled.
+        """
+        uninstall = self.cache.install()
+        try:
+            first = AstroidBuilder().file_build(self.module.path, "foo")
+            second = AstroidBuilder().file_build(self.module.path, "foo")
+        finally:
+            uninstall()
+        self.assertEqual(["foo"], self.builds)
+        self.assertEqual(first.as_string(), second.as_string())
+        self.assertIsNot(first, second)
+        AstroidBuilder().file_build(self.module.path, "foo")
+        self.assertEqual(["foo", "foo"], self.builds)
+
+
+
+class RunnerTreeCacheTests(unittest.TestCase):
+    """
+    Tests for the tree cache used by the runner.
+    """
+
+    def setUp(self):
+        """
+        Redirect stdout to a temp C{StringIO} stream, and keep the signing
+        key in a temporary configuration directory.
+        """
+        self.patch(sys, "stdout", StringIO())
+        self.patch(os, "environ", dict(os.environ,
+                                       XDG_CONFIG_HOME=self.mktemp()))
+
+
+    def test_sameResults(self):
+        """
+        The trees of the checked modules are kept in the cache directory,
+        and the same messages are reported when they are built and when
+        they are loaded.
+        """
+        module = "twistedchecker.functionaltests.comments"
+        cacheDir = FilePath(self.mktemp())
+        dataBuild = AstroidBuilder._data_build
+        expected = runChecker(self, [module])[1:]
+        self.patch(astroid.MANAGER, "astroid_cache",
+                   dict(astroid.MANAGER.astroid_cache))
+        for _ in range(2):
+            astroid.MANAGER.astroid_cache.pop(module, None)
+            output = runChecker(self, [module],
+                                ["--cache-dir=" + cacheDir.path,
+                                 "--tree-cache-size=1"])[1:]
+            self.assertEqual(expected, output)
+            self.assertEqual(1, len(cacheDir.child("trees").listdir()))
+        self.assertEqual(dataBuild, AstroidBuilder._data_build)
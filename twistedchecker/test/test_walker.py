@@ -0,0 +1,277 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twistedchecker.core.walker}.
+"""
+
+import os
+import re
+import sys
+
+from io import StringIO
+
+from twisted.python.filepath import FilePath
+from twisted.trial import unittest
+
+from twistedchecker.test.helpers import FUNCTIONAL_TESTS, runChecker
+from twistedchecker.core.walker import (GitignoreRules, Walker,
+                                        compileExcludes,
+                                        translateGitignorePattern)
+
+
+
+class TranslateGitignorePatternTests(unittest.TestCase):
+    """
+    Tests for L{translateGitignorePattern}.
+    """
+
+    def assertMatches(self, pattern, matching, notMatching):
+        """
+        Assert that a pattern matches some relative paths and not others.
+
+        @param pattern: the pattern
+        @param matching: the paths it matches
+        @param notMatching: the paths it does not match
+        """
+        match = re.compile(translateGitignorePattern(pattern)).match
+        self.assertEqual(matching, [path for path in matching
+                                    if match(path)])
+        self.assertEqual([], [path for path in notMatching if match(path)])
+
+
+    def test_unanchored(self):
+        """
+        A pattern without slash matches base names at any depth.
+        """
+        self.assertMatches("*.py", ["a.py", "b/a.py"], ["a.pyc", "a.py/b"])
+
+
+    def test_anchored(self):
+        """
+        A pattern with a slash matches paths relative to the directory of
+        the C{.gitignore} file.
+        """
+        self.assertMatches("/build", ["build"], ["a/build"])
+        self.assertMatches("a/*.py", ["a/b.py"], ["a/b/c.py", "b/a/b.py"])
+
+
+    def test_doubleStar(self):
+        """
+        C{**} matches any number of directories.
+        """
+        self.assertMatches("**/vendor", ["vendor", "a/b/vendor"],
+                           ["vendored"])
+        self.assertMatches("a/**/b", ["a/b", "a/x/y/b"], ["b"])
+        self.assertMatches("a/**", ["a/b", "a/b/c"], ["a"])
+
+
+    def test_characterClass(self):
+        """
+        Character classes, negated with C{!}, match one character.
+        """
+        self.assertMatches("[ab].py", ["a.py", "b.py"], ["c.py"])
+        self.assertMatches("[!ab].py", ["c.py"], ["a.py"])
+
+
+
+class GitignoreRulesTests(unittest.TestCase):
+    """
+    Tests for L{GitignoreRules}.
+    """
+
+    def test_match(self):
+        """
+        The last rule matching a path decides, negated rules include paths
+        again and rules with a trailing slash only match directories.
+        """
+        rules = GitignoreRules("/base", ["# Comment\n", "\n", "*.py\n",
+                                         "!keep.py\n", "build/\n"])
+        self.assertIs(True, rules.match("a/b.py", False))
+        self.assertIs(False, rules.match("a/keep.py", False))
+        self.assertIs(None, rules.match("build", False))
+        self.assertIs(True, rules.match("build", True))
+        self.assertIs(None, rules.match("README", False))
+
+
+
+class CompileExcludesTests(unittest.TestCase):
+    """
+    Tests for L{compileExcludes}.
+    """
+
+    def test_compile(self):
+        """
+        All the globs are matched by a single matcher.
+        """
+        match = compileExcludes(["build/", "*/vendor/*"])
+        self.assertTrue(match("build"))
+        self.assertTrue(match("a/vendor/b.py"))
+        self.assertFalse(match("builder"))
+
+
+    def test_empty(self):
+        """
+        There is no matcher without globs.
+        """
+        self.assertIs(None, compileExcludes([]))
+        self.assertIs(None, compileExcludes([""]))
+
+
+
+class WalkerTests(unittest.TestCase):
+    """
+    Tests for L{Walker}.
+    """
+
+    def setUp(self):
+        """
+        Create a repository with ignored and vendored files.
+        """
+        self.root = FilePath(self.mktemp())
+        self.root.child(".git").makedirs()
+        self.root.child(".gitignore").setContent(b"build/\n*.tmp.py\n")
+        package = self.root.child("pkg")
+        package.makedirs()
+        for name in ["a.py", "b.tmp.py"]:
+            package.child(name).setContent(b"")
+        package.child(".gitignore").setContent(b"generated_*.py\n")
+        package.child("generated_c.py").setContent(b"")
+        for directory in ["build", "vendor"]:
+            package.child(directory).makedirs()
+            package.child(directory).child("d.py").setContent(b"")
+        self.package = package
+
+
+    def listFiles(self, walker):
+        """
+        Walk the package and list the files found.
+
+        @param walker: the walker
+        @return: the paths of the files relative to the package
+        """
+        found = []
+        for dirpath, _, filenames in walker.walk(self.package.path):
+            found.extend(os.path.relpath(os.path.join(dirpath, name),
+                                         self.package.path)
+                         for name in filenames)
+        return sorted(found)
+
+
+    def test_likeWalk(self):
+        """
+        Without exclusions, directories are walked like L{os.walk} does.
+        """
+        walker = Walker(gitignore=False)
+        self.assertEqual(list(os.walk(self.package.path)),
+                         list(walker.walk(self.package.path)))
+
+
+    def test_gitignore(self):
+        """
+        Files and directories ignored by the C{.gitignore} files of the
+        walked directories and of their parents, up to the root of the
+        repository, are skipped.
+        """
+        self.assertEqual(
+            [".gitignore", "a.py", os.path.join("vendor", "d.py")],
+            self.listFiles(Walker()))
+
+
+    def test_notInRepository(self):
+        """
+        The C{.gitignore} files of the parents of a directory which is not
+        in a repository are not used, its own ones are. Repositories are
+        not looked for above the ceiling directories, so that the test
+        passes in a checkout of twistedchecker too.
+        """
+        self.root.child(".git").remove()
+        walker = Walker(ceilings=[self.root.parent().path])
+        self.assertEqual([".gitignore", "a.py", "b.tmp.py",
+                          os.path.join("build", "d.py"),
+                          os.path.join("vendor", "d.py")],
+                         self.listFiles(walker))
+
+
+    def test_ceilingsFromEnvironment(self):
+        """
+        The ceiling directories are the ones of C{GIT_CEILING_DIRECTORIES}
+        by default.
+        """
+        self.patch(os, "environ", {"GIT_CEILING_DIRECTORIES": os.pathsep.join(
+            ["", self.root.parent().path])})
+        self.assertEqual(set([os.path.abspath(self.root.parent().path)]),
+                         Walker().ceilings)
+
+
+    def test_exclude(self):
+        """
+        Excluded directories are not listed.
+        """
+        listed = []
+        scandir = os.scandir
+
+        def recordingScandir(path):
+            listed.append(os.path.basename(path))
+            return scandir(path)
+        self.patch(os, "scandir", recordingScandir)
+        walker = Walker(excludes=["vendor", "*/a.py"], gitignore=False)
+        self.assertEqual([".gitignore", "b.tmp.py",
+                          os.path.join("build", "d.py"), "generated_c.py"],
+                         self.listFiles(walker))
+        self.assertNotIn("vendor", listed)
+
+
+    def test_isExcluded(self):
+        """
+        A file is excluded when its base name, its path or the one of any
+        of its parent directories matches an excluded glob.
+        """
+        walker = Walker(excludes=["vendor", "pkg/build", "*.tmp.py"])
+        self.assertTrue(walker.isExcluded(os.path.join("a", "vendor", "b.py")))
+        self.assertTrue(walker.isExcluded(os.path.join("pkg", "build",
+                                                       "c.py")))
+        self.assertTrue(walker.isExcluded("d.tmp.py"))
+        self.assertFalse(walker.isExcluded(os.path.join("a", "build",
+                                                        "c.py")))
+        self.assertFalse(Walker().isExcluded("d.tmp.py"))
+
+
+
+
+class RunnerExcludeTests(unittest.TestCase):
+    """
+    Tests for the exclusion of paths by the runner.
+    """
+
+    def setUp(self):
+        """
+        Redirect stdout to a temp C{StringIO} stream.
+        """
+        self.patch(sys, "stdout", StringIO())
+
+
+    def reportedModules(self, options):
+        """
+        Run twistedchecker on the functional tests and get the names of the
+        modules reported.
+
+        @param options: the options of the run
+        @return: the names of the modules
+        """
+        runner, _, output = runChecker(self, [FUNCTIONAL_TESTS],
+                                       ["--cache-dir="] + options)
+        return [line.split()[-1] for line in output
+                if line.startswith(runner.prefixModuleName)]
+
+
+    def test_exclude(self):
+        """
+        Excluded modules are not checked.
+        """
+        comments = FUNCTIONAL_TESTS + ".comments"
+        modules = self.reportedModules([])
+        self.assertIn(comments, modules)
+        excluded = self.reportedModules(["--exclude=comments.py"])
+        self.assertEqual([module for module in modules if module != comments],
+                         excluded)